@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Hedged ask-mode queries across the Cursor and Codex backends.
+
+Starts the question on the preferred backend and, if no answer has arrived
+after --hedge-delay seconds (set it near that backend's p90 latency), starts
+the same question on the other backend. The first successful answer wins and
+the other run's process group is killed. A backend that fails outright (not
+installed, rate-limited, error exit) starts the other one immediately instead
+of waiting out the delay.
+
+Only ask mode is hedged: agent/plan runs write to the workspace and must never
+run twice. Both runs take read-only slots in the job queue (agent_queue.py),
+and an answer already in either backend's ask cache is returned without
+starting anything.
+
+Usage:
+  agent_hedge.py --prompt "..." [--workspace /path] [--prefer cursor|codex] [--hedge-delay 20]
+
+Output (JSON): the winning run's result (see cursor_agent_direct.py /
+codex_agent_direct.py) plus
+  "backend": "cursor" | "codex",
+  "hedged": true if the second backend was started,
+  "hedge": { "<backend>": { "status": "won|failed|cancelled|not_started", "duration_ms": ... } }
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from agent_ledger import record_run
+from agent_process import exit_on_sigterm
+from agent_queue import DEFAULT_MAX_CONCURRENT, job_slot, max_concurrent
+from agent_workspace import workspace_fingerprint
+from codex_agent_direct import run_codex_agent
+from cursor_agent_direct import ASK_CACHE_NAMESPACE, run_cursor_agent
+from response_cache import DEFAULT_TTL_S, ResponseCache
+
+BACKENDS = {"cursor": run_cursor_agent, "codex": run_codex_agent}
+DEFAULT_HEDGE_DELAY_S = 20.0
+# How long to wait for a cancelled run to be killed and release its slot
+LOSER_JOIN_TIMEOUT_S = 10
+
+
+def hedge_delay() -> float:
+    """Default hedge delay (CLAW_HEDGE_DELAY_S); a bad value falls back to DEFAULT_HEDGE_DELAY_S."""
+    try:
+        return float(os.environ.get("CLAW_HEDGE_DELAY_S", DEFAULT_HEDGE_DELAY_S))
+    except ValueError:
+        return DEFAULT_HEDGE_DELAY_S
+
+
+def _error_result(error: str, **extra) -> dict:
+    return {
+        "ok": False,
+        "error": error,
+        "output": "",
+        "exit_code": -1,
+        "duration_ms": 0,
+        "files_created": [],
+        "truncated": False,
+        **extra,
+    }
+
+
+def _start(backend: str, params: dict, cancel: threading.Event, results: queue.Queue,
+           limit: int | None, wait_timeout: float | None) -> threading.Thread:
+    """Run one backend in a thread inside a shared (ask) job slot; posts (backend, result)."""
+
+    def target() -> None:
+        try:
+            with job_slot(params["workspace"] or os.getcwd(), exclusive=False, limit=limit,
+                          wait_timeout=wait_timeout, should_cancel=cancel.is_set) as slot:
+                result = BACKENDS[backend](**params, cancel_event=cancel)
+            result["queue_wait_ms"] = slot["queue_wait_ms"]
+        except InterruptedError:
+            result = _error_result("cancelled while queued", cancelled=True)
+        except TimeoutError as exc:
+            result = _error_result(str(exc), busy=True)
+            record_run(backend, "ask", params["model"], params["workspace"] or os.getcwd(),
+                       params["prompt"], result)
+        except Exception as exc:
+            result = _error_result(str(exc))
+        results.put((backend, result))
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def run_hedged(
+    prompt: str,
+    workspace: str | None = None,
+    prefer: str = "cursor",
+    hedge_delay_s: float | None = None,
+    timeout_s: int = 600,
+    models: dict | None = None,
+    limit: int | None = None,
+    wait_timeout: float | None = None,
+) -> tuple[str, dict, dict]:
+    """
+    Ask prompt on prefer, hedging to the other backend after hedge_delay_s.
+
+    Returns (backend, result, hedge) where hedge maps each backend to its
+    status. If both runs fail, the preferred backend's failure is returned.
+    hedge_delay_s defaults to hedge_delay().
+    """
+    if hedge_delay_s is None:
+        hedge_delay_s = hedge_delay()
+    order = [prefer, "codex" if prefer == "cursor" else "cursor"]
+    models = models or {}
+    cancels = {b: threading.Event() for b in order}
+    results: queue.Queue = queue.Queue()
+    threads: dict[str, threading.Thread] = {}
+    finished: dict[str, dict] = {}
+    start = time.monotonic()
+
+    def launch(backend: str) -> None:
+        params = {
+            "prompt": prompt,
+            "workspace": workspace,
+            "model": models.get(backend, "auto"),
+            "mode": "ask",
+            "timeout_s": timeout_s,
+        }
+        threads[backend] = _start(backend, params, cancels[backend], results, limit, wait_timeout)
+
+    launch(order[0])
+    winner = None
+    try:
+        while len(finished) < len(threads):
+            wait = None
+            if len(threads) < len(order):
+                wait = max(0.0, start + hedge_delay_s - time.monotonic())
+            try:
+                backend, result = results.get(timeout=wait)
+            except queue.Empty:
+                launch(order[1])
+                continue
+            finished[backend] = result
+            if result.get("ok"):
+                winner = backend
+                break
+            if len(threads) < len(order):
+                launch(order[1])
+    finally:
+        # Also on SIGTERM/Ctrl-C: runs in worker threads must be stopped explicitly
+        for backend in threads:
+            if backend != winner and backend not in finished:
+                cancels[backend].set()
+        for thread in threads.values():
+            thread.join(LOSER_JOIN_TIMEOUT_S)
+
+    hedge = {}
+    for backend in order:
+        if backend not in threads:
+            hedge[backend] = {"status": "not_started"}
+            continue
+        result = finished.get(backend)
+        if result is None:
+            hedge[backend] = {"status": "cancelled"}
+            continue
+        status = "won" if backend == winner else "failed"
+        hedge[backend] = {"status": status, "duration_ms": result.get("duration_ms", 0)}
+        if not result.get("ok"):
+            hedge[backend]["error"] = result.get("error", "")
+
+    if winner is None:
+        winner = order[0] if order[0] in finished else order[1]
+    return winner, finished[winner], hedge
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Hedged ask-mode query: preferred backend first, the other after a delay; first answer wins.",
+    )
+    ap.add_argument("--prompt", required=True, help="Question to ask (read-only ask mode)")
+    ap.add_argument("--workspace", default=None, help="Workspace path")
+    ap.add_argument("--prefer", default="cursor", choices=sorted(BACKENDS), help="Backend started first")
+    ap.add_argument("--hedge-delay", type=float, default=hedge_delay(),
+                    help=f"Seconds before starting the second backend, ~p90 of the preferred one "
+                         f"(env: CLAW_HEDGE_DELAY_S, default: {DEFAULT_HEDGE_DELAY_S:g})")
+    ap.add_argument("--timeout", type=int, default=600, help="Per-backend timeout in seconds (default: 600)")
+    ap.add_argument("--cursor-model", default="auto", help="Model for Cursor (default: auto)")
+    ap.add_argument("--codex-model", default="auto", help="Model for Codex (default: auto)")
+    ap.add_argument("--max-concurrent", type=int, default=max_concurrent(),
+                    help=f"Host-wide limit on concurrent agent runs (env: CLAW_AGENT_MAX_CONCURRENT, "
+                         f"default: {DEFAULT_MAX_CONCURRENT})")
+    ap.add_argument("--queue-timeout", type=float, default=None,
+                    help="Give up on a backend if no agent slot is free after N seconds (default: wait)")
+    ap.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL_S,
+                    help=f"Seconds to reuse identical ask-mode answers (default: {DEFAULT_TTL_S})")
+    ap.add_argument("--no-cache", action="store_true", help="Do not read or write the ask-mode result cache")
+    args = ap.parse_args()
+    exit_on_sigterm()
+
+    models = {"cursor": args.cursor_model, "codex": args.codex_model}
+    order = [args.prefer] + [b for b in sorted(BACKENDS) if b != args.prefer]
+
+    # Same keys as the single-backend wrappers, so their cached answers count too.
+    cache = keys = None
+    if not args.no_cache:
+        cache = ResponseCache(ASK_CACHE_NAMESPACE, ttl_s=args.cache_ttl)
+        fingerprint = workspace_fingerprint(args.workspace or os.getcwd())
+        keys = {b: cache.key(b, models[b], args.prompt, fingerprint) for b in order}
+        for backend in order:
+            hit = cache.get(keys[backend])
+            if hit:
+                result = dict(hit["value"], cached=True, cache_age_s=hit["age_s"],
+                              backend=backend, hedged=False)
+                record_run(backend, "ask", models[backend], args.workspace or os.getcwd(), args.prompt, result)
+                print(json.dumps(result, indent=2))
+                return 0 if result.get("ok") else 1
+
+    backend, result, hedge = run_hedged(
+        args.prompt,
+        workspace=args.workspace,
+        prefer=args.prefer,
+        hedge_delay_s=args.hedge_delay,
+        timeout_s=args.timeout,
+        models=models,
+        limit=args.max_concurrent,
+        wait_timeout=args.queue_timeout,
+    )
+    if cache is not None and result.get("ok"):
+        cache.put(keys[backend], result)
+
+    result = dict(result, backend=backend,
+                  hedged=sum(1 for h in hedge.values() if h["status"] != "not_started") > 1,
+                  hedge=hedge)
+    if cache is not None:
+        result["cached"] = False
+    print(json.dumps(result, indent=2))
+    return 0 if result.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Local SQLite ledger of agent runs (Cursor, Codex, PicoClaw chat).
+
+Every run finished by run_cursor_agent(), run_codex_agent() or picoclaw
+`cmd_chat` is appended here: backend, mode, model, workspace, a hash of the
+prompt (never the prompt itself), duration, exit code, status, output bytes,
+files changed and truncation, plus token usage and the event telemetry when
+the backend reports them (Codex) and time to first output (PicoClaw). The CLI answers capacity questions from it.
+
+Ledger file: CLAW_LEDGER_DB (default ~/.openclaw/agent-ledger.sqlite3)
+
+Usage:
+  agent_ledger.py stats [--backend cursor] [--mode ask] [--since 7d]
+  agent_ledger.py slowest [--backend codex] [--since 24h] [--limit 10] [--sort duration|tokens]
+  agent_ledger.py prune --older-than 90d
+  agent_ledger.py timeout --backend cursor --mode agent [--workspace /path] [--default 900]
+
+The wrappers' `--timeout auto` uses adaptive_timeout(): p99 of recent
+successful runs for the same (backend, mode, workspace) times a margin,
+clamped between CLAW_AUTO_TIMEOUT_MIN_S and the static default. With too few
+runs it falls back to all workspaces, then to the static default. A run still
+going past its p95 emits a "slow_run" warning event.
+
+Output (JSON), stats:
+  { "since": "...", "groups": [ { "backend": "cursor", "mode": "agent", "runs": 42,
+    "p50_ms": 51000, "p95_ms": 300000, "p99_ms": 610000,
+    "timeout_rate": 0.02, "error_rate": 0.05, ... } ] }
+
+Percentiles and rates cover real runs only: cache hits, cancelled (lost
+hedge) and busy (no queue slot) entries are counted separately.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+LEDGER_DB = Path(os.environ.get("CLAW_LEDGER_DB", Path.home() / ".openclaw" / "agent-ledger.sqlite3"))
+BUSY_TIMEOUT_MS = 5000
+# Statuses excluded from latency percentiles and rates
+NON_RUN_STATUSES = ("cached", "cancelled", "busy")
+
+# --timeout auto: p99 of recent successful runs x margin, clamped
+AUTO_TIMEOUT_MARGIN = 2.0
+AUTO_TIMEOUT_MIN_S = 60.0
+AUTO_TIMEOUT_MIN_RUNS = 20  # fewer recorded runs than this -> wider basis / static default
+AUTO_TIMEOUT_WINDOW = 500  # most recent successful runs considered
+
+# Schema migrations, applied in order; PRAGMA user_version records how many ran.
+MIGRATIONS = [
+    """
+    CREATE TABLE runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts REAL NOT NULL,
+        backend TEXT NOT NULL,
+        mode TEXT,
+        model TEXT,
+        workspace TEXT,
+        prompt_hash TEXT,
+        prompt_chars INTEGER,
+        status TEXT NOT NULL,
+        duration_ms INTEGER,
+        exit_code INTEGER,
+        output_bytes INTEGER,
+        files_changed INTEGER,
+        truncated INTEGER
+    );
+    CREATE INDEX runs_backend_ts ON runs (backend, ts);
+    """,
+    # 2: token usage and event telemetry (Codex)
+    """
+    ALTER TABLE runs ADD COLUMN input_tokens INTEGER;
+    ALTER TABLE runs ADD COLUMN output_tokens INTEGER;
+    ALTER TABLE runs ADD COLUMN telemetry TEXT;
+    """,
+    # 3: time to first output (PicoClaw chat)
+    """
+    ALTER TABLE runs ADD COLUMN ttft_ms INTEGER;
+    """,
+]
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    """Open the ledger (creating/migrating it) with WAL so concurrent wrappers don't block each other."""
+    path = path or LEDGER_DB
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] < len(MIGRATIONS):
+        _migrate(conn)
+    return conn
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """
+    Apply pending migrations in one write transaction. user_version is re-read
+    after BEGIN IMMEDIATE: two wrappers opening a fresh ledger at once would
+    otherwise both run the same CREATE/ALTER and one would fail.
+    """
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # manual transaction; executescript() would COMMIT early
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for i, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in migration.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {i}")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    finally:
+        conn.isolation_level = isolation_level
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8", errors="replace")).hexdigest()[:16]
+
+
+def run_status(result: dict) -> str:
+    """Classify a wrapper result: ok, timeout, stalled, aborted, cancelled, busy, cached or error."""
+    if result.get("cached"):
+        return "cached"
+    if result.get("cancelled"):
+        return "cancelled"
+    if result.get("busy"):
+        return "busy"
+    if result.get("stalled"):
+        return "stalled"
+    if result.get("aborted"):
+        return "aborted"
+    if "timed out" in (result.get("error") or ""):
+        return "timeout"
+    return "ok" if result.get("ok") else "error"
+
+
+def record_run(backend: str, mode: str | None, model: str | None, workspace: str | None,
+               prompt: str, result: dict) -> None:
+    """Append one run to the ledger. Never raises: the ledger must not break a run."""
+    files_changed = sum(len(result.get(k) or []) for k in ("files_created", "files_modified", "files_deleted"))
+    output_bytes = result.get("output_bytes")
+    if output_bytes is None:
+        output_bytes = (result.get("resources") or {}).get("output_bytes")
+    telemetry = result.get("telemetry")
+    tokens = (telemetry or {}).get("tokens") or {}
+    row = (
+        time.time(),
+        backend,
+        mode,
+        model,
+        os.path.realpath(workspace) if workspace else None,
+        prompt_hash(prompt),
+        len(prompt),
+        run_status(result),
+        result.get("duration_ms"),
+        result.get("exit_code"),
+        output_bytes,
+        files_changed,
+        int(bool(result.get("truncated"))),
+        tokens.get("input"),
+        tokens.get("output"),
+        json.dumps(telemetry, separators=(",", ":")) if telemetry else None,
+        result.get("ttft_ms"),
+    )
+    try:
+        conn = connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO runs (ts, backend, mode, model, workspace, prompt_hash, prompt_chars, status,"
+                    " duration_ms, exit_code, output_bytes, files_changed, truncated,"
+                    " input_tokens, output_tokens, telemetry, ttft_ms)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def parse_age(text: str) -> float:
+    """'90s', '30m', '24h', '7d' (or plain seconds) -> seconds."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def percentile(sorted_values: list, q: float):
+    """Nearest-rank percentile of an ascending list (None if empty)."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _where(backend: str | None, mode: str | None, since_s: float | None,
+           workspace: str | None = None) -> tuple[str, list]:
+    clauses = []
+    params: list = []
+    if backend:
+        clauses.append("backend = ?")
+        params.append(backend)
+    if mode:
+        clauses.append("mode = ?")
+        params.append(mode)
+    if workspace:
+        clauses.append("workspace = ?")
+        params.append(os.path.realpath(workspace))
+    if since_s:
+        clauses.append("ts >= ?")
+        params.append(time.time() - since_s)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def stats(backend: str | None = None, mode: str | None = None, since_s: float | None = None,
+          workspace: str | None = None, conn: sqlite3.Connection | None = None,
+          slo_ms: int | None = None) -> list[dict]:
+    """
+    Per (backend, mode) latency percentiles, timeout/error rates and volume.
+
+    With slo_ms, "slo_within_rate" is the share of runs that succeeded within
+    slo_ms (errors and timeouts count as misses).
+    """
+    own = conn is None
+    conn = conn or connect()
+    try:
+        where, params = _where(backend, mode, since_s, workspace)
+        rows = conn.execute(
+            "SELECT backend, mode, status, duration_ms, output_bytes, files_changed, truncated,"
+            f" input_tokens, output_tokens, ttft_ms FROM runs{where}"
+            " ORDER BY backend, mode",
+            params,
+        ).fetchall()
+    finally:
+        if own:
+            conn.close()
+
+    groups: dict[tuple, list] = {}
+    for row in rows:
+        groups.setdefault((row["backend"], row["mode"]), []).append(row)
+
+    out = []
+    for (group_backend, group_mode), group in groups.items():
+        runs = [r for r in group if r["status"] not in NON_RUN_STATUSES]
+        durations = sorted(r["duration_ms"] for r in runs if r["duration_ms"] is not None)
+        n = len(runs)
+        entry = {
+            "backend": group_backend,
+            "mode": group_mode,
+            "runs": n,
+            "p50_ms": percentile(durations, 50),
+            "p95_ms": percentile(durations, 95),
+            "p99_ms": percentile(durations, 99),
+            "max_ms": durations[-1] if durations else None,
+            "timeout_rate": round(sum(r["status"] == "timeout" for r in runs) / n, 4) if n else None,
+            "error_rate": round(sum(r["status"] in ("error", "aborted", "stalled") for r in runs) / n, 4) if n else None,
+            "truncated_rate": round(sum(bool(r["truncated"]) for r in runs) / n, 4) if n else None,
+            "avg_output_bytes": int(sum(r["output_bytes"] or 0 for r in runs) / n) if n else None,
+            "files_changed": sum(r["files_changed"] or 0 for r in runs),
+        }
+        with_tokens = [r for r in runs if r["input_tokens"] is not None]
+        if with_tokens:
+            entry["avg_input_tokens"] = int(sum(r["input_tokens"] for r in with_tokens) / len(with_tokens))
+            entry["avg_output_tokens"] = int(sum(r["output_tokens"] or 0 for r in with_tokens) / len(with_tokens))
+        if slo_ms is not None:
+            within = sum(r["status"] == "ok" and r["duration_ms"] is not None and r["duration_ms"] <= slo_ms
+                         for r in runs)
+            entry["slo_within_rate"] = round(within / n, 4) if n else None
+        ttfts = sorted(r["ttft_ms"] for r in runs if r["ttft_ms"] is not None)
+        if ttfts:
+            entry["p50_ttft_ms"] = percentile(ttfts, 50)
+            entry["p95_ttft_ms"] = percentile(ttfts, 95)
+        for status in NON_RUN_STATUSES:
+            entry[status] = sum(r["status"] == status for r in group)
+        out.append(entry)
+    return out
+
+
+def slowest(backend: str | None = None, mode: str | None = None, since_s: float | None = None,
+            limit: int = 10, sort: str = "duration") -> list[dict]:
+    """Slowest prompts (by their longest run), or the most token-heavy with sort="tokens"."""
+    order = "max_tokens DESC" if sort == "tokens" else "max_ms DESC"
+    conn = connect()
+    try:
+        where, params = _where(backend, mode, since_s)
+        status_filter = " AND " if where else " WHERE "
+        status_filter += "status NOT IN ({})".format(", ".join("?" for _ in NON_RUN_STATUSES))
+        rows = conn.execute(
+            "SELECT backend, mode, prompt_hash, MAX(prompt_chars) AS prompt_chars, COUNT(*) AS runs,"
+            " MAX(duration_ms) AS max_ms, CAST(AVG(duration_ms) AS INTEGER) AS avg_ms,"
+            " SUM(status = 'timeout') AS timeouts, MAX(input_tokens + IFNULL(output_tokens, 0)) AS max_tokens,"
+            " MAX(workspace) AS workspace, MAX(ts) AS last_ts"
+            f" FROM runs{where}{status_filter}"
+            f" GROUP BY backend, mode, prompt_hash ORDER BY {order} LIMIT ?",
+            [*params, *NON_RUN_STATUSES, limit],
+        ).fetchall()
+    finally:
+        conn.close()
+    out = []
+    for row in rows:
+        entry = dict(row)
+        entry["last_run"] = datetime.fromtimestamp(entry.pop("last_ts"), timezone.utc).isoformat()
+        out.append(entry)
+    return out
+
+
+def prune(older_than_s: float) -> int:
+    conn = connect()
+    try:
+        with conn:
+            cur = conn.execute("DELETE FROM runs WHERE ts < ?", (time.time() - older_than_s,))
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Adaptive timeouts
+# ---------------------------------------------------------------------------
+
+def timeout_arg(text: str):
+    """argparse type for --timeout: seconds, or "auto" for adaptive_timeout()."""
+    if text == "auto":
+        return text
+    try:
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected seconds or 'auto', got {text!r}") from None
+
+
+def _recent_ok_durations(conn: sqlite3.Connection, backend: str, mode: str | None,
+                         workspace: str | None) -> list[int]:
+    where, params = _where(backend, mode, None, workspace)
+    rows = conn.execute(
+        f"SELECT duration_ms FROM runs{where} AND status = 'ok' AND duration_ms IS NOT NULL"
+        " ORDER BY ts DESC LIMIT ?",
+        [*params, AUTO_TIMEOUT_WINDOW],
+    ).fetchall()
+    return sorted(r[0] for r in rows)
+
+
+def _env_float(name: str, default: float) -> float:
+    """Float setting from the environment; a bad value falls back to default."""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def adaptive_timeout(backend: str, mode: str | None, workspace: str | None, default_s: float,
+                     margin: float | None = None, min_s: float | None = None,
+                     min_runs: int = AUTO_TIMEOUT_MIN_RUNS) -> dict:
+    """
+    Timeout derived from recorded run durations.
+
+    Uses successful runs only (timed-out runs would just echo the old limit).
+    Returns {"timeout_s", "slow_after_s", "basis", "runs", "p95_ms", "p99_ms"}:
+    basis is "workspace", "backend" (all workspaces) or "default" when there is
+    not enough history, in which case timeout_s is default_s and slow_after_s
+    is None. Never longer than default_s, so long jobs keep today's ceiling.
+    margin and min_s default to CLAW_AUTO_TIMEOUT_MARGIN / CLAW_AUTO_TIMEOUT_MIN_S.
+    """
+    margin = _env_float("CLAW_AUTO_TIMEOUT_MARGIN", AUTO_TIMEOUT_MARGIN) if margin is None else margin
+    min_s = _env_float("CLAW_AUTO_TIMEOUT_MIN_S", AUTO_TIMEOUT_MIN_S) if min_s is None else min_s
+    fallback = {"timeout_s": int(default_s), "slow_after_s": None, "basis": "default",
+                "runs": 0, "p95_ms": None, "p99_ms": None}
+    try:
+        conn = connect()
+        try:
+            candidates = [("workspace", workspace)] if workspace else []
+            candidates.append(("backend", None))
+            for basis, ws in candidates:
+                durations = _recent_ok_durations(conn, backend, mode, ws)
+                if len(durations) >= min_runs:
+                    break
+            else:
+                fallback["runs"] = len(durations)
+                return fallback
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        return fallback
+
+    p95_ms = percentile(durations, 95)
+    p99_ms = percentile(durations, 99)
+    timeout_s = min(max(math.ceil(p99_ms * margin / 1000), min_s), default_s)
+    return {
+        "timeout_s": int(timeout_s),
+        "slow_after_s": round(p95_ms / 1000, 3),
+        "basis": basis,
+        "runs": len(durations),
+        "p95_ms": p95_ms,
+        "p99_ms": p99_ms,
+    }
+
+
+def print_warning(event: dict) -> None:
+    """Default on_warning for the CLIs: one JSON line on stderr (stdout holds the result)."""
+    print(json.dumps(event), file=sys.stderr, flush=True)
+
+
+@contextmanager
+def slow_run_watch(slow_after_s: float | None, on_warning=None):
+    """
+    Call on_warning(event) once if the block is still running after slow_after_s.
+
+    Yields a dict that gets "slow_run" (the event) set when it fires, so the
+    caller can mark its result even without a listener.
+    """
+    state: dict = {}
+    if not slow_after_s:
+        yield state
+        return
+
+    def fire() -> None:
+        event = {"type": "warning", "event": "slow_run", "elapsed_s": slow_after_s,
+                 "message": f"run exceeded its p95 duration ({slow_after_s:g}s)"}
+        state["slow_run"] = event
+        if on_warning is not None:
+            on_warning(event)
+
+    timer = threading.Timer(slow_after_s, fire)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield state
+    finally:
+        timer.cancel()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Query the local agent run ledger.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    def add_filters(p):
+        p.add_argument("--backend", default=None, help="cursor, codex or picoclaw")
+        p.add_argument("--mode", default=None, help="agent, plan, ask (chat for picoclaw)")
+        p.add_argument("--since", default=None, help="Only runs newer than this age, e.g. 24h or 7d")
+
+    p_stats = sub.add_parser("stats", help="p50/p95/p99 durations, timeout and error rates per backend/mode")
+    add_filters(p_stats)
+    p_stats.add_argument("--workspace", default=None, help="Only runs in this workspace")
+
+    p_slow = sub.add_parser("slowest", help="Slowest prompts (by prompt hash)")
+    add_filters(p_slow)
+    p_slow.add_argument("--limit", type=int, default=10, help="Max prompts to show (default 10)")
+    p_slow.add_argument("--sort", default="duration", choices=["duration", "tokens"],
+                        help="Rank by longest run or by most tokens (input + output)")
+
+    p_prune = sub.add_parser("prune", help="Delete old runs")
+    p_prune.add_argument("--older-than", required=True, help="Age, e.g. 90d")
+
+    p_timeout = sub.add_parser("timeout", help="Show the timeout --timeout auto would pick")
+    p_timeout.add_argument("--backend", required=True, help="cursor, codex or picoclaw")
+    p_timeout.add_argument("--mode", default=None, help="agent, plan, ask (chat for picoclaw)")
+    p_timeout.add_argument("--workspace", default=None, help="Workspace path")
+    p_timeout.add_argument("--default", type=float, default=900, help="Static timeout / ceiling (default: 900)")
+
+    args = ap.parse_args()
+
+    try:
+        if args.cmd == "prune":
+            removed = prune(parse_age(args.older_than))
+            print(json.dumps({"ok": True, "removed": removed}, indent=2))
+            return 0
+        if args.cmd == "timeout":
+            auto = adaptive_timeout(args.backend, args.mode, args.workspace, args.default)
+            print(json.dumps(auto, indent=2))
+            return 0
+        since_s = parse_age(args.since) if args.since else None
+        if args.cmd == "stats":
+            groups = stats(args.backend, args.mode, since_s, args.workspace)
+            print(json.dumps({"ledger": str(LEDGER_DB), "since": args.since, "groups": groups}, indent=2))
+            return 0
+        if args.cmd == "slowest":
+            prompts = slowest(args.backend, args.mode, since_s, args.limit, args.sort)
+            print(json.dumps({"ledger": str(LEDGER_DB), "since": args.since, "prompts": prompts}, indent=2))
+            return 0
+    except ValueError as exc:
+        ap.error(str(exc))
+    except sqlite3.Error as exc:
+        print(json.dumps({"ok": False, "error": f"ledger error: {exc}"}, indent=2))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
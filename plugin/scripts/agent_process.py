@@ -0,0 +1,475 @@
+"""
+Subprocess runner with bounded, streaming output capture.
+
+Used by the Cursor/Codex agent wrappers and picoclaw_client.py instead of
+subprocess.run(capture_output=True), which buffers the whole output in memory
+before we truncate it. Each stream is drained by a reader thread into a
+BoundedBuffer that keeps a fixed-size head plus a ring-buffer tail and counts
+total bytes, so a runaway process printing gigabytes cannot grow our RSS and
+the end-of-run summary (usually the useful part) is preserved. Callers that
+need to react to output as it streams (e.g. JSONL event parsing) can pass
+a per-line callback that may also stop the process early.
+
+Each run also reports what it cost (see resource_summary): CPU time, peak RSS and
+context switches of the child from os.wait4(), plus the peak RSS summed over
+the whole process tree, sampled from /proc while it runs (Linux only).
+"""
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from output_filter import MAX_LINE_BYTES, LineFilter, merge_stats
+
+MAX_OUTPUT_BYTES = 100 * 1024  # 100 KB
+READ_CHUNK_BYTES = 64 * 1024
+READER_JOIN_TIMEOUT_S = 2.0
+POLL_INTERVAL_S = 0.1
+RSS_SAMPLE_INTERVAL_S = 0.5
+KILL_GRACE_S = 5.0  # SIGTERM -> SIGKILL grace when stopping a process tree
+_PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024 if hasattr(os, "sysconf") else 4
+
+
+def _omitted_marker(omitted: int) -> str:
+    return f"\n\n... [truncated: {omitted} bytes omitted] ...\n\n"
+
+
+class BoundedBuffer:
+    """Keep the first head_bytes and last tail_bytes written; count everything."""
+
+    def __init__(self, limit_bytes: int = MAX_OUTPUT_BYTES):
+        self.head_limit = limit_bytes // 2
+        self.tail_limit = limit_bytes - self.head_limit
+        self.head = bytearray()
+        self.tail: deque[bytes] = deque()
+        self.tail_size = 0
+        self.total_bytes = 0
+        self.last_read = time.monotonic()  # set by _pump on every chunk read, kept or not
+
+    def write(self, data: bytes) -> None:
+        if not data:
+            return
+        self.total_bytes += len(data)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+            if not data:
+                return
+        self.tail.append(data)
+        self.tail_size += len(data)
+        # Drop whole chunks from the left while the rest still covers tail_limit
+        while self.tail and self.tail_size - len(self.tail[0]) >= self.tail_limit:
+            self.tail_size -= len(self.tail.popleft())
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_bytes > len(self.head) + min(self.tail_size, self.tail_limit)
+
+    def getvalue(self) -> str:
+        """Decoded head + tail, with an omission marker when bytes were dropped."""
+        tail = b"".join(self.tail)[-self.tail_limit:] if self.tail else b""
+        head = self.head.decode("utf-8", errors="replace")
+        omitted = self.total_bytes - len(self.head) - len(tail)
+        if omitted > 0:
+            return head + _omitted_marker(omitted) + tail.decode("utf-8", errors="replace")
+        return head + tail.decode("utf-8", errors="replace")
+
+
+def truncate_middle(text: str, limit_bytes: int = MAX_OUTPUT_BYTES) -> tuple[str, bool]:
+    """Cap text at limit_bytes (UTF-8) keeping head and tail. Returns (text, truncated)."""
+    data = text.encode("utf-8", errors="replace")
+    if len(data) <= limit_bytes:
+        return text, False
+    buf = BoundedBuffer(limit_bytes)
+    buf.write(data)
+    return buf.getvalue(), True
+
+
+class LineSplitter:
+    """Split a byte stream into decoded lines; over-long lines are cut at max_line_bytes."""
+
+    def __init__(self, on_line, max_line_bytes: int = MAX_LINE_BYTES):
+        self.on_line = on_line
+        self.max_line_bytes = max_line_bytes
+        self.pending = bytearray()
+        self.overflow = False
+
+    def feed(self, data: bytes) -> bool:
+        """Feed a chunk; returns True as soon as on_line() asks to stop."""
+        stop = False
+        pos = 0
+        while pos < len(data):
+            nl = data.find(b"\n", pos)
+            end = len(data) if nl < 0 else nl
+            if not self.overflow:
+                room = self.max_line_bytes - len(self.pending)
+                self.pending += data[pos:min(end, pos + room)]
+                self.overflow = len(self.pending) >= self.max_line_bytes
+            if nl < 0:
+                break
+            pos = nl + 1
+            stop = self._emit() or stop
+        return stop
+
+    def close(self) -> bool:
+        return self._emit() if self.pending else False
+
+    def _emit(self) -> bool:
+        line = self.pending.decode("utf-8", errors="replace").rstrip("\r")
+        self.pending = bytearray()
+        self.overflow = False
+        return bool(self.on_line(line))
+
+
+def _split(splitter: LineSplitter, method, *args) -> bool:
+    """
+    Run a LineSplitter call for _pump. An exception from the on_line callback
+    must not kill the reader thread: the pipe would stop draining and the
+    child would block on it until the timeout. The callback is then switched
+    off for the rest of the stream, and the output is still captured.
+    """
+    try:
+        return method(*args)
+    except Exception:
+        splitter.on_line = lambda line: False
+        return False
+
+
+def _pump(stream, buf: BoundedBuffer, splitter: LineSplitter | None = None,
+          stop_event: threading.Event | None = None, line_filter: LineFilter | None = None,
+          on_chunk=None) -> None:
+    fd = stream.fileno()
+    try:
+        while True:
+            chunk = os.read(fd, READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            buf.last_read = time.monotonic()
+            if on_chunk:
+                try:
+                    on_chunk(chunk)
+                except Exception:
+                    on_chunk = None  # as in _split(): keep draining, stop calling it
+            # The line callback sees the raw stream; only what we keep is filtered
+            buf.write(line_filter.feed(chunk) if line_filter else chunk)
+            if splitter and _split(splitter, splitter.feed, chunk) and stop_event:
+                stop_event.set()
+        if line_filter:
+            buf.write(line_filter.close())
+        if splitter and _split(splitter, splitter.close) and stop_event:
+            stop_event.set()
+    except OSError:
+        pass
+    finally:
+        try:
+            stream.close()
+        except OSError:
+            pass
+
+
+def _reap(proc: subprocess.Popen, block: bool):
+    """wait4() the child; sets proc.returncode and returns its rusage, or None if still running."""
+    try:
+        pid, status, rusage = os.wait4(proc.pid, 0 if block else os.WNOHANG)
+    except ChildProcessError:
+        proc.wait()
+        return None
+    if pid == 0:
+        return None
+    proc.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+    return rusage
+
+
+def _proc_table() -> dict[int, tuple[str, int, int]] | None:
+    """{pid: (state, ppid, pgid)} for every process, from one /proc scan; None without /proc."""
+    try:
+        pids = [int(name) for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return None
+    table = {}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces/parens; fields resume after the last ')'
+        fields = stat[stat.rfind(b")") + 2:].split()
+        table[pid] = (fields[0].decode(), int(fields[1]), int(fields[2]))
+    return table
+
+
+def _descendants(root_pid: int, table: dict) -> list[int]:
+    """root_pid and every process below it in the parent tree."""
+    children: dict[int, list[int]] = {}
+    for pid, (_, ppid, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+    found = []
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        found.append(pid)
+        stack.extend(children.get(pid, ()))
+    return found
+
+
+def tree_rss_kb(root_pid: int) -> tuple[int, int] | None:
+    """
+    (total RSS in KB, process count) of root_pid and all its descendants.
+
+    Scans /proc once; returns None where /proc is unavailable.
+    """
+    table = _proc_table()
+    if table is None:
+        return None
+    total_kb = count = 0
+    for pid in _descendants(root_pid, table):
+        try:
+            with open(f"/proc/{pid}/statm", "rb") as f:
+                rss_kb = int(f.read().split()[1]) * _PAGE_KB
+        except (OSError, ValueError, IndexError):
+            continue
+        if rss_kb:  # zombies report 0
+            total_kb += rss_kb
+            count += 1
+    return total_kb, count
+
+
+def _alive(pid: int, table: dict | None) -> bool:
+    if table is not None:
+        entry = table.get(pid)
+        return entry is not None and entry[0] != "Z"
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _signal_all(pgid: int, pids, sig: int) -> None:
+    try:
+        os.killpg(pgid, sig)
+    except OSError:
+        pass
+    # Descendants that moved to their own group/session are not reached by killpg
+    for pid in pids:
+        try:
+            os.kill(pid, sig)
+        except OSError:
+            pass
+
+
+def kill_process_tree(proc: subprocess.Popen, grace_s: float = KILL_GRACE_S):
+    """
+    Stop proc (started as a session leader) and everything it spawned.
+
+    Sends SIGTERM to its process group and to any descendants that left the
+    group, waits up to grace_s for them to exit, then SIGKILLs the survivors.
+    Reaps proc. Returns (rusage, {"killed_processes", "force_killed"}).
+    """
+    table = _proc_table()
+    if table is None:
+        targets = {proc.pid}
+    else:
+        targets = {pid for pid, (state, _, pgid) in table.items() if pgid == proc.pid and state != "Z"}
+        targets.update(pid for pid in _descendants(proc.pid, table) if _alive(pid, table))
+    _signal_all(proc.pid, targets - {proc.pid}, signal.SIGTERM)
+
+    rusage = None
+    force_killed = 0
+    deadline = time.monotonic() + grace_s
+    while True:
+        if proc.returncode is None:
+            rusage = _reap(proc, block=False)
+        table = _proc_table()
+        alive = [pid for pid in targets if _alive(pid, table)]
+        if not alive:
+            break
+        if time.monotonic() >= deadline:
+            force_killed = len(alive)
+            _signal_all(proc.pid, alive, signal.SIGKILL)
+            break
+        time.sleep(0.05)
+    if proc.returncode is None:
+        rusage = _reap(proc, block=True)
+    return rusage, {"killed_processes": len(targets), "force_killed": force_killed}
+
+
+def resource_summary(rusage, tree_peak: tuple[int, int] | None, output_bytes: int) -> dict:
+    """
+    Resource summary of a finished run. rusage is the child's os.wait4()
+    rusage and tree_peak the largest tree_rss_kb() sample; either may be None
+    (values are then null).
+    """
+    resources = {
+        "cpu_user_s": None,
+        "cpu_sys_s": None,
+        "max_rss_kb": None,
+        "tree_peak_rss_kb": tree_peak[0] if tree_peak else None,
+        "tree_peak_processes": tree_peak[1] if tree_peak else None,
+        "ctx_switches_voluntary": None,
+        "ctx_switches_involuntary": None,
+        "output_bytes": output_bytes,
+    }
+    if rusage is not None:
+        resources.update({
+            "cpu_user_s": round(rusage.ru_utime, 3),
+            "cpu_sys_s": round(rusage.ru_stime, 3),
+            # ru_maxrss is KB on Linux, bytes on macOS
+            "max_rss_kb": rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss,
+            "ctx_switches_voluntary": rusage.ru_nvcsw,
+            "ctx_switches_involuntary": rusage.ru_nivcsw,
+        })
+    return resources
+
+
+def exit_on_sigterm() -> None:
+    """
+    Turn SIGTERM into SystemExit in the calling (main) thread.
+
+    Children run in their own session, so a wrapper killed with SIGTERM would
+    orphan them; raising instead lets run_captured() stop the tree on the way out.
+    """
+    def handler(signum, frame):
+        raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, handler)
+
+
+def run_captured(
+    cmd: list[str],
+    timeout_s: float,
+    cwd: str | None = None,
+    limit_bytes: int = MAX_OUTPUT_BYTES,
+    on_stdout_line=None,
+    cancel_event: threading.Event | None = None,
+    stdout_filter: LineFilter | None = None,
+    stderr_filter: LineFilter | None = None,
+    idle_timeout_s: float | None = None,
+    on_stdout_chunk=None,
+) -> dict:
+    """
+    Run cmd, streaming stdout/stderr into bounded buffers.
+
+    stdout_filter/stderr_filter (output_filter.LineFilter) rewrite each stream
+    before it reaches its buffer, so the size cap applies to filtered output.
+
+    on_stdout_line(line) is called from the reader thread for every stdout line
+    as it arrives; returning a truthy value stops the process early. If it
+    raises, it is not called again but the output is still captured.
+    on_stdout_chunk(data) likewise gets every raw stdout read (bytes) as soon
+    as it arrives, for callers that forward partial lines.
+
+    cancel_event lets another thread stop the run once it is set.
+
+    idle_timeout_s stops the run ("stalled") when neither stream has produced
+    any bytes for that long, for CLIs that report progress as they work.
+
+    The command runs in its own session. On timeout, abort or cancel the whole
+    tree is stopped with kill_process_tree() (agent CLIs spawn language
+    servers and shells that would otherwise keep running) and whatever output
+    was captured so far is returned.
+
+    Returns {"returncode", "stdout", "stderr", "stdout_bytes", "stderr_bytes",
+    "truncated", "timed_out", "aborted", "cancelled", "stalled", "duration_ms",
+    "resources", "killed_processes", "force_killed", "filtered"}; the byte
+    counts are of the raw streams and "filtered" holds the combined filter
+    stats (None without filters). Raises OSError if the command cannot be started.
+    """
+    out_buf = BoundedBuffer(limit_bytes)
+    err_buf = BoundedBuffer(limit_bytes)
+    stop_event = threading.Event()
+    splitter = LineSplitter(on_stdout_line) if on_stdout_line else None
+    start_time = time.monotonic()
+    proc = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    readers = [
+        threading.Thread(target=_pump, args=(proc.stdout, out_buf, splitter, stop_event, stdout_filter,
+                                             on_stdout_chunk), daemon=True),
+        threading.Thread(target=_pump, args=(proc.stderr, err_buf, None, None, stderr_filter), daemon=True),
+    ]
+    for t in readers:
+        t.start()
+
+    timed_out = False
+    aborted = False
+    cancelled = False
+    stalled = False
+    kill_info = {"killed_processes": 0, "force_killed": 0}
+    rusage = None
+    tree_peak = None
+    next_sample = start_time
+    sleep_s = 0.005
+    deadline = start_time + timeout_s
+    try:
+        while True:
+            # Poll with wait4() instead of proc.wait() to get the child's rusage
+            rusage = _reap(proc, block=False)
+            if proc.returncode is not None:
+                break
+            now = time.monotonic()
+            if now >= next_sample:
+                sample = tree_rss_kb(proc.pid)
+                if sample and sample[0] > (tree_peak[0] if tree_peak else 0):
+                    tree_peak = sample
+                next_sample = now + RSS_SAMPLE_INTERVAL_S
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+            elif stop_event.is_set():
+                aborted = True
+            elif now >= deadline:
+                timed_out = True
+            elif idle_timeout_s and now - max(out_buf.last_read, err_buf.last_read) >= idle_timeout_s:
+                stalled = True
+            else:
+                # Short sleeps first so quick commands are not held up by the poll interval
+                time.sleep(sleep_s)
+                sleep_s = min(sleep_s * 2, POLL_INTERVAL_S)
+                continue
+            rusage, kill_info = kill_process_tree(proc)
+            break
+    except BaseException:
+        # Ctrl-C / SIGTERM (see exit_on_sigterm) in the wrapper: the child is in
+        # another session and would not see the signal, so stop it before propagating.
+        if proc.returncode is None:
+            kill_process_tree(proc)
+        raise
+    duration_ms = int((time.monotonic() - start_time) * 1000)
+
+    # Grandchildren may still hold the pipes open; don't wait on them forever.
+    join_deadline = time.monotonic() + READER_JOIN_TIMEOUT_S
+    for t in readers:
+        t.join(max(0.0, join_deadline - time.monotonic()))
+
+    stdout_bytes = stdout_filter.bytes_in if stdout_filter else out_buf.total_bytes
+    stderr_bytes = stderr_filter.bytes_in if stderr_filter else err_buf.total_bytes
+    return {
+        "returncode": proc.returncode,
+        "stdout": out_buf.getvalue(),
+        "stderr": err_buf.getvalue(),
+        "stdout_bytes": stdout_bytes,
+        "stderr_bytes": stderr_bytes,
+        "truncated": out_buf.truncated or err_buf.truncated,
+        "timed_out": timed_out,
+        "aborted": aborted,
+        "cancelled": cancelled,
+        "stalled": stalled,
+        "duration_ms": duration_ms,
+        "resources": resource_summary(rusage, tree_peak, stdout_bytes + stderr_bytes),
+        **kill_info,
+        "filtered": merge_stats(stdout_filter, stderr_filter),
+    }
@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+Local job queue for the Cursor/Codex agent wrappers (file-lock based, no daemon).
+
+Every agent run takes a slot before starting:
+  - a global concurrency limit (CLAW_AGENT_MAX_CONCURRENT, default 2) enforced
+    by N slot lock files held with flock(),
+  - per-workspace mutual exclusion: agent/plan runs hold the workspace lock
+    exclusively, ask runs (read-only) share it,
+  - FIFO fairness: waiters write a ticket to the spool queue and only the
+    oldest ticket that could run right now may take a slot.
+
+Other callers can use a separate pool of slots (job_slot(pool="picoclaw")):
+each pool has its own tickets and slot locks, so PicoClaw chats are capped
+independently of agent runs. max_waiting bounds a pool's wait queue: when it
+is full, job_slot() fails immediately instead of queueing.
+
+Locks are released by the kernel when a process dies, and tickets of dead
+processes are pruned, so a crashed wrapper never wedges the queue.
+
+Detached jobs (`--detach` on the wrappers) are recorded in the spool directory
+(CLAW_AGENT_SPOOL, default ~/.openclaw/agent-jobs) and run by a background
+`agent_queue.py run-job` process; results are written to jobs/<job_id>.json.
+
+Usage:
+  agent_queue.py list [--limit N] [--pool picoclaw]
+  agent_queue.py status --job-id ID
+  agent_queue.py wait --job-id ID [--timeout SECONDS]
+  agent_queue.py cancel --job-id ID
+"""
+from __future__ import annotations
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from agent_process import exit_on_sigterm
+
+SPOOL_DIR = Path(os.environ.get("CLAW_AGENT_SPOOL", Path.home() / ".openclaw" / "agent-jobs"))
+DEFAULT_MAX_CONCURRENT = 2
+POLL_INTERVAL_S = 0.25
+DEFAULT_POOL = "agent"
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TERMINAL_STATES = ("done", "failed", "cancelled", "lost")
+
+
+def max_concurrent() -> int:
+    """Host-wide agent run limit (CLAW_AGENT_MAX_CONCURRENT); a bad value falls back to DEFAULT_MAX_CONCURRENT."""
+    try:
+        return int(os.environ.get("CLAW_AGENT_MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT))
+    except ValueError:
+        return DEFAULT_MAX_CONCURRENT
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _write_json_atomic(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> dict | None:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def workspace_key(workspace: str | None) -> str | None:
+    if workspace is None:
+        return None
+    return hashlib.sha1(os.path.realpath(workspace).encode()).hexdigest()[:16]
+
+
+# ---------------------------------------------------------------------------
+# Slots (global limit + per-workspace lock + FIFO tickets)
+# ---------------------------------------------------------------------------
+
+def _queue_dir(pool: str = DEFAULT_POOL) -> Path:
+    return SPOOL_DIR / ("queue" if pool == DEFAULT_POOL else f"queue-{pool}")
+
+
+def _locks_dir() -> Path:
+    return SPOOL_DIR / "locks"
+
+
+def _slot_lock(pool: str, n: int) -> Path:
+    return _locks_dir() / (f"slot-{n}.lock" if pool == DEFAULT_POOL else f"{pool}-slot-{n}.lock")
+
+
+def _live_tickets(pool: str = DEFAULT_POOL) -> list[dict]:
+    """All tickets of a pool in FIFO order; tickets whose process died are removed."""
+    tickets = []
+    qdir = _queue_dir(pool)
+    if not qdir.exists():
+        return tickets
+    for path in sorted(qdir.glob("*.json")):
+        ticket = _read_json(path)
+        if not ticket:
+            continue
+        if not _pid_alive(ticket.get("pid", 0)):
+            path.unlink(missing_ok=True)
+            continue
+        tickets.append(ticket)
+    return tickets
+
+
+def queue_depth(pool: str = DEFAULT_POOL) -> dict:
+    """{"waiting": n, "running": n} for a pool."""
+    tickets = _live_tickets(pool)
+    running = sum(1 for t in tickets if t.get("state") == "running")
+    return {"waiting": len(tickets) - running, "running": running}
+
+
+def _conflicts(a: dict, b: dict) -> bool:
+    if a["workspace_key"] is None or b["workspace_key"] is None:
+        return False
+    return a["workspace_key"] == b["workspace_key"] and (a["exclusive"] or b["exclusive"])
+
+
+def _try_lock(path: Path, mode: int) -> int | None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, mode | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _release(fd: int | None) -> None:
+    if fd is None:
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def _locked(path: Path):
+    """Hold an exclusive flock on path (blocking) for the body of the with-block."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    except OSError:
+        os.close(fd)
+        raise
+    try:
+        yield
+    finally:
+        _release(fd)
+
+
+@contextmanager
+def job_slot(
+    workspace: str | None,
+    exclusive: bool = True,
+    limit: int | None = None,
+    wait_timeout: float | None = None,
+    job_id: str | None = None,
+    should_cancel=None,
+    pool: str = DEFAULT_POOL,
+    max_waiting: int | None = None,
+):
+    """
+    Block until this process may run an agent on workspace, then hold the slot.
+
+    workspace=None takes no workspace lock (only the pool's concurrency limit).
+    Yields {"queue_wait_ms": int, "slot": int}. Raises TimeoutError if
+    wait_timeout elapses or max_waiting callers are already queued behind the
+    pool's free slots, or InterruptedError if should_cancel() returns True
+    while waiting.
+    """
+    limit = max(1, limit or max_concurrent())
+    ticket_id = f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    ticket = {
+        "ticket": ticket_id,
+        "pid": os.getpid(),
+        "job_id": job_id,
+        "workspace": os.path.realpath(workspace) if workspace is not None else None,
+        "workspace_key": workspace_key(workspace),
+        "exclusive": exclusive,
+        "state": "waiting",
+        "created_at": now_iso(),
+    }
+    ticket_path = _queue_dir(pool) / f"{ticket_id}.json"
+    # Check the bound and write the ticket as one step, or a burst of callers
+    # all pass the check before any of their tickets exists
+    with _locked(_locks_dir() / f"{pool}-queue.lock"):
+        if max_waiting is not None:
+            depth = queue_depth(pool)
+            # Tickets that a free slot will take right away (just arrived, not yet running) don't queue
+            if depth["waiting"] - max(0, limit - depth["running"]) >= max_waiting:
+                raise TimeoutError(f"{pool} queue full ({depth['waiting']} waiting, {depth['running']} running, "
+                                   f"limit {limit})")
+        _write_json_atomic(ticket_path, ticket)
+
+    ws_fd = slot_fd = None
+    slot = -1
+    start = time.monotonic()
+    try:
+        while True:
+            tickets = _live_tickets(pool)
+            running = [t for t in tickets if t.get("state") == "running"]
+            # Oldest waiting ticket that is not blocked by a running job goes first
+            first_ready = next(
+                (t for t in tickets
+                 if t.get("state") == "waiting" and not any(_conflicts(t, r) for r in running)),
+                None,
+            )
+            if first_ready and first_ready["ticket"] == ticket_id and len(running) < limit:
+                ws_locked = True
+                if ticket["workspace_key"] is not None:
+                    ws_mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+                    ws_fd = _try_lock(_locks_dir() / f"ws-{ticket['workspace_key']}.lock", ws_mode)
+                    ws_locked = ws_fd is not None
+                if ws_locked:
+                    for n in range(limit):
+                        slot_fd = _try_lock(_slot_lock(pool, n), fcntl.LOCK_EX)
+                        if slot_fd is not None:
+                            slot = n
+                            break
+                    if slot_fd is not None:
+                        break
+                    _release(ws_fd)
+                    ws_fd = None
+            if should_cancel and should_cancel():
+                raise InterruptedError("job cancelled while queued")
+            if wait_timeout is not None and time.monotonic() - start >= wait_timeout:
+                depth = sum(1 for t in tickets if t.get("state") == "waiting")
+                raise TimeoutError(f"no {pool} slot after {wait_timeout:g}s ({depth} waiting, limit {limit})")
+            time.sleep(POLL_INTERVAL_S)
+
+        ticket["state"] = "running"
+        ticket["started_at"] = now_iso()
+        _write_json_atomic(ticket_path, ticket)
+        yield {"queue_wait_ms": int((time.monotonic() - start) * 1000), "slot": slot}
+    finally:
+        _release(slot_fd)
+        _release(ws_fd)
+        ticket_path.unlink(missing_ok=True)
+
+
+def run_queued(run, params: dict, limit: int | None = None, wait_timeout: float | None = None) -> dict:
+    """Call run(**params) inside a job slot for params["workspace"]; adds queue_wait_ms."""
+    workspace = params.get("workspace") or os.getcwd()
+    try:
+        with job_slot(workspace, exclusive=params.get("mode") != "ask",
+                      limit=limit, wait_timeout=wait_timeout) as slot:
+            result = run(**params)
+    except TimeoutError as exc:
+        return {
+            "ok": False,
+            "error": str(exc),
+            "busy": True,
+            "output": "",
+            "exit_code": -1,
+            "duration_ms": 0,
+            "files_created": [],
+            "truncated": False,
+        }
+    result["queue_wait_ms"] = slot["queue_wait_ms"]
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Detached jobs
+# ---------------------------------------------------------------------------
+
+def _jobs_dir() -> Path:
+    return SPOOL_DIR / "jobs"
+
+
+def job_path(job_id: str) -> Path:
+    return _jobs_dir() / f"{job_id}.json"
+
+
+def _job_lock(job_id: str) -> Path:
+    return _jobs_dir() / f"{job_id}.lock"
+
+
+def load_job(job_id: str) -> dict | None:
+    job = _read_json(job_path(job_id))
+    if job and job.get("status") in ("queued", "running"):
+        pid = job.get("runner_pid")
+        if pid and not _pid_alive(pid):
+            # Runner vanished without writing a result (killed, host reboot, ...)
+            job["status"] = "lost"
+    return job
+
+
+def update_job(job_id: str, **fields) -> dict:
+    """
+    Merge fields into the job record. A cancelled job stays cancelled.
+
+    The read-modify-write holds the job's lock file, so the runner and
+    cancel_job() never overwrite each other's status.
+    """
+    with _locked(_job_lock(job_id)):
+        job = _read_json(job_path(job_id)) or {"job_id": job_id}
+        if job.get("status") == "cancelled" and fields.get("status") not in (None, "cancelled"):
+            return job
+        job.update(fields)
+        _write_json_atomic(job_path(job_id), job)
+        return job
+
+
+def submit_job(backend: str, params: dict, limit: int | None = None) -> dict:
+    """Record a job and start a detached runner for it. Returns the job record."""
+    job_id = f"job-{uuid.uuid4().hex[:12]}"
+    params = dict(params)
+    params["workspace"] = os.path.abspath(params.get("workspace") or os.getcwd())
+    job = {
+        "job_id": job_id,
+        "backend": backend,
+        "params": params,
+        "limit": limit,
+        "status": "queued",
+        "created_at": now_iso(),
+    }
+    _write_json_atomic(job_path(job_id), job)
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(SCRIPT_DIR, "agent_queue.py"), "run-job", "--job-id", job_id],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True,
+    )
+    return update_job(job_id, runner_pid=proc.pid)
+
+
+def _backend_runner(backend: str):
+    if backend == "cursor":
+        from cursor_agent_direct import run_cursor_agent
+        return run_cursor_agent
+    if backend == "codex":
+        from codex_agent_direct import run_codex_agent
+        return run_codex_agent
+    raise ValueError(f"unknown backend: {backend}")
+
+
+def run_job(job_id: str) -> int:
+    """Body of the detached runner process."""
+    job = _read_json(job_path(job_id))
+    if not job or job.get("status") != "queued":
+        return 1
+    params = job["params"]
+
+    def cancelled() -> bool:
+        current = _read_json(job_path(job_id)) or {}
+        return current.get("status") == "cancelled"
+
+    try:
+        run = _backend_runner(job["backend"])
+        with job_slot(
+            params["workspace"],
+            exclusive=params.get("mode") != "ask",
+            limit=job.get("limit"),
+            job_id=job_id,
+            should_cancel=cancelled,
+        ) as slot:
+            # update_job() re-reads the status under the job lock: a job cancelled
+            # while it took the slot stays "cancelled" and must not run
+            job = update_job(job_id, status="running", started_at=now_iso(), queue_wait_ms=slot["queue_wait_ms"])
+            if job.get("status") == "cancelled":
+                return 1
+            result = run(**params)
+    except InterruptedError:
+        return 1
+    except Exception as exc:
+        update_job(job_id, status="failed", finished_at=now_iso(),
+                   result={"ok": False, "error": str(exc)})
+        return 1
+    update_job(job_id, status="done" if result.get("ok") else "failed",
+               finished_at=now_iso(), result=result)
+    return 0 if result.get("ok") else 1
+
+
+def cancel_job(job_id: str) -> dict:
+    if not job_path(job_id).exists():
+        return {"ok": False, "error": f"job not found: {job_id}"}
+    # Decide and write under the job lock: the runner either marked the job
+    # running before this (so it gets signalled) or will see "cancelled"
+    with _locked(_job_lock(job_id)):
+        job = load_job(job_id)
+        if not job:
+            return {"ok": False, "error": f"job not found: {job_id}"}
+        if job.get("status") in TERMINAL_STATES:
+            return {"ok": False, "error": f"job already {job['status']}", "job": job}
+        was_running = job.get("status") == "running"
+        job.update(status="cancelled", finished_at=now_iso())
+        _write_json_atomic(job_path(job_id), job)
+    pid = job.get("runner_pid")
+    if was_running and pid:
+        # The runner turns SIGTERM into SystemExit and stops the agent's process
+        # tree (SIGTERM, then SIGKILL after a grace period) on the way out.
+        try:
+            os.killpg(pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+    return {"ok": True, "job": job}
+
+
+def wait_job(job_id: str, timeout_s: float | None = None) -> dict | None:
+    deadline = None if timeout_s is None else time.monotonic() + timeout_s
+    while True:
+        job = load_job(job_id)
+        if not job or job.get("status") in TERMINAL_STATES:
+            return job
+        if deadline is not None and time.monotonic() >= deadline:
+            return job
+        time.sleep(POLL_INTERVAL_S)
+
+
+def list_jobs(limit: int = 20) -> list[dict]:
+    jdir = _jobs_dir()
+    if not jdir.exists():
+        return []
+    paths = sorted(jdir.glob("job-*.json"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
+    jobs = []
+    for p in paths:
+        job = load_job(p.stem)
+        if job:
+            job.pop("result", None)
+            jobs.append(job)
+    return jobs
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Agent job queue: status, wait and cancel detached agent runs.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_list = sub.add_parser("list", help="List recent jobs and the current queue")
+    p_list.add_argument("--limit", type=int, default=20, help="Max jobs to show (default 20)")
+    p_list.add_argument("--pool", default=DEFAULT_POOL,
+                        help=f"Slot pool whose queue to show, e.g. picoclaw (default: {DEFAULT_POOL})")
+
+    p_status = sub.add_parser("status", help="Show a job record (including result when finished)")
+    p_status.add_argument("--job-id", required=True)
+
+    p_wait = sub.add_parser("wait", help="Wait for a job to finish and print its record")
+    p_wait.add_argument("--job-id", required=True)
+    p_wait.add_argument("--timeout", type=float, default=None, help="Give up after N seconds")
+
+    p_cancel = sub.add_parser("cancel", help="Cancel a queued or running job")
+    p_cancel.add_argument("--job-id", required=True)
+
+    p_run = sub.add_parser("run-job", help="(internal) execute a detached job")
+    p_run.add_argument("--job-id", required=True)
+
+    args = ap.parse_args()
+
+    if args.cmd == "run-job":
+        exit_on_sigterm()
+        return run_job(args.job_id)
+
+    if args.cmd == "list":
+        out = {
+            "jobs": list_jobs(args.limit),
+            "queue": _live_tickets(args.pool),
+            "max_concurrent": max_concurrent(),
+        }
+        print(json.dumps(out, indent=2))
+        return 0
+
+    if args.cmd == "status":
+        job = load_job(args.job_id)
+        if not job:
+            print(json.dumps({"ok": False, "error": f"job not found: {args.job_id}"}, indent=2))
+            return 1
+        print(json.dumps(job, indent=2))
+        return 0
+
+    if args.cmd == "wait":
+        job = wait_job(args.job_id, args.timeout)
+        if not job:
+            print(json.dumps({"ok": False, "error": f"job not found: {args.job_id}"}, indent=2))
+            return 1
+        print(json.dumps(job, indent=2))
+        return 0 if job.get("status") == "done" else 1
+
+    if args.cmd == "cancel":
+        result = cancel_job(args.job_id)
+        print(json.dumps(result, indent=2))
+        return 0 if result.get("ok") else 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
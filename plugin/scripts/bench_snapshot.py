@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the workspace snapshot / change detection used by the agent wrappers.
+
+suite    Generate synthetic workspaces of several shapes and sizes and time a
+         full change-detection cycle (snapshot before + diff after) for each
+         implementation, reporting wall time, syscalls and peak memory. Results
+         can be saved as JSON and compared against an earlier run.
+workers  Time agent_workspace.snapshot_files() serially and with thread pools
+         of several sizes on one tree; --delay-ms simulates a slow or network
+         filesystem by sleeping in every scandir() and stat() call.
+
+Shapes:  flat (one directory), deep (narrow 30-level chains), node_modules
+         (10% sources, 90% vendored packages, git-ignored), many_small
+         (balanced tree of tiny files).
+Impls:   legacy_glob (the pre-git 12-extension glob scan), walk (serial
+         scandir), parallel (thread-pool scandir), git (git status).
+
+Each measurement runs in a child process, so peak RSS is that child's
+ru_maxrss (plus the Python heap peak from tracemalloc). Syscalls are counted
+with `strace -f -c` in a separate run when strace is installed, else null.
+
+Usage:
+  bench_snapshot.py suite [--shapes flat,deep,node_modules,many_small] [--sizes 1000,10000,100000]
+                          [--impls legacy_glob,walk,parallel,git] [--output results.json]
+                          [--compare baseline.json --threshold 1.2]
+  bench_snapshot.py workers [--files 500000] [--workers 1,4,8,16] [--delay-ms 0] [--repeat 3]
+
+Generated trees are cached under $TMPDIR/claw-bench (or --tree-dir) and reused.
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import agent_workspace
+from agent_process import run_captured
+
+FILES_PER_DIR = 100
+DIR_FANOUT = 10
+DEEP_LEVELS = 30
+SHAPES = ("flat", "deep", "node_modules", "many_small")
+IMPLS = ("legacy_glob", "walk", "parallel", "git")
+PARALLEL_WORKERS = 8
+MEASURE_TIMEOUT_S = 1800
+SCRIPT = os.path.abspath(__file__)
+
+
+# ---------------------------------------------------------------------------
+# Synthetic workspaces
+# ---------------------------------------------------------------------------
+
+def _write(path: str, data: str = "x") -> None:
+    with open(path, "w") as f:
+        f.write(data)
+
+
+def generate_tree(root: str, files: int, files_per_dir: int = FILES_PER_DIR, fanout: int = DIR_FANOUT) -> int:
+    """Create `files` small files under root in a balanced tree; returns the number of directories."""
+    dirs = 0
+    created = 0
+    pending = deque([root])
+    while created < files:
+        current = pending.popleft()
+        os.makedirs(current, exist_ok=True)
+        dirs += 1
+        for i in range(min(files_per_dir, files - created)):
+            _write(os.path.join(current, f"f{i:04d}.txt"))
+            created += 1
+        pending.extend(os.path.join(current, f"d{j:02d}") for j in range(fanout))
+    return dirs
+
+
+def _gen_flat(root: str, files: int) -> None:
+    os.makedirs(root, exist_ok=True)
+    exts = ("py", "ts", "md", "json", "bin")
+    for i in range(files):
+        _write(os.path.join(root, f"file{i:07d}.{exts[i % len(exts)]}"))
+
+
+def _gen_deep(root: str, files: int) -> None:
+    per_level = 3
+    chains = max(1, files // (DEEP_LEVELS * per_level))
+    created = 0
+    for c in range(chains):
+        current = os.path.join(root, f"chain{c:05d}")
+        for level in range(DEEP_LEVELS):
+            current = os.path.join(current, f"l{level:02d}")
+            os.makedirs(current, exist_ok=True)
+            for i in range(per_level):
+                if created >= files:
+                    return
+                _write(os.path.join(current, f"m{i}.py"))
+                created += 1
+
+
+def _gen_node_modules(root: str, files: int) -> None:
+    sources = max(1, files // 10)
+    generate_tree(os.path.join(root, "src"), sources, files_per_dir=20)
+    _write(os.path.join(root, ".gitignore"), "node_modules/\n")
+    created = sources
+    pkg = 0
+    while created < files:
+        base = os.path.join(root, "node_modules", f"pkg{pkg:05d}")
+        os.makedirs(os.path.join(base, "lib"), exist_ok=True)
+        _write(os.path.join(base, "package.json"), "{}")
+        created += 1
+        for i in range(min(40, files - created)):
+            _write(os.path.join(base, "lib", f"m{i:02d}.js"))
+            created += 1
+        pkg += 1
+
+
+def _gen_many_small(root: str, files: int) -> None:
+    generate_tree(root, files, files_per_dir=20, fanout=10)
+
+
+GENERATORS = {
+    "flat": _gen_flat,
+    "deep": _gen_deep,
+    "node_modules": _gen_node_modules,
+    "many_small": _gen_many_small,
+}
+
+
+def _git_commit_all(root: str) -> None:
+    env = dict(os.environ, GIT_AUTHOR_NAME="bench", GIT_AUTHOR_EMAIL="bench@localhost",
+               GIT_COMMITTER_NAME="bench", GIT_COMMITTER_EMAIL="bench@localhost")
+    for args in (["init", "-q"], ["add", "-A"], ["commit", "-q", "-m", "bench tree"]):
+        subprocess.run(["git", *args], cwd=root, env=env, check=True, capture_output=True)
+
+
+def ensure_workspace(tree_dir: str, shape: str, files: int, with_git: bool) -> str:
+    """Generated workspace for (shape, files), reused if already built; committed to git if asked."""
+    root = os.path.join(tree_dir, f"{shape}-{files}")
+    marker = root + ".bench"  # outside the tree so it is not counted
+    if not os.path.exists(marker):
+        shutil.rmtree(root, ignore_errors=True)
+        print(f"generating {shape} workspace with {files} files ...", file=sys.stderr)
+        GENERATORS[shape](root, files)
+        _write(marker, str(files))
+    if with_git and not os.path.isdir(os.path.join(root, ".git")):
+        print(f"committing {shape}-{files} to git ...", file=sys.stderr)
+        _git_commit_all(root)
+    return root
+
+
+def ensure_tree(root: str | None, files: int) -> str:
+    """
+    Reuse a previously generated balanced tree with the same file count, or build one.
+
+    An explicit root without a marker is an existing tree (e.g. a real
+    monorepo) and is benchmarked as-is. Anything else that is not a complete
+    generation with this file count (stale count, interrupted run, leftover
+    temp tree) is removed and generated again; the marker is written empty
+    before generating and gets the count last, so a partial tree never passes.
+    """
+    explicit = root is not None
+    root = root or os.path.join(tempfile.gettempdir(), f"claw-bench-tree-{files}")
+    marker = root.rstrip(os.sep) + ".bench"
+    if explicit and not os.path.exists(marker) and os.path.isdir(root) and os.listdir(root):
+        return root
+    try:
+        with open(marker) as f:
+            if int(f.read()) == files:
+                return root
+    except (OSError, ValueError):
+        pass
+    shutil.rmtree(root, ignore_errors=True)
+    _write(marker, "")
+    print(f"generating {files} files under {root} ...", file=sys.stderr)
+    generate_tree(root, files)
+    _write(marker, str(files))
+    return root
+
+
+# ---------------------------------------------------------------------------
+# Implementations (one full cycle: snapshot before the run, diff after it)
+# ---------------------------------------------------------------------------
+
+# Exactly the Codex wrapper's original set (the Cursor wrapper's lacked *.toml)
+LEGACY_EXTS = ("*.py", "*.rs", "*.ts", "*.tsx", "*.js", "*.jsx", "*.md", "*.txt", "*.json", "*.html", "*.css",
+               "*.toml")
+
+
+def legacy_snapshot_files(workspace: str) -> set[str]:
+    """The wrappers' original glob-per-extension snapshot (before git change detection)."""
+    files: set[str] = set()
+    for ext in LEGACY_EXTS:
+        for path in glob.glob(os.path.join(workspace, "**", ext), recursive=True):
+            if os.path.isfile(path):
+                files.add(path)
+    return files
+
+
+def legacy_detect_new_files(workspace: str, before_files: set[str]) -> list[str]:
+    new_files: list[str] = []
+    for ext in LEGACY_EXTS:
+        for path in glob.glob(os.path.join(workspace, "**", ext), recursive=True):
+            if path not in before_files and os.path.isfile(path):
+                new_files.append(path)
+    return sorted(set(new_files))
+
+
+def _cycle_legacy(root: str) -> int:
+    before = legacy_snapshot_files(root)
+    legacy_detect_new_files(root, before)
+    return len(before)
+
+
+def _cycle_walk(root: str, workers: int) -> int:
+    before = agent_workspace.snapshot_files(root, workers=workers)
+    agent_workspace.diff_file_maps(before, agent_workspace.snapshot_files(root, workers=workers))
+    return len(before)
+
+
+def _cycle_git(root: str) -> int:
+    snapshot = agent_workspace.take_snapshot(root)
+    if not snapshot or snapshot["method"] != "git":
+        raise RuntimeError(f"{root} is not a git work tree")
+    agent_workspace.diff_snapshot(snapshot)
+    return len(snapshot["entries"])
+
+
+def run_cycle(impl: str, root: str, workers: int = PARALLEL_WORKERS) -> int:
+    """Run one change-detection cycle; returns the paths in the "before" snapshot (dirty ones for git)."""
+    if impl == "legacy_glob":
+        return _cycle_legacy(root)
+    if impl == "walk":
+        return _cycle_walk(root, 1)
+    if impl == "parallel":
+        return _cycle_walk(root, workers)
+    if impl == "git":
+        return _cycle_git(root)
+    raise ValueError(f"unknown implementation: {impl}")
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def _measure_in_process(impl: str, root: str, repeat: int, workers: int) -> dict:
+    """Body of the `_measure` child: time `repeat` cycles, then one traced cycle for the heap peak."""
+    times = []
+    seen = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        seen = run_cycle(impl, root, workers)
+        times.append(time.perf_counter() - start)
+    # tracemalloc slows allocation-heavy code a lot, so keep it out of the timed runs
+    tracemalloc.start()
+    run_cycle(impl, root, workers)
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"times": times, "paths_seen": seen, "py_peak_kb": py_peak // 1024}
+
+
+def _child_cmd(impl: str, root: str, repeat: int, workers: int) -> list[str]:
+    return [sys.executable, SCRIPT, "_measure", "--impl", impl, "--root", root,
+            "--repeat", str(repeat), "--workers", str(workers)]
+
+
+def _strace_calls(cmd: list[str]) -> int | None:
+    """Total syscalls of cmd (and its children) from `strace -f -c`, or None without strace."""
+    if not shutil.which("strace"):
+        return None
+    with tempfile.NamedTemporaryFile(prefix="claw-bench-strace-", delete=False) as tmp:
+        out_path = tmp.name
+    try:
+        result = run_captured(["strace", "-f", "-c", "-o", out_path, *cmd], timeout_s=MEASURE_TIMEOUT_S)
+        if result["returncode"] != 0:
+            return None
+        with open(out_path) as f:
+            for line in f:
+                tokens = line.split()
+                if tokens and tokens[-1] == "total" and len(tokens) >= 5:
+                    return int(tokens[3])
+    except (OSError, ValueError):
+        return None
+    finally:
+        os.unlink(out_path)
+    return None
+
+
+def measure(impl: str, root: str, repeat: int, workers: int, count_syscalls: bool) -> dict:
+    """Time impl on root in a child process; adds peak RSS and (optionally) a syscall count."""
+    cmd = _child_cmd(impl, root, repeat, workers)
+    result = run_captured(cmd, timeout_s=MEASURE_TIMEOUT_S)
+    if result["returncode"] != 0:
+        return {"error": (result["stderr"] or result["stdout"]).strip()[-500:] or "measurement failed"}
+    data = json.loads(result["stdout"])
+    times = data["times"]
+    out = {
+        "best_s": round(min(times), 4),
+        "median_s": round(statistics.median(times), 4),
+        "paths_seen": data["paths_seen"],
+        "peak_rss_kb": result["resources"]["max_rss_kb"],
+        "py_peak_kb": data["py_peak_kb"],
+        "syscalls": None,
+    }
+    if count_syscalls:
+        # Separate single-cycle run: strace slows everything down, so it is not timed
+        out["syscalls"] = _strace_calls(_child_cmd(impl, root, 1, workers))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------------
+
+def _git_rev() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(SCRIPT),
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def _meta() -> dict:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_rev": _git_rev(),
+        "strace": bool(shutil.which("strace")),
+    }
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[dict]:
+    """Entries whose best_s grew by more than threshold x relative to the matching baseline entry."""
+    base = {(r["shape"], r["size"], r["impl"]): r for r in baseline if "best_s" in r}
+    regressions = []
+    for r in results:
+        old = base.get((r["shape"], r["size"], r["impl"]))
+        if not old or "best_s" not in r or not old["best_s"]:
+            continue
+        ratio = r["best_s"] / old["best_s"]
+        if ratio > threshold:
+            regressions.append({"shape": r["shape"], "size": r["size"], "impl": r["impl"],
+                                "baseline_s": old["best_s"], "current_s": r["best_s"],
+                                "ratio": round(ratio, 2)})
+    return regressions
+
+
+def cmd_suite(args) -> int:
+    shapes = [s for s in args.shapes.split(",") if s]
+    impls = [i for i in args.impls.split(",") if i]
+    sizes = [int(n) for n in args.sizes.split(",") if n]
+    for name in shapes:
+        if name not in GENERATORS:
+            print(f"unknown shape: {name}", file=sys.stderr)
+            return 2
+    for name in impls:
+        if name not in IMPLS:
+            print(f"unknown implementation: {name}", file=sys.stderr)
+            return 2
+    if "git" in impls and not shutil.which("git"):
+        print("git not found; skipping the git implementation", file=sys.stderr)
+        impls.remove("git")
+
+    tree_dir = args.tree_dir or os.path.join(tempfile.gettempdir(), "claw-bench")
+    results = []
+    for shape in shapes:
+        for size in sizes:
+            root = ensure_workspace(tree_dir, shape, size, with_git="git" in impls)
+            for impl in impls:
+                print(f"{shape:>12} {size:>8} {impl:<12}", file=sys.stderr, end=" ", flush=True)
+                entry = {"shape": shape, "size": size, "impl": impl}
+                entry.update(measure(impl, root, args.repeat, args.workers, not args.no_syscalls))
+                print(entry.get("best_s", entry.get("error")), file=sys.stderr)
+                results.append(entry)
+
+    report = {"meta": _meta(), "config": {"repeat": args.repeat, "workers": args.workers}, "results": results}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report["regressions"] = compare(results, baseline.get("results", []), args.threshold)
+        report["baseline"] = {"path": args.compare, "meta": baseline.get("meta")}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    return 1 if report.get("regressions") else 0
+
+
+# ---------------------------------------------------------------------------
+# Thread-pool walk on a slow filesystem
+# ---------------------------------------------------------------------------
+
+class _SlowEntry:
+    """DirEntry proxy whose stat() pays the simulated latency."""
+
+    def __init__(self, entry, delay_s: float):
+        self._entry = entry
+        self._delay_s = delay_s
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self._entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return self._entry.is_file(follow_symlinks=follow_symlinks)
+
+    def stat(self, follow_symlinks: bool = True):
+        time.sleep(self._delay_s)
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+
+class _SlowScandir:
+    def __init__(self, it, delay_s: float):
+        self._it = it
+        self._delay_s = delay_s
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._it.close()
+
+    def __iter__(self):
+        for entry in self._it:
+            yield _SlowEntry(entry, self._delay_s)
+
+
+@contextmanager
+def slow_filesystem(delay_ms: float):
+    """Patch os.scandir so each directory listing and file stat sleeps delay_ms."""
+    if delay_ms <= 0:
+        yield
+        return
+    delay_s = delay_ms / 1000
+    real_scandir = os.scandir
+
+    def scandir(path):
+        time.sleep(delay_s)
+        return _SlowScandir(real_scandir(path), delay_s)
+
+    os.scandir = scandir
+    try:
+        yield
+    finally:
+        os.scandir = real_scandir
+
+
+def time_walk(root: str, workers: int, repeat: int) -> tuple[list[float], dict]:
+    times = []
+    result = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = agent_workspace.snapshot_files(root, workers=workers)
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def cmd_workers(args) -> int:
+    root = ensure_tree(args.root, args.files)
+    workers_list = [int(w) for w in args.workers.split(",") if w.strip()]
+
+    runs = []
+    reference = None
+    with slow_filesystem(args.delay_ms):
+        for workers in workers_list:
+            times, result = time_walk(root, workers, args.repeat)
+            keys = sorted(result)
+            if reference is None:
+                reference = keys
+            runs.append({
+                "workers": workers,
+                "best_s": round(min(times), 4),
+                "median_s": round(statistics.median(times), 4),
+                "files_seen": len(result),
+                "matches_first": keys == reference,
+            })
+
+    base = runs[0]["best_s"] if runs else 0
+    for run in runs:
+        run["speedup"] = round(base / run["best_s"], 2) if run["best_s"] else None
+
+    print(json.dumps({
+        "root": root,
+        "files": runs[0]["files_seen"] if runs else 0,
+        "delay_ms": args.delay_ms,
+        "cpu_count": os.cpu_count(),
+        "runs": runs,
+    }, indent=2))
+    return 0 if all(r["matches_first"] for r in runs) else 1
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmarks for agent workspace change detection.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_suite = sub.add_parser("suite", help="Time change detection across workspace shapes, sizes and implementations")
+    p_suite.add_argument("--shapes", default=",".join(SHAPES), help=f"Comma-separated (default: {','.join(SHAPES)})")
+    p_suite.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated file counts")
+    p_suite.add_argument("--impls", default=",".join(IMPLS), help=f"Comma-separated (default: {','.join(IMPLS)})")
+    p_suite.add_argument("--repeat", type=int, default=3, help="Timed cycles per measurement (default: 3)")
+    p_suite.add_argument("--workers", type=int, default=PARALLEL_WORKERS,
+                         help=f"Pool size for the parallel implementation (default: {PARALLEL_WORKERS})")
+    p_suite.add_argument("--tree-dir", default=None, help="Where generated workspaces are kept")
+    p_suite.add_argument("--no-syscalls", action="store_true", help="Skip the strace syscall count")
+    p_suite.add_argument("--output", default=None, help="Also write the JSON report to this file")
+    p_suite.add_argument("--compare", default=None, help="Baseline report to compare best_s against")
+    p_suite.add_argument("--threshold", type=float, default=1.2,
+                         help="Slowdown ratio counted as a regression (default: 1.2); exit code 1 if any")
+
+    p_workers = sub.add_parser("workers", help="Serial vs thread-pool walk on one tree")
+    p_workers.add_argument("--root", default=None, help="Tree to scan (default: generated under the temp dir)")
+    p_workers.add_argument("--files", type=int, default=500000, help="Files in the generated tree (default: 500000)")
+    p_workers.add_argument("--workers", default="1,4,8,16", help="Comma-separated pool sizes; 1 = serial")
+    p_workers.add_argument("--delay-ms", type=float, default=0.0,
+                           help="Simulated latency per scandir()/stat() call, in ms (default: 0 = local disk)")
+    p_workers.add_argument("--repeat", type=int, default=3, help="Timed runs per pool size (default: 3)")
+
+    p_measure = sub.add_parser("_measure", help="(internal) one measurement, run in a child process")
+    p_measure.add_argument("--impl", required=True, choices=IMPLS)
+    p_measure.add_argument("--root", required=True)
+    p_measure.add_argument("--repeat", type=int, default=1)
+    p_measure.add_argument("--workers", type=int, default=PARALLEL_WORKERS)
+
+    args = ap.parse_args()
+
+    if args.cmd == "_measure":
+        print(json.dumps(_measure_in_process(args.impl, args.root, args.repeat, args.workers)))
+        return 0
+    if args.cmd == "suite":
+        return cmd_suite(args)
+    return cmd_workers(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
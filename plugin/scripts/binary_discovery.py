@@ -0,0 +1,91 @@
+"""
+Cached version probing for backend CLIs (cursor/agent, codex, picoclaw).
+
+`--check`, `status` and the status dashboard used to spawn `<binary> --version`
+on every call (5-10 s timeouts each). The result is now stored in a small JSON
+cache keyed by the binary's resolved path and validated against its stat data
+(mtime_ns, inode, size, device): when nothing changed on disk no subprocess is
+started. Failed probes are not cached.
+
+Cache file: CLAW_DISCOVERY_CACHE (default ~/.openclaw/cache/binaries.json)
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+CACHE_FILE = Path(os.environ.get(
+    "CLAW_DISCOVERY_CACHE", Path.home() / ".openclaw" / "cache" / "binaries.json"))
+
+
+def _stat_key(path: str) -> list[int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_ino, st.st_size, st.st_dev]
+
+
+def _load_cache() -> dict:
+    try:
+        with open(CACHE_FILE, "r") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_cache(data: dict) -> None:
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_FILE.with_name(f".{CACHE_FILE.name}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, CACHE_FILE)
+    except OSError:
+        pass
+
+
+def resolve(binary: str) -> str | None:
+    """Absolute, symlink-resolved path of a binary name or path, or None."""
+    found = shutil.which(binary)
+    return os.path.realpath(found) if found else None
+
+
+def probe_version(binary: str, timeout_s: float = 10) -> dict:
+    """
+    Return {"path", "version", "cached"} for a binary, or {"path", "error"}
+    (not found, timeout, or a non-zero exit; errors are never cached).
+
+    version is the stripped stdout (or stderr) of `<binary> --version`.
+    """
+    path = resolve(binary)
+    if not path:
+        return {"path": None, "error": f"{binary} not found"}
+    key = _stat_key(path)
+    cache = _load_cache()
+    entry = cache.get(path)
+    if entry and key and entry.get("stat") == key:
+        return {"path": path, "version": entry.get("version", "unknown"), "cached": True}
+
+    try:
+        result = subprocess.run(
+            [path, "--version"],
+            capture_output=True,
+            text=True,
+            timeout=timeout_s,
+        )
+    except Exception as exc:
+        return {"path": path, "error": str(exc)}
+    if result.returncode != 0:
+        detail = (result.stderr.strip() or result.stdout.strip()).splitlines()
+        return {"path": path,
+                "error": f"--version exited with {result.returncode}" + (f": {detail[0]}" if detail else "")}
+    version = result.stdout.strip() or result.stderr.strip() or "unknown"
+    if key:
+        cache[path] = {"stat": key, "version": version}
+        _save_cache(cache)
+    return {"path": path, "version": version, "cached": False}
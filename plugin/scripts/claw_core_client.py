@@ -0,0 +1,175 @@
+"""
+Minimal claw_core socket client used to run agent CLIs inside runtime sessions.
+
+Running Cursor/Codex through claw_core (instead of a raw subprocess) makes the
+agent visible to `system.stats` and the status dashboard, and puts it under
+the runtime's timeouts, cleanup and output limits. One named session is kept
+per workspace ("agent-<hash>") and reused across runs; if it is busy a
+temporary session is created for the run and destroyed afterwards.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import socket
+import time
+import uuid
+
+from agent_process import MAX_OUTPUT_BYTES, resource_summary, truncate_middle
+from output_filter import merge_stats
+
+SOCKET = os.environ.get("CLAW_CORE_SOCKET", "/tmp/trl.sock")
+# Extra socket wait on top of the command timeout (runtime bookkeeping, slow shells)
+SOCKET_GRACE_S = 30
+
+
+def send(method: str, params: dict | None = None, socket_path: str | None = None,
+         timeout_s: float = 60) -> dict:
+    req = {"id": str(uuid.uuid4()), "method": method, "params": params or {}}
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.settimeout(timeout_s)
+        s.connect(socket_path or SOCKET)
+        s.sendall((json.dumps(req) + "\n").encode())
+        buf = b""
+        while b"\n" not in buf:
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            buf += chunk
+        return json.loads(buf.decode().strip())
+    finally:
+        s.close()
+
+
+def session_name(workspace: str) -> str:
+    return "agent-" + hashlib.sha1(os.path.realpath(workspace).encode()).hexdigest()[:12]
+
+
+def _create_session(workspace: str, name: str | None, socket_path: str | None) -> str:
+    env = {}
+    if os.environ.get("PATH"):
+        env["PATH"] = os.environ["PATH"]
+    if os.environ.get("HOME"):
+        env["HOME"] = os.environ["HOME"]
+    params = {"working_dir": workspace, "shell": os.environ.get("SHELL", "/bin/sh"), "env": env}
+    if name:
+        params["name"] = name
+    r = send("session.create", params, socket_path)
+    if not r.get("ok"):
+        err = r.get("error", {})
+        raise RuntimeError(f"claw_core session.create failed: {err.get('code')} {err.get('message', '')}")
+    return r["data"]["session_id"]
+
+
+def pooled_session(workspace: str, socket_path: str | None = None) -> str:
+    """Return the id of the workspace's named session, creating it if needed."""
+    name = session_name(workspace)
+    r = send("session.list", socket_path=socket_path)
+    if r.get("ok"):
+        for s in r.get("data", {}).get("sessions", []):
+            if s.get("name") == name:
+                return s["session_id"]
+    return _create_session(workspace, name, socket_path)
+
+
+def _exec(session_id: str, command: str, timeout_s: float, socket_path: str | None) -> dict:
+    return send(
+        "exec.run",
+        {"session_id": session_id, "command": command, "timeout_s": int(timeout_s)},
+        socket_path,
+        timeout_s=timeout_s + SOCKET_GRACE_S,
+    )
+
+
+def run_in_session(
+    cmd: list[str],
+    workspace: str,
+    timeout_s: float,
+    socket_path: str | None = None,
+    limit_bytes: int = MAX_OUTPUT_BYTES,
+    stdout_filter=None,
+    stderr_filter=None,
+) -> dict:
+    """
+    Run cmd in the workspace's pooled claw_core session.
+
+    Filters (output_filter.LineFilter) are applied to the complete output
+    once the runtime returns it, before the size cap.
+
+    Returns the same shape as agent_process.run_captured() plus "session_id".
+    Raises OSError/RuntimeError if the runtime is unreachable or refuses.
+    """
+    # Resolve the binary here: the session's PATH may differ from ours.
+    command = shlex.join([shutil.which(cmd[0]) or cmd[0], *cmd[1:]])
+    start_time = time.monotonic()
+    try:
+        session_id = pooled_session(workspace, socket_path)
+    except OSError as exc:
+        raise RuntimeError(f"claw_core runtime not reachable at {socket_path or SOCKET}: {exc}") from exc
+    temporary = False
+    r = _exec(session_id, command, timeout_s, socket_path)
+    code = (r.get("error") or {}).get("code")
+    if code == "SESSION_NOT_FOUND":
+        # Pooled session was reaped between list and run; make a new one.
+        session_id = _create_session(workspace, session_name(workspace), socket_path)
+        r = _exec(session_id, command, timeout_s, socket_path)
+    elif code == "SESSION_LIMIT_EXCEEDED":
+        # The pooled session hit the runtime's session_max_commands; replace it.
+        try:
+            send("session.destroy", {"session_id": session_id, "force": True}, socket_path)
+        except OSError:
+            pass
+        session_id = _create_session(workspace, session_name(workspace), socket_path)
+        r = _exec(session_id, command, timeout_s, socket_path)
+    elif code == "SESSION_BUSY":
+        session_id = _create_session(workspace, None, socket_path)
+        temporary = True
+        r = _exec(session_id, command, timeout_s, socket_path)
+    try:
+        if not r.get("ok"):
+            err = r.get("error", {})
+            if err.get("code") == "COMMAND_TIMEOUT":
+                data = {"timed_out": True, "exit_code": -1}
+            else:
+                raise RuntimeError(f"claw_core exec.run failed: {err.get('code')} {err.get('message', '')}")
+        else:
+            data = r.get("data", {})
+    finally:
+        if temporary:
+            try:
+                send("session.destroy", {"session_id": session_id, "force": True}, socket_path)
+            except OSError:
+                pass
+
+    stdout = data.get("stdout", "") or ""
+    stderr = data.get("stderr", "") or ""
+    stdout_bytes = len(stdout.encode("utf-8", errors="replace"))
+    stderr_bytes = len(stderr.encode("utf-8", errors="replace"))
+    if stdout_filter:
+        stdout = stdout_filter.apply(stdout)
+    if stderr_filter:
+        stderr = stderr_filter.apply(stderr)
+    stdout, out_truncated = truncate_middle(stdout, limit_bytes)
+    stderr, err_truncated = truncate_middle(stderr, limit_bytes)
+    exit_code = data.get("exit_code", -1)
+    return {
+        "returncode": exit_code if isinstance(exit_code, int) else -1,
+        "stdout": stdout,
+        "stderr": stderr,
+        "stdout_bytes": stdout_bytes,
+        "stderr_bytes": stderr_bytes,
+        "truncated": out_truncated or err_truncated,
+        "timed_out": bool(data.get("timed_out")),
+        "aborted": False,
+        "cancelled": False,
+        "stalled": False,
+        "duration_ms": int(data.get("duration_ms") or (time.monotonic() - start_time) * 1000),
+        # The runtime does not report rusage for exec.run
+        "resources": resource_summary(None, None, stdout_bytes + stderr_bytes),
+        "filtered": merge_stats(stdout_filter, stderr_filter),
+        "session_id": session_id,
+    }
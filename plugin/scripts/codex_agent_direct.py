@@ -8,7 +8,10 @@ Designed to be called by the claw-core plugin as an agent tool backend.
 Usage:
   codex_agent_direct.py --prompt "..." [--workspace /path] [--model gpt-4.1-mini] [--mode agent|plan|ask] [--timeout 600]
   codex_agent_direct.py --help
+  codex_agent_direct.py --prompt "..." --detach   # queue in background, prints job_id
   codex_agent_direct.py --check   # Check if Codex CLI is available
+  codex_agent_direct.py --prompt "..." --progress   # JSONL progress events, then the result
+  codex_agent_direct.py --prompt "..." --timeout auto   # timeout from run history (agent_ledger.py)
 
 Modes:
   agent (default) = execute with auto approval
@@ -17,21 +20,57 @@ Modes:
 
 Output (JSON):
   { "ok": true, "output": "...", "exit_code": 0, "duration_ms": 1234,
-    "files_created": [], "truncated": false }
+    "files_created": [], "files_modified": [], "files_deleted": [],
+    "change_detection": "git", "truncated": false,
+    "resources": { "cpu_user_s": 1.2, "cpu_sys_s": 0.3, "max_rss_kb": 210000,
+                   "tree_peak_rss_kb": 480000, "tree_peak_processes": 6,
+                   "ctx_switches_voluntary": 900, "ctx_switches_involuntary": 40,
+                   "output_bytes": 5120 },
+    "telemetry": { "turns": 1, "items": {"agent_message": 1, "command_execution": 3},
+                   "tool_calls": 0, "commands": 3, "command_failures": 0,
+                   "tokens": {"input": 1200, "cached_input": 100, "output": 50},
+                   "first_event_ms": 900, "command_ms": 4100,
+                   "turn_details": [{"status": "completed", "duration_ms": 51000, ...}] } }
+
+Change detection uses `git status` when the workspace is a git repo (any file
+type, ignored files excluded) and a stat walk of the directory otherwise.
+
+Runs wait for a slot in the local job queue (agent_queue.py): at most
+--max-concurrent agents per host and one writing agent per workspace.
+Successful ask-mode results are cached (see response_cache.py) and reused for
+the same backend, model, prompt and workspace content; hits have "cached": true.
 """
 from __future__ import annotations
 
 import argparse
-import glob
 import json
 import os
+import re
 import shutil
-import subprocess
 import sys
 import time
 
-
-MAX_OUTPUT_BYTES = 100 * 1024  # 100 KB
+from agent_ledger import adaptive_timeout, print_warning, record_run, slow_run_watch, timeout_arg
+from agent_process import MAX_OUTPUT_BYTES, exit_on_sigterm, run_captured, truncate_middle
+from agent_queue import DEFAULT_MAX_CONCURRENT, job_path, max_concurrent, run_queued, submit_job
+from agent_workspace import diff_snapshot, take_snapshot, workspace_fingerprint
+from binary_discovery import probe_version
+from claw_core_client import SOCKET, run_in_session
+from output_filter import make_filter
+from response_cache import DEFAULT_TTL_S, ResponseCache
+
+ASK_CACHE_NAMESPACE = "agent-ask"
+DEFAULT_TIMEOUT_S = 600
+
+# Abort the run after this many error events (turn.failed always aborts)
+DEFAULT_MAX_ERRORS = 3
+PROGRESS_TEXT_CHARS = 200
+# Per-turn entries kept in telemetry (totals always cover every turn)
+MAX_TELEMETRY_TURNS = 50
+# Item types that are tool invocations by the model (besides shell commands)
+TOOL_ITEM_TYPES = ("mcp_tool_call", "web_search", "file_change")
+# stderr lines that are never useful to the bot (MCP auth noise)
+STDERR_NOISE_PATTERNS = [r"rmcp", r"(?i:auth)", r"www_authenticate"]
 
 
 def find_codex_binary() -> str | None:
@@ -56,94 +95,196 @@ def find_codex_binary() -> str | None:
 
 
 def check_codex() -> dict:
-    """Check if Codex CLI is installed and return version info."""
+    """Check if Codex CLI is installed and return version info (cached per binary mtime/inode)."""
     binary = find_codex_binary()
     if not binary:
         return {
             "installed": False,
             "error": "codex CLI not found on PATH. Install with: npm i -g @openai/codex",
         }
-    try:
-        result = subprocess.run(
-            [binary, "--version"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        version = result.stdout.strip() or result.stderr.strip()
-        return {"installed": True, "binary": binary, "version": version}
-    except Exception as exc:
-        return {"installed": True, "binary": binary, "version": "unknown", "warning": str(exc)}
-
+    info = probe_version(binary, timeout_s=10)
+    if "error" in info:
+        return {"installed": True, "binary": binary, "version": "unknown", "warning": info["error"]}
+    return {"installed": True, "binary": binary, "version": info["version"], "version_cached": info["cached"]}
 
-def detect_new_files(workspace: str, before_files: set[str]) -> list[str]:
-    """Detect files created during the Codex run."""
-    new_files: list[str] = []
-    exts = ("*.py", "*.rs", "*.ts", "*.tsx", "*.js", "*.jsx", "*.md", "*.txt", "*.json", "*.html", "*.css", "*.toml")
-    for ext in exts:
-        for path in glob.glob(os.path.join(workspace, "**", ext), recursive=True):
-            if path not in before_files and os.path.isfile(path):
-                new_files.append(path)
-    return sorted(set(new_files))
 
+def _text(value) -> str:
+    """A string field from an event, stripped; "" if missing, null or not a string."""
+    return value.strip() if isinstance(value, str) else ""
 
-def snapshot_files(workspace: str) -> set[str]:
-    """Snapshot code/artifact files in the workspace before the run."""
-    files: set[str] = set()
-    exts = ("*.py", "*.rs", "*.ts", "*.tsx", "*.js", "*.jsx", "*.md", "*.txt", "*.json", "*.html", "*.css", "*.toml")
-    for ext in exts:
-        for path in glob.glob(os.path.join(workspace, "**", ext), recursive=True):
-            if os.path.isfile(path):
-                files.add(path)
-    return files
 
-
-def _parse_codex_jsonl(raw: str) -> str:
+class CodexEventParser:
     """
-    Parse codex exec --json JSONL output and extract human-readable text.
+    Incremental parser for `codex exec --json` JSONL events.
 
     Codex outputs one JSON object per line:
       {"type":"thread.started",...}
       {"type":"item.completed","item":{"type":"agent_message","text":"..."}}
       {"type":"turn.failed","error":{"message":"..."}}
 
-    Returns the concatenated agent messages and any errors as plain text.
+    feed_line() is called for every stdout line as it streams in and returns
+    True when the run should be aborted: on `turn.failed`, or once max_errors
+    error events have been seen (0 disables the error-count rule). on_event,
+    if given, receives a compact progress dict per parsed event.
+
+    Besides message text the parser keeps telemetry(): turn durations and
+    token usage (from turn.completed), item counts by type, and shell
+    command count, failures and time (item.started -> item.completed).
     """
-    messages: list[str] = []
-    errors: list[str] = []
-    for line in raw.splitlines():
+
+    def __init__(self, max_errors: int = DEFAULT_MAX_ERRORS, on_event=None):
+        self.max_errors = max_errors
+        self.on_event = on_event
+        self.messages: list[str] = []
+        self.errors: list[str] = []
+        self.error_events = 0
+        self.abort_reason: str | None = None
+        self.start_time = time.monotonic()
+        self.first_event_ms: int | None = None
+        self.turns: list[dict] = []
+        self.turn_count = 0
+        self.turn_started: float | None = None
+        self.items: dict[str, int] = {}
+        self.item_started: dict[str, float] = {}
+        self.commands = 0
+        self.command_failures = 0
+        self.command_ms = 0
+        self.tokens: dict[str, int] = {}
+
+    def feed_line(self, line: str) -> bool:
         line = line.strip()
         if not line or not line.startswith("{"):
-            continue
+            return False
         try:
             obj = json.loads(line)
         except json.JSONDecodeError:
-            continue
+            return False
+        if not isinstance(obj, dict):
+            return False
         obj_type = obj.get("type", "")
+        self._telemetry(obj_type, obj)
         if obj_type == "item.completed":
-            item = obj.get("item", {})
-            item_type = item.get("type", "")
+            item = obj.get("item")
+            item_type = item.get("type", "") if isinstance(item, dict) else ""
             if item_type == "agent_message":
-                text = item.get("text", "").strip()
+                text = _text(item.get("text"))
                 if text:
-                    messages.append(text)
+                    self.messages.append(text)
             elif item_type == "error":
-                msg = item.get("message", "").strip()
+                msg = _text(item.get("message"))
                 if msg:
-                    errors.append(f"[error] {msg}")
+                    self.errors.append(f"[error] {msg}")
+                self.error_events += 1
         elif obj_type == "turn.failed":
             err = obj.get("error", {})
-            msg = err.get("message", "") if isinstance(err, dict) else str(err)
-            msg = msg.strip()
+            msg = _text(err.get("message")) if isinstance(err, dict) else str(err).strip()
             if msg:
-                errors.append(f"[failed] {msg}")
+                self.errors.append(f"[failed] {msg}")
+            self.abort_reason = f"turn.failed: {msg}" if msg else "turn.failed"
         elif obj_type == "error":
-            msg = obj.get("message", "").strip()
+            msg = _text(obj.get("message"))
             if msg:
-                errors.append(f"[error] {msg}")
+                self.errors.append(f"[error] {msg}")
+            self.error_events += 1
+
+        if self.abort_reason is None and self.max_errors and self.error_events >= self.max_errors:
+            self.abort_reason = f"{self.error_events} error events"
+
+        if self.on_event:
+            self.on_event(self._progress(obj))
+        return self.abort_reason is not None
+
+    def _telemetry(self, obj_type: str, obj: dict) -> None:
+        now = time.monotonic()
+        if self.first_event_ms is None:
+            self.first_event_ms = int((now - self.start_time) * 1000)
+        item = obj.get("item")
+        item = item if isinstance(item, dict) else {}
+        if obj_type == "turn.started":
+            self.turn_started = now
+        elif obj_type in ("turn.completed", "turn.failed"):
+            self.turn_count += 1
+            turn: dict = {"status": "completed" if obj_type == "turn.completed" else "failed"}
+            if self.turn_started is not None:
+                turn["duration_ms"] = int((now - self.turn_started) * 1000)
+                self.turn_started = None
+            usage = obj.get("usage")
+            if isinstance(usage, dict):
+                for key, value in usage.items():
+                    if isinstance(value, int):
+                        name = key[:-len("_tokens")] if key.endswith("_tokens") else key
+                        turn[f"{name}_tokens"] = value
+                        self.tokens[name] = self.tokens.get(name, 0) + value
+            if len(self.turns) < MAX_TELEMETRY_TURNS:
+                self.turns.append(turn)
+        elif obj_type == "item.started" and item.get("id") is not None:
+            self.item_started[str(item["id"])] = now
+        elif obj_type == "item.completed":
+            item_type = item.get("type", "") or "unknown"
+            self.items[item_type] = self.items.get(item_type, 0) + 1
+            started = self.item_started.pop(str(item.get("id")), None)
+            if item_type == "command_execution":
+                self.commands += 1
+                if item.get("exit_code") not in (0, None) or item.get("status") == "failed":
+                    self.command_failures += 1
+                if started is not None:
+                    self.command_ms += int((now - started) * 1000)
+
+    def telemetry(self, timing: bool = True) -> dict:
+        """
+        Compact summary of the event stream. timing=False leaves out durations
+        (when the events were replayed after the run rather than streamed).
+        """
+        out = {
+            "turns": self.turn_count,
+            "items": dict(sorted(self.items.items())),
+            "tool_calls": sum(self.items.get(t, 0) for t in TOOL_ITEM_TYPES),
+            "commands": self.commands,
+            "command_failures": self.command_failures,
+            "tokens": dict(self.tokens) or None,
+        }
+        turns = self.turns
+        if timing:
+            out["first_event_ms"] = self.first_event_ms
+            out["command_ms"] = self.command_ms
+        else:
+            turns = [{k: v for k, v in t.items() if k != "duration_ms"} for t in turns]
+        out["turn_details"] = turns
+        return out
+
+    def _progress(self, obj: dict) -> dict:
+        event = {
+            "type": "progress",
+            "event": obj.get("type", ""),
+            "elapsed_ms": int((time.monotonic() - self.start_time) * 1000),
+        }
+        item = obj.get("item")
+        if isinstance(item, dict):
+            event["item_type"] = item.get("type", "")
+            if item.get("type") == "agent_message":
+                event["text"] = _text(item.get("text"))[:PROGRESS_TEXT_CHARS]
+            elif item.get("command"):
+                event["command"] = str(item["command"])[:PROGRESS_TEXT_CHARS]
+        if self.abort_reason:
+            event["abort"] = self.abort_reason
+        return event
+
+    def text(self) -> str:
+        """Concatenated agent messages followed by any errors, as plain text."""
+        parts = self.messages + self.errors
+        return "\n\n".join(parts) if parts else ""
 
-    parts = messages + errors
-    return "\n\n".join(parts) if parts else ""
+
+def _parse_codex_jsonl(raw: str) -> str:
+    """
+    Parse complete codex exec --json JSONL output and extract human-readable text.
+
+    Returns the concatenated agent messages and any errors as plain text.
+    """
+    parser = CodexEventParser(max_errors=0)
+    for line in raw.splitlines():
+        parser.feed_line(line)
+    return parser.text()
 
 
 def run_codex_agent(
@@ -152,6 +293,14 @@ def run_codex_agent(
     model: str = "gpt-4.1-mini",
     mode: str = "agent",
     timeout_s: int = 600,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+    on_event=None,
+    via_claw_core: bool = False,
+    socket_path: str | None = None,
+    cancel_event=None,
+    drop_patterns: list[str] | None = None,
+    slow_after_s: float | None = None,
+    on_warning=None,
 ) -> dict:
     """
     Run codex exec non-interactively and return a structured result.
@@ -160,6 +309,24 @@ def run_codex_agent(
       agent — execute with auto approval (default)
       plan  — plan then execute (--plan flag)
       ask   — read-only, approval set to never-auto (informational only)
+
+    Events are parsed as they stream; the process is stopped early on
+    `turn.failed` or after max_errors error events instead of running into
+    the timeout. on_event receives progress dicts (see CodexEventParser).
+
+    via_claw_core runs the CLI in the workspace's pooled claw_core session
+    instead of a local subprocess; output is then parsed after the run and
+    early abort does not apply.
+
+    cancel_event (threading.Event), when set by another thread, kills the
+    local run's process group (used by agent_hedge.py; ignored via claw_core).
+
+    stderr passes through output_filter as it streams (ANSI codes, \r progress
+    redraws, repeated lines, STDERR_NOISE_PATTERNS and drop_patterns are
+    removed) before the 100 KB cap; stdout is JSONL and is parsed unfiltered.
+
+    slow_after_s (the p95 from --timeout auto) calls on_warning with a
+    "slow_run" event once the run takes longer; the result gets "slow_run": true.
     """
     binary = find_codex_binary()
     if not binary:
@@ -197,71 +364,31 @@ def run_codex_agent(
 
     effective_workspace = workspace or os.getcwd()
 
-    before_files = snapshot_files(effective_workspace) if os.path.isdir(effective_workspace) else set()
+    before_snapshot = take_snapshot(effective_workspace)
 
+    parser = CodexEventParser(max_errors=max_errors, on_event=on_event)
+    stderr_filter = make_filter(STDERR_NOISE_PATTERNS + list(drop_patterns or ()))
     start_time = time.monotonic()
     try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=timeout_s,
-            cwd=workspace,
-        )
-        duration_ms = int((time.monotonic() - start_time) * 1000)
-
-        raw_output = result.stdout or ""
-        stderr = result.stderr or ""
-
-        # Parse JSONL output from `codex exec --json` and extract agent messages.
-        # Codex outputs one JSON object per line; we extract agent_message text
-        # and error messages so the bot receives clean readable text, not raw JSON.
-        output = _parse_codex_jsonl(raw_output)
-
-        # If parsing yielded nothing useful, fall back to raw stdout
-        if not output and raw_output.strip():
-            output = raw_output
-
-        # Append relevant stderr (ignore MCP auth noise)
-        if stderr:
-            relevant_stderr = "\n".join(
-                line for line in stderr.splitlines()
-                if line.strip() and "rmcp" not in line and "AUTH" not in line.upper()
-                and "www_authenticate" not in line
-            )
-            if relevant_stderr.strip():
-                output = (output + "\n--- stderr ---\n" + relevant_stderr).strip()
-
-        truncated = False
-        if len(output) > MAX_OUTPUT_BYTES:
-            output = output[:MAX_OUTPUT_BYTES] + f"\n\n... [truncated at {MAX_OUTPUT_BYTES // 1024}KB]"
-            truncated = True
-
-        new_files = detect_new_files(effective_workspace, before_files) if os.path.isdir(effective_workspace) else []
-
-        return {
-            "ok": result.returncode == 0,
-            "output": output,
-            "exit_code": result.returncode,
-            "duration_ms": duration_ms,
-            "files_created": new_files,
-            "truncated": truncated,
-        }
-
-    except subprocess.TimeoutExpired:
-        duration_ms = int((time.monotonic() - start_time) * 1000)
-        return {
-            "ok": False,
-            "error": f"codex exec timed out after {timeout_s}s",
-            "output": "",
-            "exit_code": -1,
-            "duration_ms": duration_ms,
-            "files_created": [],
-            "truncated": False,
-        }
+        with slow_run_watch(slow_after_s, on_warning) as watch:
+            if via_claw_core:
+                result = run_in_session(cmd, effective_workspace, timeout_s, socket_path, MAX_OUTPUT_BYTES,
+                                        stderr_filter=stderr_filter)
+                for line in result["stdout"].splitlines():
+                    parser.feed_line(line)
+            else:
+                result = run_captured(
+                    cmd,
+                    timeout_s=timeout_s,
+                    cwd=workspace,
+                    limit_bytes=MAX_OUTPUT_BYTES,
+                    on_stdout_line=parser.feed_line,
+                    cancel_event=cancel_event,
+                    stderr_filter=stderr_filter,
+                )
     except Exception as exc:
         duration_ms = int((time.monotonic() - start_time) * 1000)
-        return {
+        response = {
             "ok": False,
             "error": str(exc),
             "output": "",
@@ -270,6 +397,71 @@ def run_codex_agent(
             "files_created": [],
             "truncated": False,
         }
+        record_run("codex", mode, model, effective_workspace, prompt, response)
+        return response
+
+    raw_output = result["stdout"]
+    stderr = result["stderr"]
+
+    # JSONL from `codex exec --json` was parsed line by line as it streamed;
+    # we keep agent_message text and error messages so the bot receives clean
+    # readable text, not raw JSON.
+    output = parser.text()
+
+    # If parsing yielded nothing useful, fall back to raw stdout
+    if not output and raw_output.strip():
+        output = raw_output
+
+    # Append stderr (MCP auth noise was already dropped by the stream filter)
+    if stderr:
+        relevant_stderr = "\n".join(line for line in stderr.splitlines() if line.strip())
+        if relevant_stderr.strip():
+            output = (output + "\n--- stderr ---\n" + relevant_stderr).strip()
+
+    output, truncated = truncate_middle(output, MAX_OUTPUT_BYTES)
+    truncated = truncated or result["truncated"]
+
+    changes = diff_snapshot(before_snapshot)
+
+    response = {
+        "ok": (result["returncode"] == 0 and not result["timed_out"]
+               and not result["aborted"] and not result["cancelled"]),
+        "output": output,
+        "exit_code": (-1 if result["timed_out"] or result["aborted"] or result["cancelled"]
+                      else result["returncode"]),
+        "duration_ms": result["duration_ms"],
+        "files_created": changes["created"],
+        "files_modified": changes["modified"],
+        "files_deleted": changes["deleted"],
+        "change_detection": changes["method"],
+        "output_bytes": result["stdout_bytes"] + result["stderr_bytes"],
+        "truncated": truncated,
+        "resources": result["resources"],
+        "filtered": result["filtered"],
+        "telemetry": parser.telemetry(timing=not via_claw_core),
+    }
+    if result.get("killed_processes"):
+        response["killed_processes"] = result["killed_processes"]
+        response["force_killed"] = result["force_killed"]
+    if watch.get("slow_run"):
+        response["slow_run"] = True
+    if via_claw_core:
+        response["runner"] = "claw_core"
+        response["session_id"] = result["session_id"]
+    if result["timed_out"]:
+        response["error"] = f"codex exec timed out after {timeout_s}s"
+    elif result["cancelled"]:
+        response["error"] = "codex exec cancelled"
+        response["cancelled"] = True
+    elif result["aborted"]:
+        response["error"] = f"codex exec aborted early: {parser.abort_reason}"
+        response["aborted"] = True
+    record_run("codex", mode, model, effective_workspace, prompt, response)
+    return response
+
+
+def _print_event(event: dict) -> None:
+    print(json.dumps(event), flush=True)
 
 
 def main() -> int:
@@ -281,10 +473,33 @@ def main() -> int:
     ap.add_argument("--model", default="auto", help="Model to use (default: auto = use ~/.codex/config.toml)")
     ap.add_argument("--mode", default="agent", choices=["agent", "plan", "ask"],
                     help="Mode: agent (execute), plan (plan then execute), ask (read-only/suggest)")
-    ap.add_argument("--timeout", type=int, default=600, help="Timeout in seconds (default: 600)")
+    ap.add_argument("--timeout", type=timeout_arg, default=DEFAULT_TIMEOUT_S,
+                    help=f"Timeout in seconds, or 'auto' to derive it from past runs (default: {DEFAULT_TIMEOUT_S})")
+    ap.add_argument("--max-errors", type=int, default=DEFAULT_MAX_ERRORS,
+                    help=f"Abort after this many error events; 0 = only on turn.failed (default: {DEFAULT_MAX_ERRORS})")
+    ap.add_argument("--progress", action="store_true",
+                    help="Stream progress events as JSONL on stdout; the final result is the last line (type=result)")
     ap.add_argument("--check", action="store_true", help="Check if Codex CLI is available")
     ap.add_argument("--json", action="store_true", default=True, help="Output as JSON (default)")
+    ap.add_argument("--detach", action="store_true",
+                    help="Queue the run in the background and print its job id (see agent_queue.py status/wait/cancel)")
+    ap.add_argument("--max-concurrent", type=int, default=max_concurrent(),
+                    help=f"Host-wide limit on concurrent agent runs (env: CLAW_AGENT_MAX_CONCURRENT, "
+                         f"default: {DEFAULT_MAX_CONCURRENT})")
+    ap.add_argument("--queue-timeout", type=float, default=None,
+                    help="Give up if no agent slot is free after N seconds (default: wait)")
+    ap.add_argument("--no-queue", action="store_true", help="Run immediately, bypassing the job queue")
+    ap.add_argument("--via-claw-core", action="store_true",
+                    default=os.environ.get("CLAW_AGENT_VIA_CLAW_CORE") == "1",
+                    help="Run the agent inside a pooled claw_core session (env: CLAW_AGENT_VIA_CLAW_CORE=1)")
+    ap.add_argument("--socket", default=SOCKET, help="claw_core socket path (with --via-claw-core)")
+    ap.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL_S,
+                    help=f"Seconds to reuse identical ask-mode answers (default: {DEFAULT_TTL_S})")
+    ap.add_argument("--no-cache", action="store_true", help="Do not read or write the ask-mode result cache")
+    ap.add_argument("--drop-pattern", action="append", default=[], metavar="REGEX",
+                    help="Drop stderr lines matching REGEX before the output cap (repeatable)")
     args = ap.parse_args()
+    exit_on_sigterm()
 
     if args.check:
         result = check_codex()
@@ -294,16 +509,74 @@ def main() -> int:
     if not args.prompt:
         ap.error("--prompt is required (unless using --check)")
         return 1
-
-    result = run_codex_agent(
-        prompt=args.prompt,
-        workspace=args.workspace,
-        model=args.model,
-        mode=args.mode,
-        timeout_s=args.timeout,
-    )
-
-    print(json.dumps(result, indent=2))
+    for pattern in args.drop_pattern:
+        try:
+            re.compile(pattern)
+        except re.error as exc:
+            ap.error(f"invalid --drop-pattern {pattern!r}: {exc}")
+
+    params = {
+        "prompt": args.prompt,
+        "workspace": args.workspace,
+        "model": args.model,
+        "mode": args.mode,
+        "timeout_s": args.timeout,
+        "max_errors": args.max_errors,
+        "via_claw_core": args.via_claw_core,
+        "socket_path": args.socket,
+        "drop_patterns": args.drop_pattern,
+    }
+    auto = None
+    if args.timeout == "auto":
+        auto = adaptive_timeout("codex", args.mode, args.workspace or os.getcwd(), DEFAULT_TIMEOUT_S)
+        params["timeout_s"] = auto["timeout_s"]
+        params["slow_after_s"] = auto["slow_after_s"]
+
+    if args.detach:
+        job = submit_job("codex", params, limit=args.max_concurrent)
+        print(json.dumps({"ok": True, "job_id": job["job_id"], "status": job["status"],
+                          "spool": str(job_path(job["job_id"]))}, indent=2))
+        return 0
+
+    # Ask mode is read-only: identical questions about an unchanged workspace
+    # can be answered from the cache (keyed by the workspace content fingerprint).
+    cache = cache_key = None
+    if args.mode == "ask" and not args.no_cache:
+        cache = ResponseCache(ASK_CACHE_NAMESPACE, ttl_s=args.cache_ttl)
+        cache_key = cache.key("codex", args.model, args.prompt,
+                              workspace_fingerprint(args.workspace or os.getcwd()))
+        hit = cache.get(cache_key)
+        if hit:
+            result = dict(hit["value"], cached=True, cache_age_s=hit["age_s"])
+            record_run("codex", args.mode, args.model, args.workspace or os.getcwd(), args.prompt, result)
+            if args.progress:
+                _print_event({"type": "result", **result})
+            else:
+                print(json.dumps(result, indent=2))
+            return 0 if result.get("ok") else 1
+
+    if args.progress:
+        params["on_event"] = _print_event
+    if auto is not None:
+        params["on_warning"] = _print_event if args.progress else print_warning
+    if args.no_queue:
+        result = run_codex_agent(**params)
+    else:
+        result = run_queued(run_codex_agent, params, limit=args.max_concurrent, wait_timeout=args.queue_timeout)
+        if result.get("busy"):
+            record_run("codex", args.mode, args.model, args.workspace or os.getcwd(), args.prompt, result)
+
+    if cache is not None:
+        if result.get("ok"):
+            cache.put(cache_key, result)
+        result["cached"] = False
+
+    if auto is not None:
+        result["adaptive_timeout"] = auto
+    if args.progress:
+        _print_event({"type": "result", **result})
+    else:
+        print(json.dumps(result, indent=2))
     return 0 if result.get("ok") else 1
 
 
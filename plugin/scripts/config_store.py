@@ -0,0 +1,257 @@
+"""
+Shared, stat-validated cache of parsed JSON config files.
+
+picoclaw_client.py, status_dashboard.py and setup_bots.py used to open and
+re-parse ~/.openclaw/openclaw.json and the PicoClaw config in every getter
+(the dashboard parsed openclaw.json twice per render). load_json() keeps the
+parsed document per path, keyed by (mtime_ns, size, inode): while the file is
+unchanged on disk only an os.stat() is paid, any write (including an atomic
+rename over it) invalidates the entry.
+
+Cached documents are shared: treat them as read-only, or pass copy=True to
+get a deep copy you may modify (e.g. before merging and saving).
+
+update_json() changes several (dotted) keys in one transaction: under an
+exclusive fcntl lock on a sidecar "<file>.lock", the current file is read,
+all changes are applied, and the result is written to a temp file that is
+fsynced and renamed over the original, so readers see either the old or the
+new document and a crash never leaves a truncated config.
+
+Typed accessors for the OpenClaw config:
+  agents(config)             agents.list
+  telegram_accounts(config)  channels.telegram.accounts
+  bindings(config)           bindings (account/channel -> agentId routes)
+  bound_agent(config, account_id)
+"""
+from __future__ import annotations
+
+import copy as _copy
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+OPENCLAW_CONFIG = Path.home() / ".openclaw" / "openclaw.json"
+
+# Standard PicoClaw config locations, in lookup order
+PICOCLAW_CONFIG_PATHS = [
+    Path.home() / ".picoclaw" / "workspace" / "config.json",
+    Path.home() / ".picoclaw" / "config.json",
+]
+
+_cache: dict[str, tuple[tuple[int, int, int], object]] = {}
+_lock = threading.Lock()
+
+
+def _stat_key(path: str) -> tuple[int, int, int]:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def load_json(path: str | Path, copy: bool = False):
+    """
+    Parsed JSON document at path, re-read only when the file changed.
+
+    Raises OSError (e.g. FileNotFoundError) and json.JSONDecodeError like
+    json.load() would; failures are not cached.
+    """
+    path = os.fspath(path)
+    key = _stat_key(path)
+    with _lock:
+        entry = _cache.get(path)
+    if entry is None or entry[0] != key:
+        with open(path, "r") as f:
+            data = json.load(f)
+        # Stat taken before the read: if the file changed meanwhile the next call re-reads it
+        entry = (key, data)
+        with _lock:
+            _cache[path] = entry
+    return _copy.deepcopy(entry[1]) if copy else entry[1]
+
+
+def read_json(path: str | Path, default=None, copy: bool = False):
+    """load_json(), but default (None -> {}) when the file is missing or invalid."""
+    try:
+        return load_json(path, copy=copy)
+    except (OSError, ValueError):
+        return {} if default is None else default
+
+
+def invalidate(path: str | Path | None = None) -> None:
+    """Drop one cached document (or all); for writers that cannot rely on stat changes."""
+    with _lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.fspath(path), None)
+
+
+# ---------------------------------------------------------------------------
+# Transactional updates
+# ---------------------------------------------------------------------------
+
+_MISSING = object()
+
+
+@contextmanager
+def locked(path: str | Path):
+    """Exclusive flock on "<path>.lock" (the config itself is replaced by rename, so it can't hold the lock)."""
+    lock_path = f"{os.fspath(path)}.lock"
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+def write_json_atomic(path: str | Path, data) -> None:
+    """Write data as JSON via temp file + fsync + rename, keeping the file's mode."""
+    path = os.fspath(path)
+    directory = os.path.dirname(path) or "."
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o600
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def _set_dotted(doc: dict, dotted: str, value):
+    """Set doc["a"]["b"] for "a.b", creating objects on the way; returns the old value or _MISSING."""
+    parts = dotted.split(".")
+    if not all(parts):
+        raise ValueError(f"invalid key {dotted!r}")
+    node = doc
+    for i, part in enumerate(parts[:-1]):
+        child = node.get(part, _MISSING)
+        if child is _MISSING:
+            child = node[part] = {}
+        elif not isinstance(child, dict):
+            raise ValueError(f"cannot set {dotted!r}: {'.'.join(parts[:i + 1])!r} is not an object")
+        node = child
+    old = node.get(parts[-1], _MISSING)
+    node[parts[-1]] = value
+    return old
+
+
+def update_json(path: str | Path, changes: list[tuple[str, object]]) -> dict:
+    """
+    Apply [(dotted_key, value), ...] to the JSON object at path in one transaction.
+
+    A missing file starts as {}. Later changes to the same key win. Returns
+    {"changed": [{"key", "old", "new"}], "unchanged": [keys], "created": bool};
+    the file is only rewritten when something changed. Raises ValueError for
+    bad keys or a non-object document, OSError/json.JSONDecodeError on I/O or
+    parse errors (nothing is written then).
+    """
+    path = os.fspath(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with locked(path):
+        created = not os.path.exists(path)
+        doc = {} if created else load_json(path, copy=True)
+        if not isinstance(doc, dict):
+            raise ValueError(f"{path} does not contain a JSON object")
+        originals: dict[str, object] = {}
+        for key, value in changes:
+            old = _set_dotted(doc, key, value)
+            originals.setdefault(key, old)
+        changed, unchanged = [], []
+        for key, old in originals.items():
+            new = _get_dotted(doc, key)
+            if old is not _MISSING and old == new:
+                unchanged.append(key)
+            else:
+                changed.append({"key": key, "old": None if old is _MISSING else old, "new": new})
+        if changed or created:
+            write_json_atomic(path, doc)
+    return {"changed": changed, "unchanged": unchanged, "created": created}
+
+
+def _get_dotted(doc: dict, dotted: str):
+    """Value at a dotted key, or None if a later change replaced a parent ("a.b" then "a")."""
+    node = doc
+    for part in dotted.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return None
+        node = node[part]
+    return node
+
+
+# ---------------------------------------------------------------------------
+# OpenClaw / PicoClaw configs
+# ---------------------------------------------------------------------------
+
+def openclaw_config(path: str | Path | None = None) -> dict:
+    """openclaw.json (shared, read-only), or {} if missing or invalid."""
+    config = read_json(path or OPENCLAW_CONFIG)
+    return config if isinstance(config, dict) else {}
+
+
+def find_picoclaw_config() -> Path | None:
+    for path in PICOCLAW_CONFIG_PATHS:
+        if path.exists():
+            return path
+    return None
+
+
+def picoclaw_config() -> dict:
+    """The first PicoClaw config found (shared, read-only), or {}."""
+    path = find_picoclaw_config()
+    config = read_json(path) if path else {}
+    return config if isinstance(config, dict) else {}
+
+
+def agents(config: dict | None = None) -> list[dict]:
+    config = openclaw_config() if config is None else config
+    return config.get("agents", {}).get("list", [])
+
+
+def telegram_accounts(config: dict | None = None) -> list[dict]:
+    config = openclaw_config() if config is None else config
+    return config.get("channels", {}).get("telegram", {}).get("accounts", [])
+
+
+def bindings(config: dict | None = None) -> list[dict]:
+    config = openclaw_config() if config is None else config
+    return config.get("bindings", [])
+
+
+def bound_agent(config: dict | None, account_id: str, channel: str = "telegram") -> str | None:
+    """agentId routed from an account by a binding without topic/peer filters, or None."""
+    for binding in bindings(config):
+        match = binding.get("match", {})
+        if match.get("account") != account_id or match.get("channel", channel) != channel:
+            continue
+        if set(match) <= {"channel", "account"}:
+            return binding.get("agentId")
+    return None
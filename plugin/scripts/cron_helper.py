@@ -4,8 +4,13 @@ Simple cron job helper for OpenClaw (avoids complex tool call params).
 Usage:
   cron_helper.py add-cursor-daily --name NAME --hour H --message "用 Cursor 做：..." --telegram-chat CHAT_ID
   cron_helper.py add-session-weekly --name NAME --session SESSION_NAME --command CMD --telegram-chat CHAT_ID
-  cron_helper.py list
+  cron_helper.py list [--upcoming]
+  cron_helper.py next-run [--job-id ID]
   cron_helper.py remove --job-id ID
+
+New jobs get "nextRun" (ISO time, UTC) computed by cron_schedule.py;
+`next-run` recomputes it for existing jobs, `list --upcoming` sorts enabled
+jobs by their next fire time.
 """
 from __future__ import annotations
 
@@ -15,6 +20,9 @@ import os
 import sys
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from cron_schedule import job_next_run, upcoming
 
 CRON_FILE = Path.home() / ".openclaw" / "cron" / "jobs.json"
 
@@ -37,12 +45,20 @@ def generate_job_id() -> str:
     return f"job-{uuid.uuid4().hex[:12]}"
 
 
-def cmd_list() -> int:
+def next_run_iso(job: dict) -> str | None:
+    """The job's next fire time as stored in "nextRun", or None if it won't fire again."""
+    fire = job_next_run(job)
+    return fire.isoformat() if fire else None
+
+
+def cmd_list(upcoming_only: bool = False) -> int:
     data = load_cron_file()
     jobs = data.get("jobs", [])
     if not jobs:
         print("No cron jobs.")
         return 0
+    if upcoming_only:
+        return _list_upcoming(jobs)
     for j in jobs:
         enabled = "✓" if j.get("enabled", True) else "✗"
         name = j.get("name", "(no name)")
@@ -53,11 +69,54 @@ def cmd_list() -> int:
     return 0
 
 
+def _list_upcoming(jobs: list[dict]) -> int:
+    now = datetime.now(timezone.utc)
+    for fire, j, error in upcoming([j for j in jobs if j.get("enabled", True)], now):
+        name = j.get("name", "(no name)")
+        if error:
+            when = f"invalid schedule: {error}"
+        elif fire is None:
+            when = "no further runs"
+        else:
+            tz = j.get("schedule", {}).get("tz")
+            local = fire.astimezone(ZoneInfo(tz)) if tz else fire.astimezone()
+            when = f"{local.strftime('%Y-%m-%d %H:%M %Z')} (in {_format_delta(fire - now)})"
+        print(f"{when}  {j.get('jobId', '?')[:12]}... {name}")
+    return 0
+
+
+def _format_delta(delta: timedelta) -> str:
+    secs = int(delta.total_seconds())
+    if secs < 3600:
+        return f"{secs // 60}m"
+    if secs < 86400:
+        return f"{secs // 3600}h {secs % 3600 // 60}m"
+    return f"{secs // 86400}d {secs % 86400 // 3600}h"
+
+
+def cmd_next_run(args) -> int:
+    """Recompute and store nextRun for one job (or all), printing the results."""
+    data = load_cron_file()
+    jobs = [j for j in data.get("jobs", []) if args.job_id in (None, j.get("jobId"))]
+    if args.job_id and not jobs:
+        print(f"Job not found: {args.job_id}", file=sys.stderr)
+        return 1
+    failed = 0
+    for j in jobs:
+        try:
+            j["nextRun"] = next_run_iso(j)
+        except ValueError as exc:
+            print(f"{j.get('jobId', '?')}: invalid schedule: {exc}", file=sys.stderr)
+            failed += 1
+            continue
+        print(f"{j.get('jobId', '?')}: {j['nextRun'] or 'no further runs'}")
+    save_cron_file(data)
+    return 1 if failed else 0
+
+
 def cmd_add_cursor_daily(args) -> int:
     job_id = generate_job_id()
     now = datetime.now(timezone.utc)
-    # Calculate next run at the specified hour (Hong Kong time = UTC+8)
-    # Simplified: schedule at args.hour in UTC (user can adjust tz in job if needed)
     hour = args.hour or 9
     schedule = {
         "kind": "cron",
@@ -81,11 +140,13 @@ def cmd_add_cursor_daily(args) -> int:
         "enabled": True,
         "createdAt": now.isoformat()
     }
+    job["nextRun"] = next_run_iso(job)
     data = load_cron_file()
     data["jobs"].append(job)
     save_cron_file(data)
     print(f"Created cron job: {job_id} ({args.name})")
     print(f"Schedule: daily at {hour}:00 Asia/Hong_Kong")
+    print(f"Next run: {job['nextRun']}")
     print(f"Will announce to Telegram chat: {args.telegram_chat}")
     return 0
 
@@ -118,11 +179,13 @@ def cmd_add_session_weekly(args) -> int:
         "enabled": True,
         "createdAt": now.isoformat()
     }
+    job["nextRun"] = next_run_iso(job)
     data = load_cron_file()
     data["jobs"].append(job)
     save_cron_file(data)
     print(f"Created cron job: {job_id} ({args.name})")
     print(f"Schedule: weekly day {day} at {hour}:00 Asia/Hong_Kong")
+    print(f"Next run: {job['nextRun']}")
     print(f"Will announce to Telegram chat: {args.telegram_chat}")
     return 0
 
@@ -143,7 +206,11 @@ def main() -> int:
     ap = argparse.ArgumentParser(description="Simple cron helper for OpenClaw.")
     sub = ap.add_subparsers(dest="cmd", required=True)
 
-    sub.add_parser("list", help="List all cron jobs")
+    p_list = sub.add_parser("list", help="List all cron jobs")
+    p_list.add_argument("--upcoming", action="store_true", help="Only enabled jobs, sorted by next fire time")
+
+    p_next = sub.add_parser("next-run", help="Recompute and store nextRun (all jobs, or one)")
+    p_next.add_argument("--job-id", default=None, help="Only this job")
 
     p_daily = sub.add_parser("add-cursor-daily", help="Add daily Cursor job (announce to Telegram)")
     p_daily.add_argument("--name", required=True, help="Job name")
@@ -166,7 +233,9 @@ def main() -> int:
     args = ap.parse_args()
 
     if args.cmd == "list":
-        return cmd_list()
+        return cmd_list(args.upcoming)
+    if args.cmd == "next-run":
+        return cmd_next_run(args)
     if args.cmd == "add-cursor-daily":
         return cmd_add_cursor_daily(args)
     if args.cmd == "add-session-weekly":
@@ -10,27 +10,72 @@ complex tasks only.
 Usage:
   cursor_agent_direct.py --prompt "..." [--workspace /path] [--model auto] [--mode agent|plan|ask] [--timeout 600]
   cursor_agent_direct.py --help
+  cursor_agent_direct.py --prompt "..." --detach   # queue in background, prints job_id
+  cursor_agent_direct.py --prompt "..." --timeout auto   # timeout from run history (agent_ledger.py)
+  cursor_agent_direct.py --prompt "..." --progress   # stream-json: JSONL progress events, then the result
   cursor_agent_direct.py --check   # Check if Cursor CLI is available
 
 Modes: agent (default) = execute; plan = plan then execute; ask = read-only questions.
 
 Output (JSON):
   { "ok": true, "output": "...", "exit_code": 0, "duration_ms": 1234,
-    "files_created": [], "truncated": false }
+    "files_created": [], "files_modified": [], "files_deleted": [],
+    "change_detection": "git", "truncated": false,
+    "resources": { "cpu_user_s": 1.2, "cpu_sys_s": 0.3, "max_rss_kb": 210000,
+                   "tree_peak_rss_kb": 480000, "tree_peak_processes": 6,
+                   "ctx_switches_voluntary": 900, "ctx_switches_involuntary": 40,
+                   "output_bytes": 5120 } }
+
+With --output-format stream-json (implied by --progress) the CLI's JSON events
+are parsed as they arrive: the run ends at Cursor's result event, and a run
+that prints nothing for --stall-timeout seconds is stopped instead of waiting
+out the full timeout. The result then also has "telemetry" (tool calls by
+name, model, API time).
+
+Change detection uses `git status` when the workspace is a git repo (any file
+type, ignored files excluded) and a stat walk of the directory otherwise.
+
+Runs wait for a slot in the local job queue (agent_queue.py): at most
+--max-concurrent agents per host and one writing agent per workspace.
+Successful ask-mode results are cached (see response_cache.py) and reused for
+the same backend, model, prompt and workspace content; hits have "cached": true.
 """
 from __future__ import annotations
 
 import argparse
-import glob
 import json
 import os
+import re
 import shutil
-import subprocess
 import sys
 import time
 
-
-MAX_OUTPUT_BYTES = 100 * 1024  # 100 KB
+from agent_ledger import adaptive_timeout, print_warning, record_run, slow_run_watch, timeout_arg
+from agent_process import MAX_OUTPUT_BYTES, exit_on_sigterm, run_captured, truncate_middle
+from agent_queue import DEFAULT_MAX_CONCURRENT, job_path, max_concurrent, run_queued, submit_job
+from agent_workspace import diff_snapshot, take_snapshot, workspace_fingerprint
+from binary_discovery import probe_version
+from claw_core_client import SOCKET, run_in_session
+from output_filter import make_filter
+from response_cache import DEFAULT_TTL_S, ResponseCache
+
+ASK_CACHE_NAMESPACE = "agent-ask"
+DEFAULT_TIMEOUT_S = 900
+OUTPUT_FORMATS = ("text", "stream-json")
+DEFAULT_OUTPUT_FORMAT = os.environ.get("CLAW_CURSOR_OUTPUT_FORMAT", "text")
+# stream-json: stop a run that has printed nothing (no events, no stderr) for this long
+DEFAULT_STALL_TIMEOUT_S = 300.0
+# stream-json: abort after this many error events
+DEFAULT_MAX_ERRORS = 3
+PROGRESS_TEXT_CHARS = 200
+
+
+def stall_timeout() -> float:
+    """Default stall timeout (CLAW_CURSOR_STALL_TIMEOUT_S); a bad value falls back to DEFAULT_STALL_TIMEOUT_S."""
+    try:
+        return float(os.environ.get("CLAW_CURSOR_STALL_TIMEOUT_S", DEFAULT_STALL_TIMEOUT_S))
+    except ValueError:
+        return DEFAULT_STALL_TIMEOUT_S
 
 
 def find_cursor_binary() -> str | None:
@@ -56,43 +101,155 @@ def find_cursor_binary() -> str | None:
 
 
 def check_cursor() -> dict:
-    """Check if Cursor CLI is installed and return version info."""
+    """Check if Cursor CLI is installed and return version info (cached per binary mtime/inode)."""
     binary = find_cursor_binary()
     if not binary:
         return {"installed": False, "error": "cursor CLI not found on PATH"}
-    try:
-        result = subprocess.run(
-            [binary, "--version"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        version = result.stdout.strip() or result.stderr.strip()
-        return {"installed": True, "binary": binary, "version": version}
-    except Exception as exc:
-        return {"installed": True, "binary": binary, "version": "unknown", "warning": str(exc)}
-
-
-def detect_new_files(workspace: str, before_files: set[str]) -> list[str]:
-    """Detect files created during the Cursor run (code and common artifacts)."""
-    new_files: list[str] = []
-    exts = ("*.py", "*.rs", "*.ts", "*.tsx", "*.js", "*.jsx", "*.md", "*.txt", "*.json", "*.html", "*.css")
-    for ext in exts:
-        for path in glob.glob(os.path.join(workspace, "**", ext), recursive=True):
-            if path not in before_files and os.path.isfile(path):
-                new_files.append(path)
-    return sorted(set(new_files))
-
-
-def snapshot_files(workspace: str) -> set[str]:
-    """Snapshot of code/artifact files in the workspace for diffing after run."""
-    files: set[str] = set()
-    exts = ("*.py", "*.rs", "*.ts", "*.tsx", "*.js", "*.jsx", "*.md", "*.txt", "*.json", "*.html", "*.css")
-    for ext in exts:
-        for path in glob.glob(os.path.join(workspace, "**", ext), recursive=True):
-            if os.path.isfile(path):
-                files.add(path)
-    return files
+    info = probe_version(binary, timeout_s=10)
+    if "error" in info:
+        return {"installed": True, "binary": binary, "version": "unknown", "warning": info["error"]}
+    return {"installed": True, "binary": binary, "version": info["version"], "version_cached": info["cached"]}
+
+
+class CursorEventParser:
+    """
+    Incremental parser for `agent --print --output-format stream-json`.
+
+    Cursor outputs one JSON object per line:
+      {"type":"system","subtype":"init","model":"...","session_id":"..."}
+      {"type":"assistant","message":{"content":[{"type":"text","text":"..."}]}}
+      {"type":"tool_call","subtype":"started","call_id":"...","tool_call":{"shellToolCall":{"args":{...}}}}
+      {"type":"result","subtype":"success","is_error":false,"result":"...","duration_api_ms":...}
+
+    feed_line() is called for every stdout line as it streams in and returns
+    True when the run should be stopped: once the result event has arrived
+    (the CLI may linger after it in headless mode), or after max_errors error
+    events (0 disables that rule). on_event, if given, receives a compact
+    progress dict per parsed event.
+    """
+
+    def __init__(self, max_errors: int = DEFAULT_MAX_ERRORS, on_event=None):
+        self.max_errors = max_errors
+        self.on_event = on_event
+        self.messages: list[str] = []
+        self.errors: list[str] = []
+        self.final: str | None = None
+        self.is_error = False
+        self.finished = False
+        self.abort_reason: str | None = None
+        self.model: str | None = None
+        self.session_id: str | None = None
+        self.api_duration_ms: int | None = None
+        self.tools: dict[str, int] = {}
+        self.start_time = time.monotonic()
+        self.first_event_ms: int | None = None
+
+    def feed_line(self, line: str) -> bool:
+        line = line.strip()
+        if not line or not line.startswith("{"):
+            return False
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError:
+            return False
+        if not isinstance(obj, dict):
+            return False
+        if self.first_event_ms is None:
+            self.first_event_ms = int((time.monotonic() - self.start_time) * 1000)
+        obj_type = obj.get("type", "")
+        if obj_type == "system":
+            self.model = obj.get("model") or self.model
+            self.session_id = obj.get("session_id") or self.session_id
+        elif obj_type == "assistant":
+            text = self._message_text(obj)
+            if text:
+                self.messages.append(text)
+        elif obj_type == "tool_call" and obj.get("subtype") == "started":
+            name = self._tool_name(obj)
+            self.tools[name] = self.tools.get(name, 0) + 1
+        elif obj_type == "result":
+            self.finished = True
+            self.is_error = bool(obj.get("is_error")) or obj.get("subtype") not in (None, "success")
+            if isinstance(obj.get("result"), str):
+                self.final = obj["result"].strip()
+            if isinstance(obj.get("duration_api_ms"), int):
+                self.api_duration_ms = obj["duration_api_ms"]
+            if self.is_error:
+                self.errors.append(f"[error] {self.final or obj.get('subtype') or 'result error'}")
+        elif obj_type == "error":
+            err = obj.get("error", obj.get("message", ""))
+            msg = (err.get("message", "") if isinstance(err, dict) else str(err)).strip()
+            if msg:
+                self.errors.append(f"[error] {msg}")
+            if self.abort_reason is None and self.max_errors and len(self.errors) >= self.max_errors:
+                self.abort_reason = f"{len(self.errors)} error events"
+
+        if self.on_event:
+            self.on_event(self._progress(obj))
+        return self.finished or self.abort_reason is not None
+
+    @staticmethod
+    def _message_text(obj: dict) -> str:
+        message = obj.get("message")
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            return content.strip()
+        if not isinstance(content, list):
+            return ""
+        return "".join(c.get("text", "") for c in content
+                       if isinstance(c, dict) and c.get("type") == "text").strip()
+
+    @staticmethod
+    def _tool_call(obj: dict) -> tuple[str, dict]:
+        """("shell", args) from {"tool_call": {"shellToolCall": {"args": {...}}}}."""
+        call = obj.get("tool_call")
+        if not isinstance(call, dict) or not call:
+            return "unknown", {}
+        key, body = next(iter(call.items()))
+        name = key[:-len("ToolCall")] if key.endswith("ToolCall") else key
+        args = body.get("args") if isinstance(body, dict) else None
+        return name or "unknown", args if isinstance(args, dict) else {}
+
+    def _tool_name(self, obj: dict) -> str:
+        return self._tool_call(obj)[0]
+
+    def _progress(self, obj: dict) -> dict:
+        event = {
+            "type": "progress",
+            "event": obj.get("type", ""),
+            "elapsed_ms": int((time.monotonic() - self.start_time) * 1000),
+        }
+        if obj.get("subtype"):
+            event["subtype"] = obj["subtype"]
+        if obj.get("type") == "assistant":
+            event["text"] = self._message_text(obj)[:PROGRESS_TEXT_CHARS]
+        elif obj.get("type") == "tool_call":
+            name, args = self._tool_call(obj)
+            event["tool"] = name
+            detail = args.get("command") or args.get("path") or args.get("pattern")
+            if detail:
+                event["detail"] = str(detail)[:PROGRESS_TEXT_CHARS]
+        if self.abort_reason:
+            event["abort"] = self.abort_reason
+        return event
+
+    def text(self) -> str:
+        """The final result text (or the assistant messages) followed by any errors."""
+        parts = [self.final] if self.final else list(self.messages)
+        parts += [e for e in self.errors if e[len("[error] "):] != self.final]
+        return "\n\n".join(parts)
+
+    def telemetry(self, timing: bool = True) -> dict:
+        out = {
+            "tool_calls": sum(self.tools.values()),
+            "tools": dict(sorted(self.tools.items())),
+            "messages": len(self.messages),
+            "model": self.model,
+            "api_duration_ms": self.api_duration_ms,
+        }
+        if timing:
+            out["first_event_ms"] = self.first_event_ms
+        return out
 
 
 def run_cursor_agent(
@@ -101,8 +258,40 @@ def run_cursor_agent(
     model: str = "auto",
     mode: str = "agent",
     timeout_s: int = 600,
+    via_claw_core: bool = False,
+    socket_path: str | None = None,
+    cancel_event=None,
+    drop_patterns: list[str] | None = None,
+    slow_after_s: float | None = None,
+    on_warning=None,
+    output_format: str = "text",
+    on_event=None,
+    stall_timeout_s: float | None = None,
+    max_errors: int = DEFAULT_MAX_ERRORS,
 ) -> dict:
-    """Run cursor agent and return structured result. mode: agent (execute), plan (plan first), ask (read-only)."""
+    """
+    Run cursor agent and return structured result. mode: agent (execute), plan (plan first), ask (read-only).
+
+    output_format="stream-json" asks the CLI for JSON events and parses them as
+    they stream (see CursorEventParser): on_event receives progress dicts, the
+    run ends at the result event, and it is stopped early after max_errors
+    error events or when nothing was printed for stall_timeout_s (0 disables,
+    None means stall_timeout()). "text" (the default) keeps the plain --print
+    output.
+
+    via_claw_core runs the CLI in the workspace's pooled claw_core session
+    instead of a local subprocess, so the runtime accounts for it.
+
+    cancel_event (threading.Event), when set by another thread, kills the
+    local run's process group (used by agent_hedge.py; ignored via claw_core).
+
+    Both streams pass through output_filter (ANSI codes, \r progress redraws,
+    repeated lines, and lines matching drop_patterns are removed) before the
+    100 KB cap.
+
+    slow_after_s (the p95 from --timeout auto) calls on_warning with a
+    "slow_run" event once the run takes longer; the result gets "slow_run": true.
+    """
     binary = find_cursor_binary()
     if not binary:
         return {
@@ -123,59 +312,41 @@ def run_cursor_agent(
     if workspace:
         cmd.extend(["--workspace", workspace])
 
+    streaming = output_format == "stream-json"
+    if stall_timeout_s is None:
+        stall_timeout_s = stall_timeout()
+    parser = None
+    if streaming:
+        cmd.extend(["--output-format", "stream-json"])
+        parser = CursorEventParser(max_errors=max_errors, on_event=on_event)
+
     effective_workspace = workspace or os.getcwd()
 
-    # Snapshot files before run to detect new ones
-    before_files = snapshot_files(effective_workspace) if os.path.isdir(effective_workspace) else set()
+    # Snapshot the workspace before the run to detect created/modified/deleted files
+    before_snapshot = take_snapshot(effective_workspace)
 
+    # JSON events are parsed raw; only plain-text stdout goes through the line filter
+    filters = {
+        "stdout_filter": None if streaming else make_filter(drop_patterns or ()),
+        "stderr_filter": make_filter(drop_patterns or ()),
+    }
     start_time = time.monotonic()
     try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=timeout_s,
-            cwd=workspace,
-        )
-        duration_ms = int((time.monotonic() - start_time) * 1000)
-
-        output = result.stdout or ""
-        stderr = result.stderr or ""
-
-        # Combine stdout and stderr if stderr has content
-        if stderr and stderr.strip():
-            output = output + "\n--- stderr ---\n" + stderr
-
-        truncated = False
-        if len(output) > MAX_OUTPUT_BYTES:
-            output = output[:MAX_OUTPUT_BYTES] + f"\n\n... [truncated at {MAX_OUTPUT_BYTES // 1024}KB]"
-            truncated = True
-
-        new_files = detect_new_files(effective_workspace, before_files) if os.path.isdir(effective_workspace) else []
-
-        return {
-            "ok": result.returncode == 0,
-            "output": output,
-            "exit_code": result.returncode,
-            "duration_ms": duration_ms,
-            "files_created": new_files,
-            "truncated": truncated,
-        }
-
-    except subprocess.TimeoutExpired:
-        duration_ms = int((time.monotonic() - start_time) * 1000)
-        return {
-            "ok": False,
-            "error": f"cursor agent timed out after {timeout_s}s",
-            "output": "",
-            "exit_code": -1,
-            "duration_ms": duration_ms,
-            "files_created": [],
-            "truncated": False,
-        }
+        with slow_run_watch(slow_after_s, on_warning) as watch:
+            if via_claw_core:
+                result = run_in_session(cmd, effective_workspace, timeout_s, socket_path, MAX_OUTPUT_BYTES,
+                                        **filters)
+                if parser:
+                    for line in result["stdout"].splitlines():
+                        parser.feed_line(line)
+            else:
+                result = run_captured(cmd, timeout_s=timeout_s, cwd=workspace, limit_bytes=MAX_OUTPUT_BYTES,
+                                      on_stdout_line=parser.feed_line if parser else None,
+                                      cancel_event=cancel_event,
+                                      idle_timeout_s=stall_timeout_s if streaming else None, **filters)
     except Exception as exc:
         duration_ms = int((time.monotonic() - start_time) * 1000)
-        return {
+        response = {
             "ok": False,
             "error": str(exc),
             "output": "",
@@ -184,6 +355,73 @@ def run_cursor_agent(
             "files_created": [],
             "truncated": False,
         }
+        record_run("cursor", mode, model, effective_workspace, prompt, response)
+        return response
+
+    output = result["stdout"]
+    stderr = result["stderr"]
+    returncode = result["returncode"]
+    aborted = result["aborted"]
+    if parser:
+        output = parser.text() or output
+        if parser.finished and not parser.abort_reason:
+            # Stopped at the result event: a normal finish, whatever signal ended the process
+            aborted = False
+            returncode = 1 if parser.is_error else 0
+
+    # Combine stdout and stderr if stderr has content
+    if stderr and stderr.strip():
+        output = output + "\n--- stderr ---\n" + stderr
+
+    output, truncated = truncate_middle(output, MAX_OUTPUT_BYTES)
+    truncated = truncated or result["truncated"]
+
+    changes = diff_snapshot(before_snapshot)
+
+    stopped = result["timed_out"] or result["cancelled"] or result["stalled"] or aborted
+    response = {
+        "ok": returncode == 0 and not stopped,
+        "output": output,
+        "exit_code": -1 if stopped else returncode,
+        "duration_ms": result["duration_ms"],
+        "files_created": changes["created"],
+        "files_modified": changes["modified"],
+        "files_deleted": changes["deleted"],
+        "change_detection": changes["method"],
+        "output_bytes": result["stdout_bytes"] + result["stderr_bytes"],
+        "truncated": truncated,
+        "resources": result["resources"],
+        "filtered": result["filtered"],
+    }
+    if result.get("killed_processes"):
+        response["killed_processes"] = result["killed_processes"]
+        response["force_killed"] = result["force_killed"]
+    if parser:
+        response["telemetry"] = parser.telemetry(timing=not via_claw_core)
+        if parser.session_id:
+            response["cursor_session_id"] = parser.session_id
+    if watch.get("slow_run"):
+        response["slow_run"] = True
+    if via_claw_core:
+        response["runner"] = "claw_core"
+        response["session_id"] = result["session_id"]
+    if result["timed_out"]:
+        response["error"] = f"cursor agent timed out after {timeout_s}s"
+    elif result["stalled"]:
+        response["error"] = f"cursor agent stalled: no output for {stall_timeout_s:g}s"
+        response["stalled"] = True
+    elif aborted:
+        response["error"] = f"cursor agent aborted early: {parser.abort_reason}"
+        response["aborted"] = True
+    elif result["cancelled"]:
+        response["error"] = "cursor agent cancelled"
+        response["cancelled"] = True
+    record_run("cursor", mode, model, effective_workspace, prompt, response)
+    return response
+
+
+def _print_event(event: dict) -> None:
+    print(json.dumps(event), flush=True)
 
 
 def main() -> int:
@@ -195,10 +433,39 @@ def main() -> int:
     ap.add_argument("--model", default="auto", help="Model to use (default: auto)")
     ap.add_argument("--mode", default="agent", choices=["agent", "plan", "ask"],
                     help="Cursor mode: agent (execute), plan (plan then execute), ask (read-only)")
-    ap.add_argument("--timeout", type=int, default=900, help="Timeout in seconds (default: 900)")
+    ap.add_argument("--timeout", type=timeout_arg, default=DEFAULT_TIMEOUT_S,
+                    help=f"Timeout in seconds, or 'auto' to derive it from past runs (default: {DEFAULT_TIMEOUT_S})")
+    ap.add_argument("--output-format", default=DEFAULT_OUTPUT_FORMAT, choices=OUTPUT_FORMATS,
+                    help=f"Cursor output format (env: CLAW_CURSOR_OUTPUT_FORMAT, default: {DEFAULT_OUTPUT_FORMAT})")
+    ap.add_argument("--progress", action="store_true",
+                    help="Stream progress events as JSONL on stdout (implies --output-format stream-json); "
+                         "the final result is the last line (type=result)")
+    ap.add_argument("--stall-timeout", type=float, default=stall_timeout(),
+                    help=f"stream-json: stop the run after N seconds without output; 0 = never "
+                         f"(env: CLAW_CURSOR_STALL_TIMEOUT_S, default: {DEFAULT_STALL_TIMEOUT_S:g})")
+    ap.add_argument("--max-errors", type=int, default=DEFAULT_MAX_ERRORS,
+                    help=f"stream-json: abort after this many error events; 0 = never (default: {DEFAULT_MAX_ERRORS})")
     ap.add_argument("--check", action="store_true", help="Check if Cursor CLI is available")
     ap.add_argument("--json", action="store_true", default=True, help="Output as JSON (default)")
+    ap.add_argument("--detach", action="store_true",
+                    help="Queue the run in the background and print its job id (see agent_queue.py status/wait/cancel)")
+    ap.add_argument("--max-concurrent", type=int, default=max_concurrent(),
+                    help=f"Host-wide limit on concurrent agent runs (env: CLAW_AGENT_MAX_CONCURRENT, "
+                         f"default: {DEFAULT_MAX_CONCURRENT})")
+    ap.add_argument("--queue-timeout", type=float, default=None,
+                    help="Give up if no agent slot is free after N seconds (default: wait)")
+    ap.add_argument("--no-queue", action="store_true", help="Run immediately, bypassing the job queue")
+    ap.add_argument("--via-claw-core", action="store_true",
+                    default=os.environ.get("CLAW_AGENT_VIA_CLAW_CORE") == "1",
+                    help="Run the agent inside a pooled claw_core session (env: CLAW_AGENT_VIA_CLAW_CORE=1)")
+    ap.add_argument("--socket", default=SOCKET, help="claw_core socket path (with --via-claw-core)")
+    ap.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL_S,
+                    help=f"Seconds to reuse identical ask-mode answers (default: {DEFAULT_TTL_S})")
+    ap.add_argument("--no-cache", action="store_true", help="Do not read or write the ask-mode result cache")
+    ap.add_argument("--drop-pattern", action="append", default=[], metavar="REGEX",
+                    help="Drop output lines matching REGEX before the output cap (repeatable)")
     args = ap.parse_args()
+    exit_on_sigterm()
 
     if args.check:
         result = check_cursor()
@@ -208,16 +475,76 @@ def main() -> int:
     if not args.prompt:
         ap.error("--prompt is required (unless using --check)")
         return 1
-
-    result = run_cursor_agent(
-        prompt=args.prompt,
-        workspace=args.workspace,
-        model=args.model,
-        mode=args.mode,
-        timeout_s=args.timeout,
-    )
-
-    print(json.dumps(result, indent=2))
+    for pattern in args.drop_pattern:
+        try:
+            re.compile(pattern)
+        except re.error as exc:
+            ap.error(f"invalid --drop-pattern {pattern!r}: {exc}")
+
+    params = {
+        "prompt": args.prompt,
+        "workspace": args.workspace,
+        "model": args.model,
+        "mode": args.mode,
+        "timeout_s": args.timeout,
+        "via_claw_core": args.via_claw_core,
+        "socket_path": args.socket,
+        "drop_patterns": args.drop_pattern,
+        "output_format": "stream-json" if args.progress else args.output_format,
+        "stall_timeout_s": args.stall_timeout,
+        "max_errors": args.max_errors,
+    }
+    auto = None
+    if args.timeout == "auto":
+        auto = adaptive_timeout("cursor", args.mode, args.workspace or os.getcwd(), DEFAULT_TIMEOUT_S)
+        params["timeout_s"] = auto["timeout_s"]
+        params["slow_after_s"] = auto["slow_after_s"]
+
+    if args.detach:
+        job = submit_job("cursor", params, limit=args.max_concurrent)
+        print(json.dumps({"ok": True, "job_id": job["job_id"], "status": job["status"],
+                          "spool": str(job_path(job["job_id"]))}, indent=2))
+        return 0
+
+    # Ask mode is read-only: identical questions about an unchanged workspace
+    # can be answered from the cache (keyed by the workspace content fingerprint).
+    cache = cache_key = None
+    if args.mode == "ask" and not args.no_cache:
+        cache = ResponseCache(ASK_CACHE_NAMESPACE, ttl_s=args.cache_ttl)
+        cache_key = cache.key("cursor", args.model, args.prompt,
+                              workspace_fingerprint(args.workspace or os.getcwd()))
+        hit = cache.get(cache_key)
+        if hit:
+            result = dict(hit["value"], cached=True, cache_age_s=hit["age_s"])
+            record_run("cursor", args.mode, args.model, args.workspace or os.getcwd(), args.prompt, result)
+            if args.progress:
+                _print_event({"type": "result", **result})
+            else:
+                print(json.dumps(result, indent=2))
+            return 0 if result.get("ok") else 1
+
+    if args.progress:
+        params["on_event"] = _print_event
+    if auto is not None:
+        params["on_warning"] = _print_event if args.progress else print_warning
+    if args.no_queue:
+        result = run_cursor_agent(**params)
+    else:
+        result = run_queued(run_cursor_agent, params, limit=args.max_concurrent, wait_timeout=args.queue_timeout)
+        if result.get("busy"):
+            record_run("cursor", args.mode, args.model, args.workspace or os.getcwd(), args.prompt, result)
+
+    if cache is not None:
+        if result.get("ok"):
+            cache.put(cache_key, result)
+        result["cached"] = False
+
+    if auto is not None:
+        result["adaptive_timeout"] = auto
+    if args.progress:
+        _print_event({"type": "result", **result})
+    else:
+        print(json.dumps(result, indent=2))
     return 0 if result.get("ok") else 1
 
 
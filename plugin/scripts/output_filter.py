@@ -0,0 +1,207 @@
+"""
+Streaming line filters applied to agent output before it is capped.
+
+The output budget (100 KB, head + tail) used to be spent on whatever the CLI
+printed: colour codes, spinner frames redrawn with carriage returns, the same
+warning repeated hundreds of times, MCP auth noise. A LineFilter sits between
+the pipe and the BoundedBuffer and rewrites the stream line by line:
+
+  strip_ansi        remove ANSI/VT escape sequences
+  collapse_cr       keep only the last redraw of a "\\r" progress line
+  drop_matching()   drop lines matching any of a set of regexes (compiled once)
+  fold duplicates   replace runs of identical lines with one line plus a
+                    "[previous line repeated N more times]" marker
+
+Stages are plain callables (bytes line -> bytes line, or None to drop) and can
+be combined freely; duplicate folding runs last because it needs state.
+
+DeltaFilter does the ANSI and "\r" cleanup without waiting for whole lines,
+for output forwarded to a user as it arrives (picoclaw_client.py --stream).
+"""
+from __future__ import annotations
+
+import codecs
+import re
+
+MAX_LINE_BYTES = 1024 * 1024  # a line longer than this is flushed as-is
+
+_ANSI_RE = re.compile(rb"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])")
+
+
+def strip_ansi(line: bytes) -> bytes:
+    return _ANSI_RE.sub(b"", line) if b"\x1b" in line else line
+
+
+def collapse_cr(line: bytes) -> bytes:
+    if b"\r" not in line:
+        return line
+    line = line.rstrip(b"\r")  # CRLF endings
+    return line[line.rfind(b"\r") + 1:]
+
+
+def drop_matching(patterns):
+    """Stage dropping lines that match any of the (str) regexes; raises re.error if one is invalid."""
+    regex = re.compile(b"|".join(b"(?:" + p.encode("utf-8") + b")" for p in patterns))
+
+    def stage(line: bytes) -> bytes | None:
+        return None if regex.search(line) else line
+
+    return stage
+
+
+class LineFilter:
+    """Stateful stream filter: feed() raw chunks, get back filtered bytes (whole lines only)."""
+
+    def __init__(self, stages=(strip_ansi, collapse_cr), fold_duplicates: bool = True,
+                 max_line_bytes: int = MAX_LINE_BYTES):
+        self.stages = list(stages)
+        self.fold_duplicates = fold_duplicates
+        self.max_line_bytes = max_line_bytes
+        self.pending = bytearray()
+        self.last: bytes | None = None
+        self.repeats = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.dropped_lines = 0
+        self.folded_lines = 0
+
+    def feed(self, data: bytes) -> bytes:
+        self.bytes_in += len(data)
+        self.pending += data
+        if b"\n" not in data and len(self.pending) < self.max_line_bytes:
+            return b""
+        lines = self.pending.split(b"\n")
+        self.pending = bytearray(lines.pop())
+        if len(self.pending) >= self.max_line_bytes:
+            lines.append(bytes(self.pending))
+            self.pending = bytearray()
+        out: list[bytes] = []
+        for line in lines:
+            self._line(line, out)
+        return self._emit(out)
+
+    def close(self) -> bytes:
+        """Flush the last partial line and any pending repeat marker."""
+        out: list[bytes] = []
+        if self.pending:
+            self._line(bytes(self.pending), out)
+            self.pending = bytearray()
+        self._flush_repeats(out)
+        return self._emit(out)
+
+    def apply(self, text: str) -> str:
+        """Filter a complete text in one go (for output that did not stream through us)."""
+        data = self.feed(text.encode("utf-8", errors="replace")) + self.close()
+        return data.decode("utf-8", errors="replace")
+
+    def stats(self) -> dict:
+        return {
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "dropped_lines": self.dropped_lines,
+            "folded_lines": self.folded_lines,
+        }
+
+    def _line(self, line: bytes, out: list[bytes]) -> None:
+        for stage in self.stages:
+            line = stage(line)
+            if line is None:
+                self.dropped_lines += 1
+                return
+        if self.fold_duplicates and line == self.last and line.strip():
+            self.repeats += 1
+            return
+        self._flush_repeats(out)
+        self.last = line
+        out.append(line + b"\n")
+
+    def _flush_repeats(self, out: list[bytes]) -> None:
+        if self.repeats:
+            out.append(f"... [previous line repeated {self.repeats} more times]\n".encode())
+            self.folded_lines += self.repeats
+            self.repeats = 0
+
+    def _emit(self, out: list[bytes]) -> bytes:
+        data = b"".join(out)
+        self.bytes_out += len(data)
+        return data
+
+
+class DeltaFilter:
+    """
+    Incremental strip_ansi + collapse_cr over raw chunks, partial lines included.
+
+    feed() returns the text that can be shown now. An escape sequence or UTF-8
+    character split across chunks is held until it completes. Once a line is
+    redrawn with "\r", the rest of it is held until the line ends and only the
+    last redraw is released; text before the first "\r" of a line that came
+    in an earlier chunk has already been returned and stays.
+    """
+
+    MAX_HELD_ESCAPE = 256  # an unterminated escape longer than this is not held
+
+    def __init__(self):
+        self.escape = b""  # start of an escape sequence cut off by the chunk boundary
+        self.redraw = b""  # the current line from its first "\r" on
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, data: bytes) -> str:
+        data = self.escape + data
+        self.escape = b""
+        esc = self._cut_escape(data)
+        if esc >= 0:
+            data, self.escape = data[:esc], data[esc:]
+        *lines, partial = strip_ansi(data).split(b"\n")
+        out = bytearray()
+        for line in lines:
+            out += (collapse_cr(self.redraw + line) if self.redraw or b"\r" in line else line) + b"\n"
+            self.redraw = b""
+        if self.redraw:
+            self.redraw += partial
+        elif b"\r" in partial:
+            cr = partial.find(b"\r")
+            out += partial[:cr]
+            self.redraw = partial[cr:]
+        else:
+            out += partial
+        if self.redraw:
+            # Only the last redraw (and a trailing "\r" that may start a CRLF) can still matter
+            self.redraw = self.redraw[self.redraw.rstrip(b"\r").rfind(b"\r"):]
+        return self.decoder.decode(bytes(out))
+
+    def _cut_escape(self, data: bytes) -> int:
+        """Offset of an escape sequence near the end of data that is not complete yet, or -1."""
+        pos = data.find(b"\x1b", max(0, len(data) - self.MAX_HELD_ESCAPE))
+        while pos >= 0:
+            match = _ANSI_RE.match(data, pos)
+            # "ESC ]" alone also matches as a two-byte escape: an OSC still waiting for its terminator
+            if not match or (data[pos + 1:pos + 2] == b"]" and match.end() == pos + 2):
+                return pos
+            pos = data.find(b"\x1b", match.end())
+        return -1
+
+    def close(self) -> str:
+        """Release the held redraw of an unterminated last line; an incomplete escape is dropped."""
+        tail = collapse_cr(self.redraw) if self.redraw else b""
+        self.escape = self.redraw = b""
+        return self.decoder.decode(tail, final=True)
+
+
+def make_filter(drop_patterns=()) -> LineFilter:
+    """The standard filter: ANSI stripping, CR collapse, drop rules, duplicate folding."""
+    stages = [strip_ansi, collapse_cr]
+    if drop_patterns:
+        stages.append(drop_matching(drop_patterns))
+    return LineFilter(stages)
+
+
+def merge_stats(*filters) -> dict | None:
+    """Combined stats() of the given filters (None entries skipped), or None if there are none."""
+    filters = [f for f in filters if f is not None]
+    if not filters:
+        return None
+    total = {"bytes_in": 0, "bytes_out": 0, "dropped_lines": 0, "folded_lines": 0}
+    for f in filters:
+        for key, value in f.stats().items():
+            total[key] += value
+    return total
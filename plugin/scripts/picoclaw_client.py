@@ -7,14 +7,21 @@ an ultra-lightweight AI assistant. Designed to be called by the claw-core plugin
 as an agent tool backend.
 
 Usage:
-  picoclaw_client.py chat --message "..." [--json]
+  picoclaw_client.py chat --message "..." [--timeout 120|auto] [--json]
+  picoclaw_client.py chat --batch questions.jsonl [--workers 4] > answers.jsonl
+  picoclaw_client.py chat --message "..." --cache [--cache-ttl 3600]   # reuse identical answers
+  picoclaw_client.py chat --message "..." --stream   # JSONL: {"type":"delta",...} per chunk, then {"type":"done",...}
+  picoclaw_client.py chat --message "..." --max-concurrent 4 --max-queue 8   # host-wide cap, see cmd_chat
+  picoclaw_client.py stats [--window 1h --window 24h] [--slo-ms 30000] [--slo-target 0.95]
   picoclaw_client.py status [--json]
   picoclaw_client.py config [--json]
   picoclaw_client.py config-set --key model --value deepseek-chat [--json]
+  picoclaw_client.py config-set --set model=deepseek-chat --set providers.openrouter.api_base=https://...
   picoclaw_client.py --help
 
 Subcommands:
-  chat        Send a message to PicoClaw agent
+  chat        Send a message to PicoClaw agent (or many: --batch, see cmd_chat_batch)
+  stats       Chat latency percentiles, timeout/error rates and SLO per time window
   status      Check if PicoClaw is installed and show info
   config      Show current PicoClaw configuration
   config-set  Update a PicoClaw configuration field
@@ -25,18 +32,41 @@ import argparse
 import json
 import os
 import shutil
-import subprocess
 import sys
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
-# Standard PicoClaw config locations
-PICOCLAW_CONFIG_PATHS = [
-    Path.home() / ".picoclaw" / "workspace" / "config.json",
-    Path.home() / ".picoclaw" / "config.json",
-]
-
-MAX_OUTPUT_BYTES = 100 * 1024  # 100 KB
+from agent_ledger import adaptive_timeout, parse_age, print_warning, record_run, slow_run_watch, stats, timeout_arg
+from agent_process import MAX_OUTPUT_BYTES, exit_on_sigterm, run_captured, truncate_middle
+from agent_queue import job_slot, queue_depth
+from binary_discovery import probe_version
+from config_store import PICOCLAW_CONFIG_PATHS, load_json, update_json
+from output_filter import DeltaFilter, LineFilter, collapse_cr, make_filter, strip_ansi
+from response_cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL_S, ResponseCache
+
+DEFAULT_CHAT_TIMEOUT_S = 120
+CHAT_CACHE_NAMESPACE = "picoclaw-chat"
+# chat --batch: concurrent `picoclaw agent` processes
+DEFAULT_BATCH_WORKERS = 4
+# Host-wide cap on concurrent chats (agent_queue.py slots, separate "picoclaw" pool): group
+# broadcasts can trigger many chats at once; beyond MAX_QUEUE waiters chats are rejected as busy.
+CHAT_SLOT_POOL = "picoclaw"
+DEFAULT_MAX_CONCURRENT = 4
+DEFAULT_MAX_QUEUE = 8
+DEFAULT_QUEUE_TIMEOUT_S = 60.0
+# stats: sliding windows and latency objective (successful chat within SLO_MS for SLO_TARGET of chats)
+DEFAULT_STATS_WINDOWS = ["1h", "24h", "7d"]
+DEFAULT_SLO_MS = 30000
+DEFAULT_SLO_TARGET = 0.95
+
+
+def _env_number(name: str, default: int | float) -> int | float:
+    """Numeric setting from the environment (read when the CLI is parsed); a bad value falls back to default."""
+    try:
+        return type(default)(os.environ.get(name, default))
+    except ValueError:
+        return default
 
 
 def find_picoclaw_binary() -> str | None:
@@ -67,18 +97,16 @@ def find_config_path() -> Path | None:
 
 
 def read_config() -> dict:
-    """Read PicoClaw configuration."""
+    """Read PicoClaw configuration (parsed once per file change, see config_store)."""
     config_path = find_config_path()
     if not config_path:
         return {"error": "config file not found", "searched": [str(p) for p in PICOCLAW_CONFIG_PATHS]}
     try:
-        with open(config_path, "r") as f:
-            config = json.load(f)
-        # Redact API key for display
+        config = load_json(config_path)
+        # Redact API key for display (on a copy: the parsed document is shared)
         safe_config = dict(config)
-        if "api_key" in safe_config and safe_config["api_key"]:
-            key = safe_config["api_key"]
-            safe_config["api_key"] = key[:8] + "..." + key[-4:] if len(key) > 12 else "***"
+        if safe_config.get("api_key"):
+            safe_config["api_key"] = _redact("api_key", safe_config["api_key"])
         safe_config["_config_path"] = str(config_path)
         return safe_config
     except json.JSONDecodeError as exc:
@@ -87,41 +115,50 @@ def read_config() -> dict:
         return {"error": str(exc), "path": str(config_path)}
 
 
-def write_config_field(key: str, value: str) -> dict:
-    """Update a single field in PicoClaw config."""
-    config_path = find_config_path()
-    if not config_path:
-        # Create default config at first standard path
-        config_path = PICOCLAW_CONFIG_PATHS[0]
-        config_path.parent.mkdir(parents=True, exist_ok=True)
-        config = {}
-    else:
-        try:
-            with open(config_path, "r") as f:
-                config = json.load(f)
-        except Exception:
-            config = {}
+def _redact(key: str, value):
+    """Mask secret string values (api_key, *_key, *_token, *_secret) in output we print."""
+    name = key.rsplit(".", 1)[-1].lower()
+    secret = name in ("key", "token", "secret", "apikey") or name.endswith(("_key", "_token", "_secret", "apikey"))
+    if not secret or not isinstance(value, str) or not value:
+        return value
+    return value[:8] + "..." + value[-4:] if len(value) > 12 else "***"
 
-    old_value = config.get(key)
-    # Try to parse value as JSON for non-string types
+
+def _parse_value(value: str):
+    """JSON for non-string types (numbers, booleans, objects), else the raw string."""
     try:
-        parsed = json.loads(value)
-        config[key] = parsed
+        return json.loads(value)
     except (json.JSONDecodeError, TypeError):
-        config[key] = value
+        return value
+
 
+def write_config_fields(pairs: list[tuple[str, str]]) -> dict:
+    """
+    Set several PicoClaw config fields at once; keys may be dotted ("a.b.c").
+
+    All pairs are applied in one locked read-modify-write and the file is
+    replaced atomically (see config_store.update_json). Returns {"ok", "path",
+    "changed": [{"key", "old", "new"}], "unchanged": [...]} with secrets masked.
+    """
+    config_path = find_config_path() or PICOCLAW_CONFIG_PATHS[0]
     try:
-        with open(config_path, "w") as f:
-            json.dump(config, f, indent=2)
-        return {
-            "ok": True,
-            "path": str(config_path),
-            "key": key,
-            "old_value": old_value,
-            "new_value": config[key],
-        }
-    except Exception as exc:
-        return {"ok": False, "error": str(exc)}
+        diff = update_json(config_path, [(key, _parse_value(value)) for key, value in pairs])
+    except (OSError, ValueError) as exc:
+        return {"ok": False, "error": str(exc), "path": str(config_path)}
+    changed = [{"key": c["key"], "old": _redact(c["key"], c["old"]), "new": _redact(c["key"], c["new"])}
+               for c in diff["changed"]]
+    return {"ok": True, "path": str(config_path), "created": diff["created"],
+            "changed": changed, "unchanged": diff["unchanged"]}
+
+
+def write_config_field(key: str, value: str) -> dict:
+    """Update a single field in PicoClaw config (also reports key/old_value/new_value)."""
+    result = write_config_fields([(key, value)])
+    if result.get("ok"):
+        new_value = _parse_value(value)
+        old_value = result["changed"][0]["old"] if result["changed"] else _redact(key, new_value)
+        result.update(key=key, old_value=old_value, new_value=_redact(key, new_value))
+    return result
 
 
 def cmd_status(as_json: bool = True) -> dict:
@@ -139,18 +176,8 @@ def cmd_status(as_json: bool = True) -> dict:
         print(f"  Install: {result['install_hint']}")
         return result
 
-    # Get version
-    version = "unknown"
-    try:
-        proc = subprocess.run(
-            [binary, "--version"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        version = proc.stdout.strip() or proc.stderr.strip() or "unknown"
-    except Exception:
-        pass
+    # Get version (cached until the binary changes on disk)
+    version = probe_version(binary, timeout_s=5).get("version", "unknown")
 
     # Read config for model/provider info
     config = read_config()
@@ -178,8 +205,88 @@ def cmd_status(as_json: bool = True) -> dict:
     return result
 
 
-def cmd_chat(message: str, timeout_s: int = 120) -> dict:
-    """Send a message to PicoClaw agent."""
+def chat_cache_key(cache: ResponseCache, message: str) -> str:
+    """
+    Cache key for a chat: the normalized message (whitespace collapsed,
+    casefolded) plus model and base_url from the PicoClaw config. The config
+    file's path, mtime and size are part of the key, so editing the config
+    invalidates every cached answer (old entries age out via TTL/LRU).
+    """
+    config_path = find_config_path()
+    config: dict = {}
+    stamp = None
+    if config_path:
+        config = read_config()
+        try:
+            st = config_path.stat()
+            stamp = [str(config_path), st.st_mtime_ns, st.st_size]
+        except OSError:
+            pass
+    normalized = " ".join(message.split()).casefold()
+    return cache.key("picoclaw", config.get("model"), config.get("base_url"), stamp, normalized)
+
+
+def cmd_chat(message: str, timeout_s: int = DEFAULT_CHAT_TIMEOUT_S, slow_after_s: float | None = None,
+             on_warning=None, cache: ResponseCache | None = None, on_delta=None,
+             max_concurrent: int = DEFAULT_MAX_CONCURRENT, max_queue: int | None = DEFAULT_MAX_QUEUE,
+             queue_timeout_s: float | None = DEFAULT_QUEUE_TIMEOUT_S) -> dict:
+    """
+    Send a message to PicoClaw agent (slow_after_s: see agent_ledger.slow_run_watch).
+
+    At most max_concurrent chats run at once on this host (0 = no limit);
+    others wait in FIFO order. If max_queue chats are already waiting, or no
+    slot frees up within queue_timeout_s, the chat fails at once with
+    "busy": true and "queue": {"waiting", "running", "limit"}. Successful
+    runs report "queue_wait_ms".
+
+    With a cache (see chat_cache_key), a stored answer is returned with
+    "cached": true instead of running PicoClaw; successful answers are stored.
+
+    on_delta(text, elapsed_ms) is called for every stdout chunk as PicoClaw
+    writes it, partial lines included (colour codes and \r redraws removed,
+    see output_filter.DeltaFilter; a cache hit is delivered as one delta).
+    The result's ttft_ms is the time to the first stdout byte.
+    """
+    cache_key = None
+    if cache is not None:
+        cache_key = chat_cache_key(cache, message)
+        hit = cache.get(cache_key)
+        if hit:
+            response = dict(hit["value"], cached=True, cache_age_s=hit["age_s"])
+            if on_delta and response.get("response"):
+                on_delta(response["response"] + "\n", 0)
+            _record_chat(message, response)
+            return response
+
+    if max_concurrent > 0:
+        try:
+            with job_slot(None, exclusive=False, limit=max_concurrent, wait_timeout=queue_timeout_s,
+                          pool=CHAT_SLOT_POOL, max_waiting=max_queue) as slot:
+                response = _run_chat(message, timeout_s, slow_after_s, on_warning, on_delta)
+        except TimeoutError as exc:
+            response = {
+                "ok": False,
+                "error": f"picoclaw busy: {exc}",
+                "busy": True,
+                "queue": {**queue_depth(CHAT_SLOT_POOL), "limit": max_concurrent},
+                "response": "",
+                "exit_code": -1,
+                "duration_ms": 0,
+                "truncated": False,
+            }
+            _record_chat(message, response)
+            return response
+        response["queue_wait_ms"] = slot["queue_wait_ms"]
+    else:
+        response = _run_chat(message, timeout_s, slow_after_s, on_warning, on_delta)
+    if cache is not None:
+        if response.get("ok"):
+            cache.put(cache_key, response)
+        response["cached"] = False
+    return response
+
+
+def _run_chat(message: str, timeout_s: int, slow_after_s: float | None, on_warning, on_delta) -> dict:
     binary = find_picoclaw_binary()
     if not binary:
         return {
@@ -191,57 +298,201 @@ def cmd_chat(message: str, timeout_s: int = 120) -> dict:
 
     cmd = [binary, "agent", "-m", message]
     start_time = time.monotonic()
+    first_byte_ms: list[int] = []
+    deltas = DeltaFilter()
+
+    def on_chunk(data: bytes) -> None:
+        elapsed_ms = int((time.monotonic() - start_time) * 1000)
+        if not first_byte_ms:
+            first_byte_ms.append(elapsed_ms)
+        if on_delta:
+            text = deltas.feed(data)
+            if text:
+                on_delta(text, elapsed_ms)
 
     try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=timeout_s,
-        )
-        duration_ms = int((time.monotonic() - start_time) * 1000)
-
-        output = result.stdout or ""
-        stderr = result.stderr or ""
-
-        # PicoClaw may output to stdout or stderr depending on version
-        response = output.strip()
-        if not response and stderr.strip():
-            response = stderr.strip()
-
-        truncated = False
-        if len(response) > MAX_OUTPUT_BYTES:
-            response = response[:MAX_OUTPUT_BYTES] + f"\n\n... [truncated at {MAX_OUTPUT_BYTES // 1024}KB]"
-            truncated = True
-
-        return {
-            "ok": result.returncode == 0,
-            "response": response,
-            "exit_code": result.returncode,
-            "duration_ms": duration_ms,
-            "truncated": truncated,
-        }
-
-    except subprocess.TimeoutExpired:
+        # Strip colour codes and spinner redraws before the cap. stdout is the answer itself, so
+        # repeated lines (code, tables) are kept; only stderr log noise is folded.
+        with slow_run_watch(slow_after_s, on_warning) as watch:
+            result = run_captured(cmd, timeout_s=timeout_s, limit_bytes=MAX_OUTPUT_BYTES, on_stdout_chunk=on_chunk,
+                                  stdout_filter=LineFilter((strip_ansi, collapse_cr), fold_duplicates=False),
+                                  stderr_filter=make_filter())
+    except Exception as exc:
         duration_ms = int((time.monotonic() - start_time) * 1000)
-        return {
+        response = {
             "ok": False,
-            "error": f"picoclaw timed out after {timeout_s}s",
+            "error": str(exc),
             "response": "",
             "exit_code": -1,
             "duration_ms": duration_ms,
             "truncated": False,
         }
-    except Exception as exc:
-        duration_ms = int((time.monotonic() - start_time) * 1000)
-        return {
+        _record_chat(message, response)
+        return response
+
+    if on_delta:
+        text = deltas.close()
+        if text:
+            on_delta(text, int((time.monotonic() - start_time) * 1000))
+
+    # PicoClaw may output to stdout or stderr depending on version
+    text = result["stdout"].strip()
+    if not text and result["stderr"].strip():
+        text = result["stderr"].strip()
+
+    text, truncated = truncate_middle(text, MAX_OUTPUT_BYTES)
+    truncated = truncated or result["truncated"]
+
+    if result["timed_out"]:
+        response = {
             "ok": False,
-            "error": str(exc),
-            "response": "",
+            "error": f"picoclaw timed out after {timeout_s}s",
+            "response": text,
             "exit_code": -1,
-            "duration_ms": duration_ms,
-            "truncated": False,
+            "duration_ms": result["duration_ms"],
+            "truncated": truncated,
+            "resources": result["resources"],
+            "killed_processes": result["killed_processes"],
+        }
+    else:
+        response = {
+            "ok": result["returncode"] == 0,
+            "response": text,
+            "exit_code": result["returncode"],
+            "duration_ms": result["duration_ms"],
+            "truncated": truncated,
+            "resources": result["resources"],
         }
+    response["ttft_ms"] = first_byte_ms[0] if first_byte_ms else None
+    if watch.get("slow_run"):
+        response["slow_run"] = True
+    _record_chat(message, response)
+    return response
+
+
+def _batch_item(index: int, line: str) -> dict:
+    """One --batch input line: {"message": "...", "id": ..., "timeout": N} or a bare JSON string."""
+    try:
+        item = json.loads(line)
+    except json.JSONDecodeError as exc:
+        return {"index": index, "error": f"invalid JSON: {exc}"}
+    if isinstance(item, str):
+        item = {"message": item}
+    if not isinstance(item, dict) or not isinstance(item.get("message"), str) or not item["message"].strip():
+        return {"index": index, "error": "expected an object with a non-empty \"message\" string"}
+    timeout = item.get("timeout")
+    # bool is an int subclass: "timeout": true must not become a 1 s timeout
+    if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+        error = {"index": index, "error": f"\"timeout\" must be a positive number of seconds, got {timeout!r}"}
+        if "id" in item:
+            error["id"] = item["id"]
+        return error
+    return {"index": index, **item}
+
+
+def cmd_chat_batch(lines, out, workers: int = DEFAULT_BATCH_WORKERS, timeout_s: int = DEFAULT_CHAT_TIMEOUT_S,
+                   slow_after_s: float | None = None, on_warning=None,
+                   cache: ResponseCache | None = None, **queue_opts) -> dict:
+    """
+    Answer JSONL messages with up to `workers` concurrent chats.
+
+    Each chat still takes a host-wide slot (queue_opts: max_concurrent,
+    max_queue, queue_timeout_s as for cmd_chat). Workers above max_concurrent
+    could only wait, and would fill the bounded wait queue with the batch's
+    own chats, so workers is clamped to max_concurrent.
+
+    lines is any iterable of input lines (read lazily; at most 2 x workers are
+    in flight). Each result is written to out as one JSON line as soon as it
+    finishes, so output order is completion order: match by "index" (0-based
+    input line, blank lines skipped) or by the "id" echoed from the input.
+    A per-line "timeout" (positive seconds) overrides timeout_s; an invalid
+    one fails that line. Returns a summary dict.
+    """
+    max_concurrent = queue_opts.get("max_concurrent", DEFAULT_MAX_CONCURRENT)
+    if max_concurrent > 0:
+        workers = min(workers, max_concurrent)
+    summary = {"total": 0, "ok": 0, "failed": 0, "workers": max(1, workers)}
+    start_time = time.monotonic()
+
+    def run(item: dict) -> dict:
+        if "error" in item:
+            result = {"ok": False, "error": item["error"], "response": "", "duration_ms": 0}
+        else:
+            result = cmd_chat(item["message"], timeout_s=item.get("timeout") or timeout_s,
+                              slow_after_s=slow_after_s, on_warning=on_warning, cache=cache, **queue_opts)
+        entry = {"index": item["index"]}
+        if "id" in item:
+            entry["id"] = item["id"]
+        return {**entry, **result}
+
+    def emit(result: dict) -> None:
+        summary["total"] += 1
+        summary["ok" if result.get("ok") else "failed"] += 1
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+
+    def collect(future, index: int) -> None:
+        # One failing item must not abort the batch and lose the results after it
+        try:
+            result = future.result()
+        except Exception as exc:
+            result = {"index": index, "ok": False, "error": f"{type(exc).__name__}: {exc}",
+                      "response": "", "duration_ms": 0}
+        emit(result)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending: dict = {}
+        for index, line in enumerate(l for l in lines if l.strip()):
+            pending[pool.submit(lambda i=index, l=line: run(_batch_item(i, l)))] = index
+            if len(pending) >= 2 * max(1, workers):
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future, pending.pop(future))
+        for future, index in pending.items():
+            collect(future, index)
+    summary["duration_ms"] = int((time.monotonic() - start_time) * 1000)
+    return summary
+
+
+def _record_chat(message: str, response: dict) -> None:
+    """Append the chat to the run ledger (agent_ledger.py), with the configured model."""
+    record_run("picoclaw", "chat", read_config().get("model"), None, message, response)
+
+
+def cmd_stats(windows: list[str] | None = None, slo_ms: int = DEFAULT_SLO_MS,
+              slo_target: float = DEFAULT_SLO_TARGET) -> dict:
+    """
+    Chat latency report from the run ledger, one entry per sliding window.
+
+    Each window has runs, p50/p95/p99/max_ms, p50/p95_ttft_ms, timeout_rate,
+    error_rate and cached hits (cache hits are not counted as runs), plus
+    "slo": {"within_rate", "met"} where met is None while the window is empty.
+    """
+    report = []
+    for window in windows or DEFAULT_STATS_WINDOWS:
+        rows = stats("picoclaw", "chat", since_s=parse_age(window), slo_ms=slo_ms)
+        entry = rows[0] if rows else {"runs": 0}
+        within = entry.get("slo_within_rate")
+        report.append({
+            "window": window,
+            "runs": entry["runs"],
+            "p50_ms": entry.get("p50_ms"),
+            "p95_ms": entry.get("p95_ms"),
+            "p99_ms": entry.get("p99_ms"),
+            "max_ms": entry.get("max_ms"),
+            "p50_ttft_ms": entry.get("p50_ttft_ms"),
+            "p95_ttft_ms": entry.get("p95_ttft_ms"),
+            "timeout_rate": entry.get("timeout_rate"),
+            "error_rate": entry.get("error_rate"),
+            "cached": entry.get("cached", 0),
+            "slo": {"within_rate": within, "met": None if within is None else within >= slo_target},
+        })
+    return {"backend": "picoclaw", "mode": "chat", "slo_ms": slo_ms, "slo_target": slo_target,
+            "windows": report}
+
+
+def _print_delta(text: str, elapsed_ms: int) -> None:
+    print(json.dumps({"type": "delta", "text": text, "elapsed_ms": elapsed_ms}), flush=True)
 
 
 def main() -> int:
@@ -252,10 +503,55 @@ def main() -> int:
 
     # chat
     p_chat = sub.add_parser("chat", help="Send a message to PicoClaw agent")
-    p_chat.add_argument("--message", "-m", required=True, help="Message to send")
-    p_chat.add_argument("--timeout", type=int, default=120, help="Timeout in seconds (default: 120)")
+    chat_input = p_chat.add_mutually_exclusive_group(required=True)
+    chat_input.add_argument("--message", "-m", help="Message to send")
+    chat_input.add_argument("--batch", metavar="FILE",
+                            help="JSONL messages ('-' = stdin), one {\"message\": ..., \"id\": ...} per line; "
+                                 "writes one JSON result per line")
+    p_chat.add_argument("--workers", type=int,
+                        default=_env_number("CLAW_PICOCLAW_BATCH_WORKERS", DEFAULT_BATCH_WORKERS),
+                        help=f"--batch: concurrent chats (env: CLAW_PICOCLAW_BATCH_WORKERS, "
+                             f"default: {DEFAULT_BATCH_WORKERS})")
+    p_chat.add_argument("--timeout", type=timeout_arg, default=DEFAULT_CHAT_TIMEOUT_S,
+                        help=f"Timeout in seconds, or 'auto' to derive it from past chats "
+                             f"(default: {DEFAULT_CHAT_TIMEOUT_S})")
+    p_chat.add_argument("--stream", action="store_true",
+                        help="With --message: print JSONL events as PicoClaw answers, a \"delta\" per output "
+                             "chunk and a final \"done\" with the full result")
+    p_chat.add_argument("--cache", action="store_true", default=os.environ.get("CLAW_PICOCLAW_CACHE") == "1",
+                        help="Reuse answers to identical messages (env: CLAW_PICOCLAW_CACHE=1)")
+    p_chat.add_argument("--no-cache", action="store_true", help="Do not read or write the chat cache")
+    p_chat.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL_S,
+                        help=f"Seconds to reuse a cached answer (default: {DEFAULT_TTL_S})")
+    p_chat.add_argument("--cache-max-entries", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help=f"Cached answers kept, least recently used dropped first (default: {DEFAULT_MAX_ENTRIES})")
+    p_chat.add_argument("--max-concurrent", type=int,
+                        default=_env_number("CLAW_PICOCLAW_MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT),
+                        help=f"Host-wide limit on concurrent chats, 0 = none "
+                             f"(env: CLAW_PICOCLAW_MAX_CONCURRENT, default: {DEFAULT_MAX_CONCURRENT})")
+    p_chat.add_argument("--max-queue", type=int, default=_env_number("CLAW_PICOCLAW_MAX_QUEUE", DEFAULT_MAX_QUEUE),
+                        help=f"Reject at once as busy when this many chats are already waiting "
+                             f"(env: CLAW_PICOCLAW_MAX_QUEUE, default: {DEFAULT_MAX_QUEUE})")
+    p_chat.add_argument("--queue-timeout", type=float,
+                        default=_env_number("CLAW_PICOCLAW_QUEUE_TIMEOUT_S", DEFAULT_QUEUE_TIMEOUT_S),
+                        help=f"Give up as busy if no chat slot is free after N seconds "
+                             f"(env: CLAW_PICOCLAW_QUEUE_TIMEOUT_S, default: {DEFAULT_QUEUE_TIMEOUT_S:g})")
     p_chat.add_argument("--json", action="store_true", default=True, help="Output as JSON")
 
+    # stats
+    p_stats = sub.add_parser("stats", help="Chat latency/error report per time window (JSON)")
+    p_stats.add_argument("--window", "-w", action="append", default=None, metavar="AGE",
+                         help=f"Time window like 30m, 24h, 7d (repeatable, default: "
+                              f"{' '.join(DEFAULT_STATS_WINDOWS)})")
+    p_stats.add_argument("--slo-ms", type=int, default=_env_number("CLAW_PICOCLAW_SLO_MS", DEFAULT_SLO_MS),
+                         help=f"Latency objective for a successful chat in ms "
+                              f"(env: CLAW_PICOCLAW_SLO_MS, default: {DEFAULT_SLO_MS})")
+    p_stats.add_argument("--slo-target", type=float,
+                         default=_env_number("CLAW_PICOCLAW_SLO_TARGET", DEFAULT_SLO_TARGET),
+                         help=f"Share of chats that must meet --slo-ms "
+                              f"(env: CLAW_PICOCLAW_SLO_TARGET, default: {DEFAULT_SLO_TARGET})")
+    p_stats.add_argument("--json", action="store_true", default=True, help="Output as JSON")
+
     # status
     p_status = sub.add_parser("status", help="Check PicoClaw installation status")
     p_status.add_argument("--json", action="store_true", default=True, help="Output as JSON")
@@ -265,12 +561,16 @@ def main() -> int:
     p_config.add_argument("--json", action="store_true", default=True, help="Output as JSON")
 
     # config-set
-    p_config_set = sub.add_parser("config-set", help="Update a PicoClaw config field")
-    p_config_set.add_argument("--key", "-k", required=True, help="Config key to set")
-    p_config_set.add_argument("--value", "-v", required=True, help="Value to set")
+    p_config_set = sub.add_parser("config-set", help="Update PicoClaw config fields (one atomic write)")
+    p_config_set.add_argument("--set", "-s", action="append", default=[], metavar="KEY=VALUE", dest="pairs",
+                              help="Field to set; dotted keys reach nested objects, VALUE is JSON or a string "
+                                   "(repeatable)")
+    p_config_set.add_argument("--key", "-k", help="Config key to set (single-field form)")
+    p_config_set.add_argument("--value", "-v", help="Value to set (with --key)")
     p_config_set.add_argument("--json", action="store_true", default=True, help="Output as JSON")
 
     args = ap.parse_args()
+    exit_on_sigterm()
 
     if args.cmd == "status":
         result = cmd_status(as_json=True)
@@ -278,17 +578,78 @@ def main() -> int:
         return 0 if result.get("installed") else 1
 
     elif args.cmd == "chat":
-        result = cmd_chat(message=args.message, timeout_s=args.timeout)
-        print(json.dumps(result, indent=2))
+        chat_opts = {"timeout_s": args.timeout}
+        auto = None
+        if args.timeout == "auto":
+            auto = adaptive_timeout("picoclaw", "chat", None, DEFAULT_CHAT_TIMEOUT_S)
+            chat_opts = {"timeout_s": auto["timeout_s"], "slow_after_s": auto["slow_after_s"],
+                         "on_warning": print_warning}
+        chat_opts.update(max_concurrent=args.max_concurrent, max_queue=args.max_queue,
+                         queue_timeout_s=args.queue_timeout)
+        if args.cache and not args.no_cache:
+            chat_opts["cache"] = ResponseCache(CHAT_CACHE_NAMESPACE, ttl_s=args.cache_ttl,
+                                               max_entries=args.cache_max_entries)
+        if args.batch:
+            if args.stream:
+                ap.error("--stream cannot be combined with --batch")
+            if args.workers < 1:
+                ap.error("--workers must be at least 1")
+            try:
+                src = sys.stdin if args.batch == "-" else open(args.batch, "r", encoding="utf-8")
+            except OSError as exc:
+                print(json.dumps({"ok": False, "error": f"cannot read {args.batch}: {exc}"}), file=sys.stderr)
+                return 1
+            try:
+                summary = cmd_chat_batch(src, sys.stdout, workers=args.workers, **chat_opts)
+            finally:
+                if src is not sys.stdin:
+                    src.close()
+            # stdout carries only results; the summary goes to stderr
+            print(json.dumps({"type": "summary", **summary}), file=sys.stderr)
+            return 0 if summary["failed"] == 0 else 1
+        if args.stream:
+            chat_opts["on_delta"] = _print_delta
+        result = cmd_chat(message=args.message, **chat_opts)
+        if auto is not None:
+            result["adaptive_timeout"] = auto
+        if args.stream:
+            print(json.dumps({"type": "done", **result}), flush=True)
+        else:
+            print(json.dumps(result, indent=2))
         return 0 if result.get("ok") else 1
 
+    elif args.cmd == "stats":
+        for window in args.window or []:
+            try:
+                parse_age(window)
+            except ValueError:
+                ap.error(f"invalid --window {window!r} (use e.g. 30m, 24h, 7d)")
+        result = cmd_stats(args.window, slo_ms=args.slo_ms, slo_target=args.slo_target)
+        print(json.dumps(result, indent=2))
+        return 0 if all(w["slo"]["met"] is not False for w in result["windows"]) else 1
+
     elif args.cmd == "config":
         result = read_config()
         print(json.dumps(result, indent=2))
         return 0 if "error" not in result else 1
 
     elif args.cmd == "config-set":
-        result = write_config_field(key=args.key, value=args.value)
+        if (args.key is None) != (args.value is None):
+            ap.error("--key and --value must be given together")
+        pairs = []
+        for pair in args.pairs:
+            key, sep, value = pair.partition("=")
+            if not sep or not key:
+                ap.error(f"--set expects KEY=VALUE, got {pair!r}")
+            pairs.append((key, value))
+        if args.key is not None:
+            pairs.append((args.key, args.value))
+        if not pairs:
+            ap.error("nothing to set: use --set KEY=VALUE or --key/--value")
+        if len(pairs) == 1:
+            result = write_config_field(*pairs[0])
+        else:
+            result = write_config_fields(pairs)
         print(json.dumps(result, indent=2))
         return 0 if result.get("ok") else 1
 
@@ -0,0 +1,123 @@
+"""
+Small on-disk response cache with TTL and size-bounded LRU eviction.
+
+One JSON file per entry under CLAW_CACHE_DIR (default ~/.openclaw/cache),
+grouped by namespace. A hit refreshes the file's mtime, so eviction (oldest
+mtime first, run on every put) approximates LRU across processes without a
+shared index. Corrupt or unreadable entries are treated as misses.
+
+Usage:
+  cache = ResponseCache("agent-ask", ttl_s=3600)
+  key = cache.key("cursor", model, prompt, fingerprint)
+  result = cache.get(key)
+  if result is None:
+      result = run(...)
+      cache.put(key, result)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(os.environ.get("CLAW_CACHE_DIR", Path.home() / ".openclaw" / "cache"))
+DEFAULT_TTL_S = 3600
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024  # 50 MB
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        namespace: str,
+        ttl_s: float = DEFAULT_TTL_S,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.dir = CACHE_DIR / namespace
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Stable key from JSON-serialisable parts."""
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.dir / f"{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        """Return {"value", "created_at", "age_s"} or None on miss/expiry."""
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not isinstance(entry, dict) or not isinstance(entry.get("created_at", 0), (int, float)):
+            return None
+        age = time.time() - entry.get("created_at", 0)
+        if self.ttl_s and age > self.ttl_s:
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)  # LRU touch
+        except OSError:
+            pass
+        entry["age_s"] = round(age, 3)
+        return entry
+
+    def put(self, key: str, value: dict) -> None:
+        """Store value; never raises (a cache must not break the caller)."""
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            # Unique per writer: threads of one process (chat --batch) may store the same key at once
+            fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=self.dir)
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump({"created_at": time.time(), "value": value}, f)
+                os.replace(tmp, path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+            self.evict()
+        except OSError:
+            pass
+
+    def evict(self) -> int:
+        """Drop expired entries, then least-recently-used ones over the limits."""
+        entries = []
+        now = time.time()
+        removed = 0
+        for path in self.dir.glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if self.ttl_s and now - st.st_mtime > self.ttl_s:
+                # created_at <= mtime, so an mtime older than the TTL means expired
+                path.unlink(missing_ok=True)
+                removed += 1
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        removed = 0
+        for path in self.dir.glob("*.json"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
@@ -29,6 +29,8 @@ import shutil
 import sys
 from pathlib import Path
 
+from config_store import load_json
+
 OPENCLAW_DIR = Path.home() / ".openclaw"
 OPENCLAW_CONFIG = OPENCLAW_DIR / "openclaw.json"
 PLUGIN_ROOT = Path(os.environ.get("CLAW_CORE_PLUGIN_ROOT", Path(__file__).resolve().parent.parent))
@@ -87,8 +89,8 @@ def load_openclaw_config() -> dict:
     """Load existing openclaw.json or create skeleton."""
     if OPENCLAW_CONFIG.exists():
         try:
-            with open(OPENCLAW_CONFIG, "r") as f:
-                return json.load(f)
+            # A private copy: the caller merges into it before saving
+            return load_json(OPENCLAW_CONFIG, copy=True)
         except (json.JSONDecodeError, IOError):
             print(f"⚠ Could not parse {OPENCLAW_CONFIG}, creating backup and starting fresh")
             backup = OPENCLAW_CONFIG.with_suffix(".json.bak")
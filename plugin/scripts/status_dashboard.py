@@ -11,15 +11,19 @@ import json
 import os
 import shutil
 import socket
-import subprocess
 import sys
 import uuid
 from datetime import datetime
 from pathlib import Path
 
+import config_store
+from agent_ledger import stats as ledger_stats
+from binary_discovery import probe_version
+from cron_schedule import upcoming
+
 SOCKET = os.environ.get("CLAW_CORE_SOCKET", "/tmp/trl.sock")
 CRON_FILE = os.path.expanduser("~/.openclaw/cron/jobs.json")
-OPENCLAW_CONFIG = Path.home() / ".openclaw" / "openclaw.json"
+OPENCLAW_CONFIG = config_store.OPENCLAW_CONFIG
 
 
 def send_claw_core(method: str, params: dict | None = None) -> dict:
@@ -56,6 +60,17 @@ def format_time_ago(iso_str: str) -> str:
         return iso_str
 
 
+def format_time_until(dt: datetime) -> str:
+    secs = int((dt - datetime.now(dt.tzinfo)).total_seconds())
+    if secs < 60:
+        return f"in {max(secs, 0)}s"
+    if secs < 3600:
+        return f"in {secs//60}m"
+    if secs < 86400:
+        return f"in {secs//3600}h {secs % 3600 // 60}m"
+    return f"in {secs//86400}d {secs % 86400 // 3600}h"
+
+
 def get_sessions() -> list:
     if not os.path.exists(SOCKET):
         return []
@@ -109,54 +124,37 @@ def check_binary(name: str) -> tuple[bool, str]:
     path = shutil.which(name)
     if not path:
         return False, "not found"
-    try:
-        result = subprocess.run(
-            [path, "--version"],
-            capture_output=True, text=True, timeout=5,
-        )
-        version = result.stdout.strip().split("\n")[0] or result.stderr.strip().split("\n")[0] or "unknown"
-        return True, version
-    except Exception:
+    info = probe_version(path, timeout_s=5)
+    if "error" in info:
         return True, path
+    return True, info["version"].split("\n")[0]
 
 
 def get_picoclaw_config() -> dict:
-    """Read PicoClaw config for model/provider info."""
-    for config_path in [
-        Path.home() / ".picoclaw" / "workspace" / "config.json",
-        Path.home() / ".picoclaw" / "config.json",
-    ]:
-        if config_path.exists():
-            try:
-                with open(config_path, "r") as f:
-                    return json.load(f)
-            except Exception:
-                pass
-    return {}
-
-
-def get_bot_agents() -> list[dict]:
+    """Read PicoClaw config for model/provider info (parsed once per file change)."""
+    return config_store.picoclaw_config()
+
+
+def get_bot_agents(config: dict | None = None) -> list[dict]:
     """Read configured bot agents from openclaw.json."""
-    if not OPENCLAW_CONFIG.exists():
-        return []
+    return config_store.agents(config if config is not None else config_store.openclaw_config(OPENCLAW_CONFIG))
+
+
+def get_picoclaw_chat_stats(window_s: float = 86400) -> dict | None:
+    """PicoClaw chat latency over the last window_s from the run ledger (see picoclaw_client.py stats)."""
     try:
-        with open(OPENCLAW_CONFIG, "r") as f:
-            config = json.load(f)
-        return config.get("agents", {}).get("list", [])
+        rows = ledger_stats("picoclaw", "chat", since_s=window_s)
     except Exception:
-        return []
+        return None
+    if not rows or not rows[0]["runs"] or rows[0]["p50_ms"] is None:
+        return None
+    return rows[0]
 
 
-def get_telegram_accounts() -> list[dict]:
+def get_telegram_accounts(config: dict | None = None) -> list[dict]:
     """Read configured Telegram accounts from openclaw.json."""
-    if not OPENCLAW_CONFIG.exists():
-        return []
-    try:
-        with open(OPENCLAW_CONFIG, "r") as f:
-            config = json.load(f)
-        return config.get("channels", {}).get("telegram", {}).get("accounts", [])
-    except Exception:
-        return []
+    return config_store.telegram_accounts(
+        config if config is not None else config_store.openclaw_config(OPENCLAW_CONFIG))
 
 
 def main() -> int:
@@ -198,15 +196,19 @@ def main() -> int:
         pico_config = get_picoclaw_config()
         model = pico_config.get("model", "?")
         print(f"  ✓ PicoClaw       {pico_info}  (model: {model})")
+        chat = get_picoclaw_chat_stats()
+        if chat:
+            print(f"     chats 24h: {chat['runs']}  p50 {chat['p50_ms'] / 1000:.1f}s  p95 {chat['p95_ms'] / 1000:.1f}s"
+                  f"  timeouts {chat['timeout_rate']:.0%}  errors {chat['error_rate']:.0%}")
     else:
         print(f"  ✗ PicoClaw       not installed  (https://github.com/sipeed/picoclaw)")
 
     # ---------------------------------------------------------------
     # Bot Agents
     # ---------------------------------------------------------------
-    agents = get_bot_agents()
-    accounts = get_telegram_accounts()
-    account_map = {a.get("id"): a for a in accounts}
+    openclaw_config = config_store.openclaw_config(OPENCLAW_CONFIG)
+    agents = get_bot_agents(openclaw_config)
+    accounts = get_telegram_accounts(openclaw_config)
 
     print(f"\n[Bot Agents] ({len(agents)} configured)")
     if agents:
@@ -214,12 +216,6 @@ def main() -> int:
             agent_id = agent.get("id", "?")
             workspace = agent.get("workspace", "?")
             tools_profile = agent.get("tools", {}).get("profile", "?")
-            # Find matching Telegram account
-            tg_info = ""
-            for acc in accounts:
-                # Match by convention: image-bot→artist, qa-bot→assistant, dev-bot→developer
-                # Or check bindings
-                pass
             has_workspace = Path(workspace).exists() if workspace != "?" else False
             ws_status = "✓" if has_workspace else "✗"
             print(f"  🤖 {agent_id:<14} [profile: {tools_profile}]  workspace: {ws_status}")
@@ -234,7 +230,9 @@ def main() -> int:
             acc_id = acc.get("id", "?")
             has_token = bool(acc.get("botToken")) and not acc.get("botToken", "").startswith("<")
             token_status = "✓ token set" if has_token else "⚠ needs token"
-            print(f"  📱 {acc_id:<14} [{token_status}]")
+            bound = config_store.bound_agent(openclaw_config, acc_id)
+            route = f"  → {bound}" if bound else "  (no binding)"
+            print(f"  📱 {acc_id:<14} [{token_status}]{route}")
 
     # ---------------------------------------------------------------
     # claw_core Runtime Details
@@ -271,12 +269,17 @@ def main() -> int:
     enabled_jobs = [j for j in jobs if j.get("enabled", True)]
     print(f"\n[Cron Jobs] ({len(enabled_jobs)} enabled / {len(jobs)} total)")
     if enabled_jobs:
-        for job in enabled_jobs:
+        # Soonest first; next fire times are computed (cron_schedule.py), stored nextRun may be stale
+        for next_run, job, error in upcoming(enabled_jobs):
             name = job.get("name", "(no name)")
             schedule = format_schedule(job.get("schedule", {}))
             target = job.get("sessionTarget", "?")
-            next_run = job.get("nextRun") or job.get("schedule", {}).get("at")
-            next_str = format_time_ago(next_run) if next_run else "pending"
+            if error:
+                next_str = f"invalid schedule ({error})"
+            elif next_run is None:
+                next_str = "none (already ran)"
+            else:
+                next_str = f"{format_time_until(next_run)}  ({next_run.astimezone().strftime('%Y-%m-%d %H:%M')})"
             print(f"  • {job.get('jobId', '?')[:12]}... [{target}] {name}")
             print(f"    schedule: {schedule}")
             print(f"    next run: {next_str}")
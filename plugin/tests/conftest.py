@@ -0,0 +1,45 @@
+"""
+Shared fixtures for the plugin script tests.
+
+The scripts in plugin/scripts are standalone modules that import each other
+by name, so that directory goes on sys.path. State the scripts keep under
+~/.openclaw (job spool, run ledger, caches) is redirected into tmp_path.
+"""
+from __future__ import annotations
+
+import os
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+@pytest.fixture
+def claw_state(tmp_path, monkeypatch):
+    """Point the job spool, run ledger and response cache at tmp_path."""
+    import agent_ledger
+    import agent_queue
+    import response_cache
+
+    monkeypatch.setattr(agent_queue, "SPOOL_DIR", tmp_path / "spool")
+    monkeypatch.setattr(agent_ledger, "LEDGER_DB", tmp_path / "ledger.sqlite3")
+    monkeypatch.setattr(response_cache, "CACHE_DIR", tmp_path / "cache")
+    return tmp_path
+
+
+@pytest.fixture
+def make_script(tmp_path):
+    """Write an executable shell script into tmp_path/bin and return its path."""
+
+    def make(name: str, body: str) -> str:
+        path = tmp_path / "bin" / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text("#!/bin/sh\n" + body)
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        return os.fspath(path)
+
+    return make
@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+import agent_hedge
+
+
+def test_hedge_delay_env(monkeypatch):
+    monkeypatch.setenv("CLAW_HEDGE_DELAY_S", "7.5")
+    assert agent_hedge.hedge_delay() == 7.5
+    monkeypatch.setenv("CLAW_HEDGE_DELAY_S", "20s")
+    assert agent_hedge.hedge_delay() == agent_hedge.DEFAULT_HEDGE_DELAY_S
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import threading
+
+import agent_ledger
+
+
+def test_concurrent_connects_migrate_a_fresh_ledger_once(tmp_path):
+    path = tmp_path / "ledger.sqlite3"
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def open_ledger():
+        barrier.wait()
+        try:
+            agent_ledger.connect(path).close()
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=open_ledger) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert errors == []
+    conn = agent_ledger.connect(path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(agent_ledger.MIGRATIONS)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}
+        assert {"input_tokens", "ttft_ms"} <= columns
+    finally:
+        conn.close()
+
+
+def test_record_run_and_stats(claw_state):
+    for duration, status in [(100, "ok"), (200, "ok"), (5000, "timeout")]:
+        result = {"ok": status == "ok", "duration_ms": duration, "output": "x"}
+        if status == "timeout":
+            result["error"] = "picoclaw timed out after 5s"
+        agent_ledger.record_run("picoclaw", "chat", "m", None, "hi", result)
+    [entry] = agent_ledger.stats("picoclaw", "chat", slo_ms=150)
+    assert entry["runs"] == 3
+    assert entry["p50_ms"] == 200 and entry["max_ms"] == 5000
+    assert entry["timeout_rate"] == round(1 / 3, 4)
+    assert entry["slo_within_rate"] == round(1 / 3, 4)
+
+
+def test_stats_percentiles_and_slo(claw_state):
+    for duration in range(100, 2100, 100):  # 20 ok runs: 100 .. 2000 ms
+        agent_ledger.record_run("picoclaw", "chat", "m", None, "hi",
+                                {"ok": True, "duration_ms": duration, "ttft_ms": duration // 10})
+    agent_ledger.record_run("picoclaw", "chat", "m", None, "hi", {"ok": False, "duration_ms": 50, "error": "boom"})
+    agent_ledger.record_run("picoclaw", "chat", "m", None, "hi", {"ok": True, "cached": True, "duration_ms": 1})
+    agent_ledger.record_run("cursor", "agent", "m", None, "hi", {"ok": True, "duration_ms": 99_000})
+
+    [entry] = agent_ledger.stats("picoclaw", "chat", slo_ms=1000)
+    assert entry["runs"] == 21 and entry["cached"] == 1
+    # Nearest rank over the 21 durations (the failed run's 50 ms included)
+    assert (entry["p50_ms"], entry["p95_ms"], entry["p99_ms"], entry["max_ms"]) == (1000, 1900, 2000, 2000)
+    assert entry["p50_ttft_ms"] == 100 and entry["p95_ttft_ms"] == 190
+    assert entry["error_rate"] == round(1 / 21, 4)
+    # 10 ok runs within 1 s; the fast failure is a miss
+    assert entry["slo_within_rate"] == round(10 / 21, 4)
+    assert "slo_within_rate" not in agent_ledger.stats("picoclaw", "chat")[0]
+    assert agent_ledger.stats("picoclaw", "chat", since_s=-1) == []
+    assert [e["backend"] for e in agent_ledger.stats(slo_ms=1000)] == ["cursor", "picoclaw"]
+
+
+def test_percentile_nearest_rank():
+    assert agent_ledger.percentile([], 50) is None
+    assert agent_ledger.percentile([7], 99) == 7
+    values = list(range(1, 101))
+    assert [agent_ledger.percentile(values, q) for q in (0, 50, 95, 99, 100)] == [1, 50, 95, 99, 100]
+
+
+def test_auto_timeout_env(monkeypatch):
+    monkeypatch.setenv("CLAW_AUTO_TIMEOUT_MARGIN", "3")
+    assert agent_ledger._env_float("CLAW_AUTO_TIMEOUT_MARGIN", 2.0) == 3.0
+    monkeypatch.setenv("CLAW_AUTO_TIMEOUT_MARGIN", "x2")
+    assert agent_ledger._env_float("CLAW_AUTO_TIMEOUT_MARGIN", 2.0) == 2.0
+
+
+def _record(backend, workspace, durations, status="ok"):
+    for duration in durations:
+        result = {"ok": status == "ok", "duration_ms": duration, "output": "x"}
+        if status == "timeout":
+            result["error"] = f"{backend} timed out"
+        agent_ledger.record_run(backend, "agent", "m", workspace, "hi", result)
+
+
+def test_auto_timeout_needs_twenty_runs(claw_state):
+    _record("cursor", "/w", [1000] * 19)
+    assert agent_ledger.adaptive_timeout("cursor", "agent", "/w", 600) == {
+        "timeout_s": 600, "slow_after_s": None, "basis": "default",
+        "runs": 19, "p95_ms": None, "p99_ms": None,
+    }
+    _record("cursor", "/w", [1000])
+    auto = agent_ledger.adaptive_timeout("cursor", "agent", "/w", 600, margin=2, min_s=1)
+    assert auto["basis"] == "workspace" and auto["runs"] == 20
+    assert auto["timeout_s"] == 2 and auto["slow_after_s"] == 1.0
+
+
+def test_auto_timeout_ignores_failed_runs(claw_state):
+    _record("cursor", "/w", [1000] * 19)
+    _record("cursor", "/w", [600_000] * 5, status="timeout")
+    assert agent_ledger.adaptive_timeout("cursor", "agent", "/w", 600)["basis"] == "default"
+
+
+def test_auto_timeout_falls_back_to_backend_history(claw_state):
+    _record("cursor", "/a", [10_000] * 15)
+    _record("cursor", "/b", [20_000] * 15)
+    _record("cursor", "/new", [30_000] * 3)
+    auto = agent_ledger.adaptive_timeout("cursor", "agent", "/new", 600, margin=2, min_s=1)
+    assert auto["basis"] == "backend" and auto["runs"] == 33
+    assert auto["p99_ms"] == 30_000 and auto["timeout_s"] == 60
+    # Another backend's history never counts
+    assert agent_ledger.adaptive_timeout("codex", "agent", "/a", 600)["basis"] == "default"
+
+
+def test_auto_timeout_is_clamped(claw_state):
+    _record("cursor", "/w", [100 * (i + 1) for i in range(100)])  # p95 9.5 s, p99 9.9 s
+    auto = agent_ledger.adaptive_timeout("cursor", "agent", "/w", 600, margin=2, min_s=1)
+    assert auto["p95_ms"] == 9_500 and auto["p99_ms"] == 9_900
+    assert auto["timeout_s"] == 20 and auto["slow_after_s"] == 9.5
+    # Floor: never below min_s
+    assert agent_ledger.adaptive_timeout("cursor", "agent", "/w", 600, margin=2, min_s=60)["timeout_s"] == 60
+    # Ceiling: never above the static default
+    assert agent_ledger.adaptive_timeout("cursor", "agent", "/w", 15, margin=2, min_s=1)["timeout_s"] == 15
+    assert agent_ledger.adaptive_timeout("cursor", "agent", "/w", 600, margin=5, min_s=1)["timeout_s"] == 50
+
+
+def test_auto_timeout_reads_env_per_call(claw_state, monkeypatch):
+    _record("cursor", "/w", [10_000] * 20)
+    monkeypatch.setenv("CLAW_AUTO_TIMEOUT_MARGIN", "3")
+    monkeypatch.setenv("CLAW_AUTO_TIMEOUT_MIN_S", "1")
+    assert agent_ledger.adaptive_timeout("cursor", "agent", "/w", 600)["timeout_s"] == 30
+    monkeypatch.setenv("CLAW_AUTO_TIMEOUT_MIN_S", "45")
+    assert agent_ledger.adaptive_timeout("cursor", "agent", "/w", 600)["timeout_s"] == 45
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from agent_process import kill_process_tree, resource_summary, run_captured, tree_rss_kb
+
+
+def test_raising_line_callback_keeps_draining_stdout():
+    # Far more than a pipe buffer: if the reader thread died, the child would block until the timeout
+    cmd = [sys.executable, "-c", "import sys\nfor i in range(20000): sys.stdout.write('x' * 50 + '\\n')"]
+    seen = []
+
+    def on_line(line):
+        seen.append(line)
+        raise AttributeError("bad event")
+
+    result = run_captured(cmd, timeout_s=20, on_stdout_line=on_line)
+    assert seen == ["x" * 50]
+    assert not result["timed_out"]
+    assert result["returncode"] == 0
+    assert result["stdout_bytes"] == 20000 * 51
+
+
+def test_chunk_callback_sees_partial_lines_as_they_arrive():
+    cmd = [sys.executable, "-c", "import sys, time\nsys.stdout.write('Hel'); sys.stdout.flush()\n"
+                                 "time.sleep(0.5); sys.stdout.write('lo')"]
+    start = time.monotonic()
+    chunks = []
+    result = run_captured(cmd, timeout_s=20, on_stdout_chunk=lambda data: chunks.append((data, time.monotonic())))
+    assert b"".join(data for data, _ in chunks) == b"Hello"
+    assert chunks[0][0] == b"Hel" and chunks[0][1] - start < 0.4
+    assert result["stdout"] == "Hello"
+
+
+def _alive(pid: int) -> bool:
+    """Running and not a zombie (orphans may wait for a reaper that never comes in containers)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return False
+
+
+TREE_SCRIPT = """
+import signal, subprocess, sys, time
+stubborn = "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); time.sleep(60)"
+children = [
+    subprocess.Popen(["sleep", "60"]),                            # same process group
+    subprocess.Popen(["sleep", "60"], start_new_session=True),    # left the group
+    subprocess.Popen([sys.executable, "-c", stubborn]),           # ignores SIGTERM
+]
+time.sleep(0.3)
+with open(sys.argv[1], "w") as f:
+    f.write(" ".join(str(c.pid) for c in children))
+print("started", flush=True)
+time.sleep(60)
+"""
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc to find descendants")
+def test_timeout_kills_the_whole_process_tree(tmp_path):
+    pid_file = tmp_path / "pids"
+    start = time.monotonic()
+    result = run_captured([sys.executable, "-c", TREE_SCRIPT, str(pid_file)], timeout_s=1.5)
+    assert time.monotonic() - start < 15
+    assert result["timed_out"] and not result["stalled"]
+    assert result["stdout"] == "started\n"
+    pids = [int(p) for p in pid_file.read_text().split()]
+    assert result["killed_processes"] == 4
+    assert result["force_killed"] == 1
+    deadline = time.monotonic() + 2
+    while any(_alive(pid) for pid in pids) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not [pid for pid in pids if _alive(pid)]
+
+
+def test_idle_timeout_reports_stalled():
+    cmd = [sys.executable, "-c", "import time; print('working', flush=True); time.sleep(30)"]
+    result = run_captured(cmd, timeout_s=20, idle_timeout_s=0.5)
+    assert result["stalled"] and not result["timed_out"]
+    assert result["stdout"] == "working\n"
+    assert result["duration_ms"] < 10_000
+
+
+def test_output_over_the_cap_keeps_head_and_tail():
+    cmd = [sys.executable, "-c", "print('HEAD' + 'x' * 50000 + 'TAIL')"]
+    result = run_captured(cmd, timeout_s=20, limit_bytes=1000)
+    assert result["truncated"]
+    assert result["stdout"].startswith("HEAD") and result["stdout"].rstrip().endswith("TAIL")
+    assert result["stdout_bytes"] == 50009
+    assert len(result["stdout"]) < 1200
+
+
+def test_resource_summary_of_a_run():
+    # ~0.3 s of CPU, ~60 MB resident, a child process alive while the tree is sampled
+    script = (
+        "import subprocess, sys, time\n"
+        "child = subprocess.Popen(['sleep', '2'])\n"
+        "blob = bytearray(60 * 1024 * 1024)\n"
+        "for i in range(0, len(blob), 4096): blob[i] = 1\n"
+        "end = time.process_time() + 0.3\n"
+        "while time.process_time() < end: pass\n"
+        "time.sleep(0.7)\n"
+        "print('out'); print('err', file=sys.stderr)\n"
+        "child.kill(); child.wait()\n"
+    )
+    result = run_captured([sys.executable, "-c", script], timeout_s=30)
+    res = result["resources"]
+    assert res["cpu_user_s"] + res["cpu_sys_s"] >= 0.25
+    assert res["max_rss_kb"] >= 60 * 1024
+    assert res["tree_peak_rss_kb"] >= 60 * 1024 and res["tree_peak_processes"] == 2
+    assert res["ctx_switches_voluntary"] >= 1
+    assert res["output_bytes"] == len(b"out\nerr\n") == result["stdout_bytes"] + result["stderr_bytes"]
+
+
+def test_resource_summary_without_measurements():
+    assert resource_summary(None, None, 12) == {
+        "cpu_user_s": None, "cpu_sys_s": None, "max_rss_kb": None,
+        "tree_peak_rss_kb": None, "tree_peak_processes": None,
+        "ctx_switches_voluntary": None, "ctx_switches_involuntary": None,
+        "output_bytes": 12,
+    }
+
+
+def test_tree_rss_counts_descendants():
+    proc = subprocess.Popen([sys.executable, "-c", "import subprocess; subprocess.run(['sleep', '5'])"])
+    try:
+        deadline = time.monotonic() + 5
+        while (tree_rss_kb(proc.pid) or (0, 0))[1] < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        total_kb, count = tree_rss_kb(proc.pid)
+        assert count == 2 and total_kb > 0
+    finally:
+        kill_process_tree(proc, grace_s=1)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+import agent_queue
+
+
+def test_job_cancelled_while_taking_slot_does_not_run(claw_state, monkeypatch):
+    job_id = "job-test"
+    agent_queue.update_job(job_id, backend="cursor", status="queued",
+                           params={"workspace": str(claw_state), "mode": "agent"})
+    ran = []
+    monkeypatch.setattr(agent_queue, "_backend_runner", lambda backend: lambda **params: ran.append(params))
+
+    real_job_slot = agent_queue.job_slot
+
+    def job_slot_then_cancel(*args, **kwargs):
+        # The cancel lands after the slot was granted, before the runner marks the job running
+        slot = real_job_slot(*args, **kwargs)
+        agent_queue.update_job(job_id, status="cancelled")
+        return slot
+
+    monkeypatch.setattr(agent_queue, "job_slot", job_slot_then_cancel)
+
+    assert agent_queue.run_job(job_id) == 1
+    assert ran == []
+    assert agent_queue.load_job(job_id)["status"] == "cancelled"
+    assert agent_queue.queue_depth() == {"waiting": 0, "running": 0}
+
+
+def test_waiters_get_the_slot_in_fifo_order(claw_state, monkeypatch):
+    monkeypatch.setattr(agent_queue, "POLL_INTERVAL_S", 0.01)
+    order = []
+
+    def waiter(name):
+        with agent_queue.job_slot(str(claw_state / name), limit=1):
+            order.append(name)
+
+    with agent_queue.job_slot(str(claw_state / "first"), limit=1):
+        threads = []
+        for name in ["a", "b", "c"]:
+            thread = threading.Thread(target=waiter, args=(name,))
+            thread.start()
+            threads.append(thread)
+            # Each waiter has written its ticket before the next one starts
+            while agent_queue.queue_depth()["waiting"] < len(threads):
+                time.sleep(0.005)
+    for thread in threads:
+        thread.join(10)
+    assert order == ["a", "b", "c"]
+
+
+def test_full_pool_rejects_at_once(claw_state):
+    with agent_queue.job_slot(None, limit=1, pool="picoclaw", max_waiting=0):
+        assert agent_queue.queue_depth("picoclaw") == {"waiting": 0, "running": 1}
+        start = time.monotonic()
+        with pytest.raises(TimeoutError, match="picoclaw queue full"):
+            with agent_queue.job_slot(None, limit=1, pool="picoclaw", max_waiting=0):
+                pass
+        assert time.monotonic() - start < 1
+    # Separate pools: the agent pool was never touched
+    assert agent_queue.queue_depth() == {"waiting": 0, "running": 0}
+
+
+def test_burst_cannot_overfill_the_wait_queue(claw_state, monkeypatch):
+    monkeypatch.setattr(agent_queue, "POLL_INTERVAL_S", 0.01)
+    real_queue_depth = agent_queue.queue_depth
+
+    def slow_queue_depth(pool):
+        # Widen the gap between checking the queue and writing the ticket
+        depth = real_queue_depth(pool)
+        time.sleep(0.02)
+        return depth
+
+    monkeypatch.setattr(agent_queue, "queue_depth", slow_queue_depth)
+    start = threading.Barrier(12)
+    queued = []
+    rejected = []
+
+    def caller():
+        start.wait()
+        try:
+            with agent_queue.job_slot(None, limit=1, pool="picoclaw", max_waiting=3, wait_timeout=2):
+                pass
+        except TimeoutError as exc:
+            (rejected if "queue full" in str(exc) else queued).append(exc)
+
+    with agent_queue.job_slot(None, limit=1, pool="picoclaw"):
+        threads = [threading.Thread(target=caller) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+    assert (len(queued), len(rejected)) == (3, 9)
+
+
+def test_cancel_during_runner_update_is_not_overwritten(claw_state, monkeypatch):
+    job_id = "job-race"
+    agent_queue.update_job(job_id, backend="cursor", status="queued", params={})
+    real_read_json = agent_queue._read_json
+    cancels = []
+
+    def read_then_cancel(path):
+        job = real_read_json(path)
+        if not cancels and threading.current_thread() is threading.main_thread():
+            # cancel_job() runs between the runner's read and its write
+            cancels.append(threading.Thread(target=lambda: cancels.append(agent_queue.cancel_job(job_id))))
+            cancels[0].start()
+            time.sleep(0.2)
+        return job
+
+    monkeypatch.setattr(agent_queue, "_read_json", read_then_cancel)
+    agent_queue.update_job(job_id, status="running")
+    cancels[0].join(5)
+
+    assert cancels[1]["ok"]
+    assert cancels[1]["job"]["status"] == "cancelled"
+    assert agent_queue.load_job(job_id)["status"] == "cancelled"
+
+
+def test_max_concurrent_env(monkeypatch):
+    monkeypatch.setenv("CLAW_AGENT_MAX_CONCURRENT", "5")
+    assert agent_queue.max_concurrent() == 5
+    monkeypatch.setenv("CLAW_AGENT_MAX_CONCURRENT", "two")
+    assert agent_queue.max_concurrent() == agent_queue.DEFAULT_MAX_CONCURRENT
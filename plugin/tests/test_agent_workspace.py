@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import agent_workspace
+
+
+def test_invalid_walk_workers_falls_back_to_serial(tmp_path, monkeypatch):
+    monkeypatch.setenv("CLAW_WALK_WORKERS", "four")
+    (tmp_path / "a.txt").write_text("a")
+    assert agent_workspace.walk_workers() == 0
+    assert list(agent_workspace.snapshot_files(str(tmp_path))) == [str(tmp_path / "a.txt")]
+    monkeypatch.setenv("CLAW_WALK_WORKERS", "4")
+    assert agent_workspace.walk_workers() == 4
+
+
+def test_parse_porcelain_v2():
+    raw = b"\0".join([
+        b"1 .M N... 100644 100644 100644 abc abc src/main.py",
+        b"1 A. N... 000000 100644 100644 000 abc new file.txt",
+        b"2 R. N... 100644 100644 100644 abc abc R100 renamed.py",
+        b"old.py",
+        b"u UU N... 100644 100644 100644 100644 a b c conflict.txt",
+        b"? untracked dir/x.log",
+        b"! ignored.tmp",
+        b"",
+    ])
+    assert agent_workspace.parse_porcelain_v2(raw) == {
+        "src/main.py": ".M",
+        "new file.txt": "A.",
+        "renamed.py": "R.",
+        "old.py": "R<",
+        "conflict.txt": "UU",
+        "untracked dir/x.log": "?",
+        "ignored.tmp": "!",
+    }
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+                   cwd=repo, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    if not shutil.which("git"):
+        pytest.skip("git not installed")
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    (repo / ".gitignore").write_text("*.tmp\n")
+    for name in ["keep.txt", "edit.txt", "remove.txt", "commit-me.txt"]:
+        (repo / name).write_text(name)
+    (repo / "dirty.txt").write_text("v1")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-q", "-m", "init")
+    (repo / "dirty.txt").write_text("v2, already dirty before the run")
+    return repo
+
+
+def _bump(path, text):
+    # Same-size rewrites within one mtime tick would look unchanged; make both differ
+    path.write_text(text)
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+
+
+def test_diff_snapshot_git(repo):
+    before = agent_workspace.take_snapshot(str(repo))
+    assert before["method"] == "git"
+    assert set(before["entries"]) == {"dirty.txt"}
+
+    _bump(repo / "edit.txt", "edited")
+    _bump(repo / "dirty.txt", "v3, edited again")
+    (repo / "remove.txt").unlink()
+    (repo / "sub").mkdir()
+    (repo / "sub" / "new.py").write_text("print()")
+    (repo / "scratch.tmp").write_text("ignored")
+    # A change the agent committed itself is still reported
+    _bump(repo / "commit-me.txt", "committed by the agent")
+    _git(repo, "commit", "-q", "-am", "agent commit")
+
+    changes = agent_workspace.diff_snapshot(before)
+    r = str(repo)
+    assert changes == {
+        "method": "git",
+        "created": [f"{r}/sub/new.py"],
+        "modified": [f"{r}/commit-me.txt", f"{r}/dirty.txt", f"{r}/edit.txt"],
+        "deleted": [f"{r}/remove.txt"],
+    }
+
+
+def test_diff_snapshot_git_untouched_dirty_file_is_not_reported(repo):
+    before = agent_workspace.take_snapshot(str(repo))
+    assert agent_workspace.diff_snapshot(before) == {
+        "method": "git", "created": [], "modified": [], "deleted": []}
+
+
+@pytest.mark.parametrize("workers", [0, 4])
+def test_diff_snapshot_walk(tmp_path, workers, monkeypatch):
+    monkeypatch.setenv("CLAW_WALK_WORKERS", str(workers))
+    for rel in ["a.txt", "b.txt", "deep/x/y/c.txt", ".hidden/skip.txt"]:
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text(rel)
+    before = agent_workspace.take_snapshot(str(tmp_path))
+    assert before["method"] == "walk"
+    assert not any(".hidden" in p for p in before["files"])
+
+    _bump(tmp_path / "a.txt", "changed")
+    (tmp_path / "b.txt").unlink()
+    (tmp_path / "deep" / "x" / "new.txt").write_text("new")
+    (tmp_path / ".hidden" / "also-skipped.txt").write_text("x")
+
+    assert agent_workspace.diff_snapshot(before) == {
+        "method": "walk",
+        "created": [str(tmp_path / "deep" / "x" / "new.txt")],
+        "modified": [str(tmp_path / "a.txt")],
+        "deleted": [str(tmp_path / "b.txt")],
+    }
+
+
+def test_diff_snapshot_without_snapshot():
+    assert agent_workspace.diff_snapshot(None) == {"method": "none", "created": [], "modified": [], "deleted": []}
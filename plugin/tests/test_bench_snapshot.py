@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import bench_snapshot
+
+
+def _count(root):
+    return sum(1 for p in root.rglob("*") if p.is_file())
+
+
+def test_ensure_tree_regenerates_stale_and_partial_trees(tmp_path):
+    root = tmp_path / "tree"
+    marker = tmp_path / "tree.bench"
+    assert bench_snapshot.ensure_tree(str(root), 300) == str(root)
+    assert _count(root) == 300 and marker.read_text() == "300"
+
+    # Fewer files than the cached tree: rebuilt, not reused
+    bench_snapshot.ensure_tree(str(root), 50)
+    assert _count(root) == 50
+
+    # Interrupted generation (empty marker) with leftovers: rebuilt
+    marker.write_text("")
+    (root / "leftover.txt").write_text("x")
+    bench_snapshot.ensure_tree(str(root), 50)
+    assert _count(root) == 50 and not (root / "leftover.txt").exists()
+
+
+def test_ensure_tree_uses_an_existing_tree_as_is(tmp_path):
+    repo = tmp_path / "monorepo"
+    repo.mkdir()
+    (repo / "main.py").write_text("print()")
+    assert bench_snapshot.ensure_tree(str(repo), 1000) == str(repo)
+    assert _count(repo) == 1
+    assert not (tmp_path / "monorepo.bench").exists()
+
+
+def test_legacy_glob_matches_the_original_extension_set(tmp_path):
+    for name in ["a.py", "Cargo.toml", "b.css", "c.bin", "d.yaml"]:
+        (tmp_path / name).write_text("x")
+    found = {p.rsplit("/", 1)[1] for p in bench_snapshot.legacy_snapshot_files(str(tmp_path))}
+    assert found == {"a.py", "Cargo.toml", "b.css"}
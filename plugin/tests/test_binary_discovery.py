@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import pytest
+
+import binary_discovery
+
+
+@pytest.fixture(autouse=True)
+def cache_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(binary_discovery, "CACHE_FILE", tmp_path / "binaries.json")
+
+
+def test_version_is_cached_until_the_binary_changes(make_script):
+    binary = make_script("tool", 'echo "tool 1.0"\n')
+    assert binary_discovery.probe_version(binary) == {"path": binary, "version": "tool 1.0", "cached": False}
+    assert binary_discovery.probe_version(binary)["cached"] is True
+    make_script("tool", 'echo "tool 2.0 (rebuilt)"\n')
+    assert binary_discovery.probe_version(binary)["version"] == "tool 2.0 (rebuilt)"
+
+
+def test_failed_probe_is_an_error_and_not_cached(make_script):
+    binary = make_script("tool", 'echo "unknown option --version" >&2\nexit 2\n')
+    info = binary_discovery.probe_version(binary)
+    assert info == {"path": binary, "error": "--version exited with 2: unknown option --version"}
+    assert binary_discovery._load_cache() == {}
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import claw_core_client
+
+
+class FakeRuntime:
+    """Stand-in for claw_core's socket API: the pooled session has run out of commands."""
+
+    def __init__(self):
+        self.sessions = {"s-old": {"name": None, "limit_hit": True}}
+        self.calls = []
+
+    def send(self, method, params=None, socket_path=None, timeout_s=60):
+        params = params or {}
+        self.calls.append((method, params.get("session_id")))
+        if method == "session.list":
+            return {"ok": True, "data": {"sessions": [
+                {"session_id": sid, "name": s["name"]} for sid, s in self.sessions.items()]}}
+        if method == "session.create":
+            sid = f"s-{len(self.calls)}"
+            self.sessions[sid] = {"name": params.get("name"), "limit_hit": False}
+            return {"ok": True, "data": {"session_id": sid}}
+        if method == "session.destroy":
+            self.sessions.pop(params["session_id"], None)
+            return {"ok": True, "data": {}}
+        if method == "exec.run":
+            if self.sessions[params["session_id"]]["limit_hit"]:
+                return {"ok": False, "error": {"code": "SESSION_LIMIT_EXCEEDED", "message": "max commands"}}
+            return {"ok": True, "data": {"stdout": "hi\n", "stderr": "", "exit_code": 0}}
+        raise AssertionError(method)
+
+
+def test_session_limit_exceeded_replaces_pooled_session(tmp_path, monkeypatch):
+    runtime = FakeRuntime()
+    runtime.sessions["s-old"]["name"] = claw_core_client.session_name(str(tmp_path))
+    monkeypatch.setattr(claw_core_client, "send", runtime.send)
+
+    result = claw_core_client.run_in_session(["echo", "hi"], str(tmp_path), timeout_s=5)
+
+    assert result["returncode"] == 0 and result["stdout"] == "hi\n"
+    assert ("session.destroy", "s-old") in runtime.calls
+    assert result["session_id"] != "s-old"
+    assert runtime.sessions[result["session_id"]]["name"] == claw_core_client.session_name(str(tmp_path))
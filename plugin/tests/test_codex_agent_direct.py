@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import codex_agent_direct
+from codex_agent_direct import CodexEventParser
+
+
+@pytest.mark.parametrize("event", [
+    {"type": "item.completed", "item": "not an object"},
+    {"type": "item.completed", "item": None},
+    {"type": "item.completed", "item": {"type": "agent_message", "text": None}},
+    {"type": "item.completed", "item": {"type": "agent_message", "text": 42}},
+    {"type": "item.completed", "item": {"type": "error", "message": None}},
+    {"type": "turn.failed", "error": {"message": None}},
+    {"type": "error", "message": None},
+])
+def test_malformed_events_do_not_raise(event):
+    parser = CodexEventParser(max_errors=0, on_event=lambda e: None)
+    parser.feed_line(json.dumps(event))
+    assert parser.text() == ""
+
+
+def test_agent_messages_and_errors():
+    parser = CodexEventParser(max_errors=2)
+    assert not parser.feed_line(json.dumps({"type": "item.completed",
+                                            "item": {"type": "agent_message", "text": " done \n"}}))
+    assert not parser.feed_line(json.dumps({"type": "error", "message": "rate limited"}))
+    assert parser.feed_line(json.dumps({"type": "error", "message": "rate limited"}))
+    assert parser.abort_reason == "2 error events"
+    assert parser.text() == "done\n\n[error] rate limited\n\n[error] rate limited"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _feed(parser, clock, at_s, event):
+    clock.now = 1000.0 + at_s
+    parser.feed_line(json.dumps(event))
+
+
+def test_telemetry_turns_tokens_and_tools(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(codex_agent_direct.time, "monotonic", clock)
+    parser = CodexEventParser(max_errors=0)
+    _feed(parser, clock, 0.5, {"type": "thread.started", "thread_id": "t"})
+    _feed(parser, clock, 1.0, {"type": "turn.started"})
+    _feed(parser, clock, 2.0, {"type": "item.started", "item": {"id": "c1", "type": "command_execution"}})
+    _feed(parser, clock, 3.5, {"type": "item.completed",
+                               "item": {"id": "c1", "type": "command_execution", "exit_code": 0}})
+    _feed(parser, clock, 4.0, {"type": "item.started", "item": {"id": "c2", "type": "command_execution"}})
+    _feed(parser, clock, 4.25, {"type": "item.completed",
+                                "item": {"id": "c2", "type": "command_execution", "exit_code": 2}})
+    _feed(parser, clock, 5.0, {"type": "item.completed", "item": {"id": "f1", "type": "file_change"}})
+    _feed(parser, clock, 5.5, {"type": "item.completed", "item": {"id": "m1", "type": "mcp_tool_call"}})
+    _feed(parser, clock, 6.0, {"type": "item.completed", "item": {"id": "a1", "type": "agent_message", "text": "ok"}})
+    _feed(parser, clock, 7.0, {"type": "turn.completed",
+                               "usage": {"input_tokens": 100, "cached_input_tokens": 40, "output_tokens": 7}})
+    _feed(parser, clock, 8.0, {"type": "turn.started"})
+    _feed(parser, clock, 10.0, {"type": "turn.failed", "error": {"message": "boom"},
+                                "usage": {"input_tokens": 50, "output_tokens": "n/a"}})
+
+    telemetry = parser.telemetry()
+    assert telemetry == {
+        "turns": 2,
+        "items": {"agent_message": 1, "command_execution": 2, "file_change": 1, "mcp_tool_call": 1},
+        "tool_calls": 2,
+        "commands": 2,
+        "command_failures": 1,
+        "tokens": {"input": 150, "cached_input": 40, "output": 7},
+        "first_event_ms": 500,
+        "command_ms": 1750,
+        "turn_details": [
+            {"status": "completed", "duration_ms": 6000,
+             "input_tokens": 100, "cached_input_tokens": 40, "output_tokens": 7},
+            {"status": "failed", "duration_ms": 2000, "input_tokens": 50},
+        ],
+    }
+    replayed = parser.telemetry(timing=False)
+    assert "first_event_ms" not in replayed and "command_ms" not in replayed
+    assert [t.get("duration_ms") for t in replayed["turn_details"]] == [None, None]
+
+
+def test_telemetry_of_an_empty_stream():
+    telemetry = CodexEventParser().telemetry(timing=False)
+    assert telemetry == {"turns": 0, "items": {}, "tool_calls": 0, "commands": 0,
+                         "command_failures": 0, "tokens": None, "turn_details": []}
+
+
+def test_telemetry_keeps_a_bounded_turn_list():
+    parser = CodexEventParser(max_errors=0)
+    for _ in range(codex_agent_direct.MAX_TELEMETRY_TURNS + 5):
+        parser.feed_line(json.dumps({"type": "turn.completed", "usage": {"output_tokens": 1}}))
+    telemetry = parser.telemetry()
+    assert telemetry["turns"] == codex_agent_direct.MAX_TELEMETRY_TURNS + 5
+    assert len(telemetry["turn_details"]) == codex_agent_direct.MAX_TELEMETRY_TURNS
+    assert telemetry["tokens"] == {"output": codex_agent_direct.MAX_TELEMETRY_TURNS + 5}
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+import os
+import stat
+
+import pytest
+
+import config_store
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"model": "m1", "providers": {"openai": {"api_key": "sk-old"}}, "debug": False}))
+    path.chmod(0o640)
+    return path
+
+
+def test_dotted_keys_write_nested_objects(config_file):
+    diff = config_store.update_json(config_file, [
+        ("providers.openai.api_key", "sk-new"),
+        ("providers.anthropic.base_url", "https://example.invalid"),
+        ("model", "m2"),
+        ("model", "m3"),  # later changes to the same key win
+    ])
+    doc = json.loads(config_file.read_text())
+    assert doc == {
+        "model": "m3",
+        "providers": {"openai": {"api_key": "sk-new"}, "anthropic": {"base_url": "https://example.invalid"}},
+        "debug": False,
+    }
+    assert diff["created"] is False and diff["unchanged"] == []
+    assert diff["changed"] == [
+        {"key": "providers.openai.api_key", "old": "sk-old", "new": "sk-new"},
+        {"key": "providers.anthropic.base_url", "old": None, "new": "https://example.invalid"},
+        {"key": "model", "old": "m1", "new": "m3"},
+    ]
+
+
+def test_no_rewrite_when_nothing_changes(config_file):
+    before = os.stat(config_file)
+    diff = config_store.update_json(config_file, [("model", "m1"), ("debug", False)])
+    assert diff == {"changed": [], "unchanged": ["model", "debug"], "created": False}
+    after = os.stat(config_file)
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+
+
+def test_atomic_replace_keeps_the_file_mode(config_file):
+    before_ino = os.stat(config_file).st_ino
+    config_store.update_json(config_file, [("model", "m2")])
+    st = os.stat(config_file)
+    assert stat.S_IMODE(st.st_mode) == 0o640
+    assert st.st_ino != before_ino  # replaced by rename, not rewritten in place
+    assert [p.name for p in config_file.parent.iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_missing_file_is_created_private(tmp_path):
+    path = tmp_path / "sub" / "new.json"
+    diff = config_store.update_json(path, [("a.b", 1)])
+    assert diff["created"] is True
+    assert json.loads(path.read_text()) == {"a": {"b": 1}}
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_invalid_changes_leave_the_file_alone(config_file):
+    original = config_file.read_text()
+    with pytest.raises(ValueError, match="'model' is not an object"):
+        config_store.update_json(config_file, [("debug", True), ("model.name", "x")])
+    with pytest.raises(ValueError, match="invalid key"):
+        config_store.update_json(config_file, [("providers..openai", 1)])
+    assert config_file.read_text() == original
+
+    config_file.write_text("[1, 2]")
+    with pytest.raises(ValueError, match="does not contain a JSON object"):
+        config_store.update_json(config_file, [("a", 1)])
+
+
+def test_load_json_cache_invalidates_on_change(tmp_path):
+    path = tmp_path / "c.json"
+    path.write_text('{"v": 1}')
+    first = config_store.load_json(path)
+    assert first == {"v": 1}
+    assert config_store.load_json(path) is first  # unchanged: served from the cache
+
+    # In-place rewrite with the same size and inode: the new mtime invalidates
+    st = os.stat(path)
+    path.write_text('{"v": 2}')
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert config_store.load_json(path) == {"v": 2}
+
+    # Atomic rename over the file, mtime forced back to the old value: the new inode invalidates
+    st = os.stat(path)
+    replacement = tmp_path / "c.json.new"
+    replacement.write_text('{"v": 3}')
+    os.utime(replacement, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(replacement, path)
+    assert config_store.load_json(path) == {"v": 3}
+
+    # Written by update_json()
+    config_store.update_json(path, [("v", 4)])
+    assert config_store.load_json(path) == {"v": 4}
+
+
+def test_load_json_copies_and_errors(tmp_path):
+    path = tmp_path / "c.json"
+    path.write_text('{"a": {"b": 1}}')
+    copy = config_store.load_json(path, copy=True)
+    copy["a"]["b"] = 2
+    assert config_store.load_json(path) == {"a": {"b": 1}}
+
+    path.write_text("{broken")
+    with pytest.raises(json.JSONDecodeError):
+        config_store.load_json(path)
+    assert config_store.read_json(path) == {}
+    path.write_text('{"a": 5}')
+    assert config_store.load_json(path) == {"a": 5}
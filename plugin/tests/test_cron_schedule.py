@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from cron_schedule import next_cron, next_run, parse_cron, upcoming
+
+UTC = timezone.utc
+NY = ZoneInfo("America/New_York")
+# Sunday 2026-10-18 12:00:30 UTC
+AFTER = datetime(2026, 10, 18, 12, 0, 30, tzinfo=UTC)
+
+
+@pytest.mark.parametrize("expr, tz, expected", [
+    ("0 9 * * *", "Asia/Hong_Kong", datetime(2026, 10, 19, 1, 0, tzinfo=UTC)),
+    ("*/15 * * * *", "UTC", datetime(2026, 10, 18, 12, 15, tzinfo=UTC)),
+    ("5/20 * * * *", "UTC", datetime(2026, 10, 18, 12, 5, tzinfo=UTC)),
+    ("0 12 * * mon-fri", "UTC", datetime(2026, 10, 19, 12, 0, tzinfo=UTC)),
+    ("0 0 * * 7", "UTC", datetime(2026, 10, 25, 0, 0, tzinfo=UTC)),
+    ("0 0 1 jan *", "UTC", datetime(2027, 1, 1, 0, 0, tzinfo=UTC)),
+    ("0 0 29 2 *", "UTC", datetime(2028, 2, 29, 0, 0, tzinfo=UTC)),
+    ("@hourly", "UTC", datetime(2026, 10, 18, 13, 0, tzinfo=UTC)),
+    ("*/10 * * * * *", "UTC", datetime(2026, 10, 18, 12, 0, 40, tzinfo=UTC)),
+])
+def test_next_cron(expr, tz, expected):
+    assert next_cron(expr, tz, AFTER) == expected
+
+
+def test_strictly_after():
+    at_fire_time = datetime(2026, 10, 18, 12, 15, tzinfo=UTC)
+    assert next_cron("*/15 * * * *", "UTC", at_fire_time) == datetime(2026, 10, 18, 12, 30, tzinfo=UTC)
+
+
+def test_day_fields_or_when_both_restricted():
+    # Vixie cron: the 13th OR a Friday -> Friday 2026-10-23 comes before Nov 13
+    assert next_cron("0 0 13 * 5", "UTC", AFTER) == datetime(2026, 10, 23, 0, 0, tzinfo=UTC)
+    # With day-of-month "*", only the weekday restricts
+    assert next_cron("0 0 * * 5", "UTC", AFTER) == datetime(2026, 10, 23, 0, 0, tzinfo=UTC)
+    # With day-of-week "*", only the day of month restricts
+    assert next_cron("0 0 13 * *", "UTC", AFTER) == datetime(2026, 11, 13, 0, 0, tzinfo=UTC)
+
+
+def test_impossible_date_never_fires():
+    assert next_cron("0 0 30 2 *", "UTC", AFTER) is None
+
+
+def test_dst_gap_fires_right_after_the_jump():
+    # 2027-03-14 02:30 does not exist in New York (02:00 EST -> 03:00 EDT)
+    fire = next_cron("30 2 * * *", "America/New_York", datetime(2027, 3, 14, 5, 0, tzinfo=UTC))
+    assert fire == datetime(2027, 3, 14, 7, 30, tzinfo=UTC)
+    assert fire.astimezone(NY).strftime("%H:%M %Z") == "03:30 EDT"
+
+
+def test_dst_repeated_hour_fires_once():
+    # 2026-11-01 01:30 happens twice in New York (01:59 EDT -> 01:00 EST)
+    fires = []
+    t = datetime(2026, 11, 1, 4, 0, tzinfo=UTC)
+    for _ in range(2):
+        t = next_cron("30 1 * * *", "America/New_York", t)
+        fires.append(t)
+    assert fires == [datetime(2026, 11, 1, 5, 30, tzinfo=UTC), datetime(2026, 11, 2, 6, 30, tzinfo=UTC)]
+
+
+def test_every_minute_across_the_repeated_hour_keeps_advancing():
+    t = datetime(2026, 11, 1, 5, 58, tzinfo=UTC)  # 01:58 EDT
+    seen = []
+    for _ in range(4):
+        t = next_cron("* * * * *", "America/New_York", t)
+        seen.append(t)
+    assert all(b > a for a, b in zip(seen, seen[1:]))
+
+
+@pytest.mark.parametrize("expr", ["* * *", "61 * * * *", "0 0 * * 8", "a b c d e", "*/0 * * * *", "5-1 * * * *"])
+def test_invalid_expressions(expr):
+    with pytest.raises(ValueError):
+        parse_cron(expr)
+
+
+def test_unknown_time_zone():
+    with pytest.raises(ValueError, match="unknown time zone"):
+        next_cron("0 0 * * *", "Mars/Base", AFTER)
+
+
+def test_every_and_at_schedules():
+    every = {"kind": "every", "everyMs": 30 * 60 * 1000}
+    assert next_run(every, AFTER, "2026-10-18T10:20:00Z") == datetime(2026, 10, 18, 12, 20, tzinfo=UTC)
+    assert next_run(dict(every, anchorMs=int(datetime(2026, 10, 18, 0, 0, tzinfo=UTC).timestamp() * 1000)), AFTER) == datetime(2026, 10, 18, 12, 30, tzinfo=UTC)
+    assert next_run({"kind": "at", "at": "2026-10-19T09:00:00+08:00"}, AFTER) == \
+        datetime(2026, 10, 19, 1, 0, tzinfo=UTC)
+    assert next_run({"kind": "at", "at": "2020-01-01T00:00:00Z"}, AFTER) is None
+    with pytest.raises(ValueError):
+        next_run({"kind": "every", "everyMs": 0}, AFTER)
+
+
+def test_upcoming_sorts_by_next_fire_time():
+    jobs = [
+        {"jobId": "weekly", "schedule": {"kind": "cron", "expr": "0 22 * * 5", "tz": "Asia/Hong_Kong"}},
+        {"jobId": "bad", "schedule": {"kind": "cron", "expr": "99 * * * *"}},
+        {"jobId": "past", "schedule": {"kind": "at", "at": "2020-01-01T00:00:00Z"}},
+        {"jobId": "daily", "schedule": {"kind": "cron", "expr": "0 9 * * *", "tz": "Asia/Hong_Kong"}},
+        {"jobId": "off", "enabled": False, "schedule": {"kind": "cron", "expr": "* * * * *"}},
+    ]
+    order = [(job["jobId"], fire, error is not None) for fire, job, error in upcoming(jobs, AFTER)]
+    assert order[:2] == [("daily", datetime(2026, 10, 19, 1, 0, tzinfo=UTC), False),
+                         ("weekly", datetime(2026, 10, 23, 14, 0, tzinfo=UTC), False)]
+    assert {(job_id, is_error) for job_id, fire, is_error in order[2:]} == \
+        {("bad", True), ("past", False), ("off", False)}
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+import cursor_agent_direct
+from conftest import SCRIPTS_DIR
+
+
+def test_stall_timeout_env(monkeypatch):
+    monkeypatch.setenv("CLAW_CURSOR_STALL_TIMEOUT_S", "45")
+    assert cursor_agent_direct.stall_timeout() == 45
+    monkeypatch.setenv("CLAW_CURSOR_STALL_TIMEOUT_S", "5m")
+    assert cursor_agent_direct.stall_timeout() == cursor_agent_direct.DEFAULT_STALL_TIMEOUT_S
+
+
+def test_bad_env_does_not_break_import():
+    env = dict(os.environ, CLAW_CURSOR_STALL_TIMEOUT_S="5m", CLAW_AGENT_MAX_CONCURRENT="two",
+               CLAW_AUTO_TIMEOUT_MARGIN="x2", CLAW_AUTO_TIMEOUT_MIN_S="1m", CLAW_HEDGE_DELAY_S="20s")
+    result = subprocess.run([sys.executable, "-c", "import cursor_agent_direct, codex_agent_direct, agent_hedge"],
+                            cwd=SCRIPTS_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
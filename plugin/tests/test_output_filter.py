@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from output_filter import DeltaFilter, LineFilter, collapse_cr, drop_matching, make_filter, merge_stats, strip_ansi
+
+
+def test_strip_ansi_and_collapse_cr():
+    assert strip_ansi(b"\x1b[1;32mok\x1b[0m \x1b]0;title\x07done") == b"ok done"
+    assert collapse_cr(b"10%\r50%\r100%") == b"100%"
+    assert collapse_cr(b"windows line\r") == b"windows line"
+
+
+def test_folds_runs_of_identical_lines():
+    f = make_filter()
+    assert f.apply("warn\nwarn\nwarn\nok\n") == "warn\n... [previous line repeated 2 more times]\nok\n"
+    assert f.stats()["folded_lines"] == 2
+
+
+def test_blank_lines_are_never_folded():
+    assert make_filter().apply("a\n\n\n\nb\n") == "a\n\n\n\nb\n"
+
+
+def test_without_folding_repeated_lines_are_kept():
+    f = LineFilter((strip_ansi, collapse_cr), fold_duplicates=False)
+    assert f.apply("x\nx\nx\n") == "x\nx\nx\n"
+
+
+def test_trailing_repeat_marker_is_flushed_on_close():
+    f = make_filter()
+    out = f.feed(b"spin\nspin\n") + f.feed(b"spin\n") + f.close()
+    assert out == b"spin\n... [previous line repeated 2 more times]\n"
+
+
+def test_lines_split_across_chunks():
+    f = make_filter()
+    out = f.feed(b"\x1b[31mhel") + f.feed(b"lo\x1b[0m\nwor") + f.feed(b"ld") + f.close()
+    assert out == b"hello\nworld\n"
+
+
+def test_drop_matching():
+    f = make_filter([r"^MCP auth", r"deprecated"])
+    assert f.apply("MCP auth failed\nreal output\nthis API is deprecated\n") == "real output\n"
+    assert f.stats()["dropped_lines"] == 2
+    with pytest.raises(re.error):
+        drop_matching(["("])
+
+
+def test_over_long_line_is_flushed():
+    f = LineFilter(max_line_bytes=8)
+    assert f.feed(b"0123456789") == b"0123456789\n"
+
+
+def test_merge_stats():
+    a, b = make_filter(), make_filter()
+    a.apply("x\nx\n")
+    b.apply("y\n")
+    assert merge_stats(a, None, b) == {"bytes_in": 6, "bytes_out": 46, "dropped_lines": 0, "folded_lines": 1}
+    assert merge_stats(None) is None
+
+
+def _deltas(chunks):
+    f = DeltaFilter()
+    return [f.feed(chunk) for chunk in chunks] + [f.close()]
+
+
+def test_delta_filter_passes_partial_lines_through():
+    assert _deltas([b"Hel", b"lo wor", b"ld\nbye"]) == ["Hel", "lo wor", "ld\nbye", ""]
+
+
+def test_delta_filter_holds_split_escapes_and_characters():
+    assert _deltas([b"a\x1b[3", b"1mb\x1b[0", b"m caf\xc3", b"\xa9"]) == ["a", "b", " caf", "é", ""]
+    # An escape sequence still open at the end is dropped
+    assert _deltas([b"ok\x1b]0;tit"]) == ["ok", ""]
+    assert _deltas([b"a\x1b]0;title\x1b", b"\\b"]) == ["a", "b", ""]
+
+
+def test_delta_filter_releases_only_the_last_redraw():
+    chunks = [b"\r\xe2\xa0\x8b thinking", b"\r\xe2\xa0\x99 thinking\r", b"Answer", b" here\r\n", b"more"]
+    assert "".join(_deltas(chunks)) == "Answer here\nmore"
+    assert _deltas([b"10%\r50%", b"\r100%"]) == ["10%", "", "100%"]
+    assert _deltas([b"crlf\r", b"\nnext"]) == ["crlf", "\nnext", ""]
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import agent_ledger
+import picoclaw_client
+from conftest import SCRIPTS_DIR
+
+
+@pytest.fixture
+def fake_picoclaw(claw_state, make_script, monkeypatch):
+    """A picoclaw binary that answers `agent -m MSG` with MSG after a short delay."""
+    binary = make_script("picoclaw", 'sleep 0.2\necho "answer: $3"\n')
+    monkeypatch.setenv("PICOCLAW_PATH", binary)
+    monkeypatch.setattr(picoclaw_client, "PICOCLAW_CONFIG_PATHS", [claw_state / "missing-config.json"])
+    return binary
+
+
+def test_batch_workers_above_pool_limit_are_not_rejected(fake_picoclaw):
+    lines = [json.dumps({"id": f"q{i}", "message": f"m{i}"}) for i in range(8)]
+    out = io.StringIO()
+    summary = picoclaw_client.cmd_chat_batch(lines, out, workers=20, timeout_s=30,
+                                             max_concurrent=2, max_queue=1, queue_timeout_s=30)
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert summary["workers"] == 2
+    assert summary["ok"] == 8 and summary["failed"] == 0
+    assert not any(r.get("busy") for r in results)
+    assert sorted(r["response"] for r in results) == sorted(f"answer: m{i}" for i in range(8))
+
+
+def test_batch_item_exception_does_not_abort_batch(fake_picoclaw, monkeypatch):
+    real_cmd_chat = picoclaw_client.cmd_chat
+
+    def flaky_cmd_chat(message, **kwargs):
+        if message == "boom":
+            raise RuntimeError("chat exploded")
+        return real_cmd_chat(message, **kwargs)
+
+    monkeypatch.setattr(picoclaw_client, "cmd_chat", flaky_cmd_chat)
+    lines = ['"a"', '"boom"', '"b"', '"c"']
+    out = io.StringIO()
+    summary = picoclaw_client.cmd_chat_batch(lines, out, workers=1, timeout_s=30)
+    results = {r["index"]: r for r in map(json.loads, out.getvalue().splitlines())}
+    assert summary["total"] == 4 and summary["ok"] == 3 and summary["failed"] == 1
+    assert results[1] == {"index": 1, "ok": False, "error": "RuntimeError: chat exploded",
+                          "response": "", "duration_ms": 0}
+    assert results[3]["response"] == "answer: c"
+
+
+BAD_ENV = {
+    "CLAW_PICOCLAW_BATCH_WORKERS": "four",
+    "CLAW_PICOCLAW_MAX_CONCURRENT": "",
+    "CLAW_PICOCLAW_MAX_QUEUE": "8.5",
+    "CLAW_PICOCLAW_QUEUE_TIMEOUT_S": "1m",
+    "CLAW_PICOCLAW_SLO_MS": "30s",
+    "CLAW_PICOCLAW_SLO_TARGET": "95%",
+}
+
+
+def test_bad_env_falls_back_to_defaults(monkeypatch):
+    for name, value in BAD_ENV.items():
+        monkeypatch.setenv(name, value)
+    assert picoclaw_client._env_number("CLAW_PICOCLAW_BATCH_WORKERS", 4) == 4
+    assert picoclaw_client._env_number("CLAW_PICOCLAW_MAX_QUEUE", 8) == 8
+    assert picoclaw_client._env_number("CLAW_PICOCLAW_QUEUE_TIMEOUT_S", 60.0) == 60.0
+    monkeypatch.setenv("CLAW_PICOCLAW_BATCH_WORKERS", "6")
+    assert picoclaw_client._env_number("CLAW_PICOCLAW_BATCH_WORKERS", 4) == 6
+
+    for cmd in ("chat", "stats"):
+        result = subprocess.run([sys.executable, "picoclaw_client.py", cmd, "--help"], cwd=SCRIPTS_DIR,
+                                env=dict(os.environ, **BAD_ENV), capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+
+def test_config_set_reports_a_masked_diff(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"model": "m1", "api_key": "sk-abcdefghijklmnop"}))
+    monkeypatch.setattr(picoclaw_client, "PICOCLAW_CONFIG_PATHS", [path])
+
+    result = picoclaw_client.write_config_fields([("api_key", "sk-0123456789wxyz"), ("model", "m1"),
+                                                  ("providers.x.auth_token", "short")])
+    assert result["ok"] and result["unchanged"] == ["model"]
+    assert result["changed"] == [
+        {"key": "api_key", "old": "sk-abcde...mnop", "new": "sk-01234...wxyz"},
+        {"key": "providers.x.auth_token", "old": None, "new": "***"},
+    ]
+    # The file itself holds the real values
+    assert json.loads(path.read_text())["api_key"] == "sk-0123456789wxyz"
+
+
+def test_stream_forwards_partial_output_as_it_arrives(claw_state, make_script, monkeypatch):
+    # No newline until the very end: deltas must not wait for it
+    binary = make_script("picoclaw", "printf '\\033[1mThe'; sleep 0.5; printf ' answer'; sleep 0.5; printf '.\\n'\n")
+    monkeypatch.setenv("PICOCLAW_PATH", binary)
+    monkeypatch.setattr(picoclaw_client, "PICOCLAW_CONFIG_PATHS", [claw_state / "missing-config.json"])
+    deltas = []
+    result = picoclaw_client.cmd_chat("q", timeout_s=30, max_concurrent=0,
+                                      on_delta=lambda text, elapsed_ms: deltas.append((text, elapsed_ms)))
+    assert result["ok"] and result["response"] == "The answer."
+    assert [text for text, _ in deltas] == ["The", " answer", ".\n"]
+    assert deltas[0][1] < 400 <= deltas[1][1]
+    assert result["ttft_ms"] < 400
+
+
+@pytest.mark.parametrize("timeout", [True, False, 0, -5, "30", [1]])
+def test_batch_rejects_an_invalid_per_item_timeout(timeout):
+    item = picoclaw_client._batch_item(3, json.dumps({"id": "x", "message": "hi", "timeout": timeout}))
+    assert item["index"] == 3
+    assert "must be a positive number of seconds" in item["error"]
+
+
+def test_batch_item_timeout_overrides_the_default(fake_picoclaw):
+    lines = [json.dumps({"id": "slow", "message": "m", "timeout": 0.05}),
+             json.dumps({"id": "bad", "message": "m", "timeout": True}),
+             json.dumps({"id": "ok", "message": "m", "timeout": None})]
+    out = io.StringIO()
+    summary = picoclaw_client.cmd_chat_batch(lines, out, workers=3, timeout_s=30, max_concurrent=0)
+    results = {r["id"]: r for r in map(json.loads, out.getvalue().splitlines())}
+    assert "timed out" in results["slow"]["error"]
+    assert "positive number" in results["bad"]["error"]
+    assert results["ok"]["ok"]
+    assert summary["failed"] == 2
+
+
+def _record_chats(durations, error=None):
+    for duration in durations:
+        response = {"ok": error is None, "duration_ms": duration}
+        if error:
+            response["error"] = error
+        agent_ledger.record_run("picoclaw", "chat", "m", None, "hi", response)
+
+
+def _stats_main(monkeypatch, capsys, *argv):
+    monkeypatch.setattr(sys, "argv", ["picoclaw_client.py", "stats", *argv])
+    code = picoclaw_client.main()
+    return code, json.loads(capsys.readouterr().out)
+
+
+def test_stats_exit_code_follows_the_slo(claw_state, monkeypatch, capsys):
+    # No chats yet: the objective is unknown, not missed
+    code, report = _stats_main(monkeypatch, capsys, "--window", "1h")
+    assert code == 0 and report["windows"][0]["slo"] == {"within_rate": None, "met": None}
+
+    _record_chats([1000] * 9)
+    _record_chats([40_000], error="picoclaw timed out after 40s")
+    code, report = _stats_main(monkeypatch, capsys, "--window", "1h", "--slo-ms", "2000", "--slo-target", "0.9")
+    [window] = report["windows"]
+    assert window["runs"] == 10 and window["timeout_rate"] == 0.1
+    assert window["slo"] == {"within_rate": 0.9, "met": True} and code == 0
+
+    code, report = _stats_main(monkeypatch, capsys, "--window", "1h", "--window", "24h",
+                               "--slo-ms", "2000", "--slo-target", "0.95")
+    assert [w["slo"]["met"] for w in report["windows"]] == [False, False] and code == 1
+    assert report["slo_ms"] == 2000 and report["slo_target"] == 0.95
+
+    code, report = _stats_main(monkeypatch, capsys, "--window", "1h", "--slo-ms", "500", "--slo-target", "0.0")
+    assert report["windows"][0]["slo"]["within_rate"] == 0.0 and code == 0
+
+
+def test_stats_rejects_a_bad_window(claw_state, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["picoclaw_client.py", "stats", "--window", "soon"])
+    with pytest.raises(SystemExit) as exc:
+        picoclaw_client.main()
+    assert exc.value.code == 2
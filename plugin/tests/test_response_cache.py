@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+from response_cache import ResponseCache
+
+
+def _age(cache, key, seconds):
+    """Backdate an entry's created_at and mtime by `seconds`."""
+    path = cache._path(key)
+    entry = json.loads(path.read_text())
+    entry["created_at"] -= seconds
+    path.write_text(json.dumps(entry))
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_hit_and_ttl_expiry(claw_state):
+    cache = ResponseCache("test", ttl_s=60)
+    key = cache.key("cursor", "model", "prompt")
+    assert cache.get(key) is None
+    cache.put(key, {"answer": 42})
+    assert cache.get(key)["value"] == {"answer": 42}
+
+    _age(cache, key, 120)
+    assert cache.get(key) is None
+    assert not cache._path(key).exists()
+
+
+def test_key_is_stable_and_order_sensitive():
+    assert ResponseCache.key("a", {"x": 1, "y": 2}) == ResponseCache.key("a", {"y": 2, "x": 1})
+    assert ResponseCache.key("a", "b") != ResponseCache.key("b", "a")
+
+
+def test_lru_eviction_keeps_recently_read_entries(claw_state):
+    cache = ResponseCache("test", ttl_s=3600, max_entries=3)
+    keys = [cache.key(i) for i in range(3)]
+    for age, key in zip((30, 20, 10), keys):
+        cache.put(key, {"n": key})
+        _age(cache, key, age)
+
+    assert cache.get(keys[0]) is not None  # oldest entry, now the most recently used
+    cache.put(cache.key(3), {"n": 3})
+
+    assert cache.get(keys[1]) is None
+    assert all(cache.get(k) is not None for k in (keys[0], keys[2], cache.key(3)))
+
+
+def test_eviction_by_size_and_expired_entries(claw_state):
+    cache = ResponseCache("test", ttl_s=60, max_bytes=10_000)
+    stale = cache.key("stale")
+    cache.put(stale, {"n": "stale"})
+    _age(cache, stale, 120)
+    assert cache.evict() == 1
+
+    for i in range(5):
+        cache.put(cache.key(i), {"blob": "x" * 3000})
+    files = list(cache.dir.glob("*.json"))
+    assert len(files) == 3
+    assert sum(f.stat().st_size for f in files) <= 10_000
+
+
+def test_corrupt_entry_is_a_miss(claw_state):
+    cache = ResponseCache("test")
+    key = cache.key("x")
+    cache.dir.mkdir(parents=True)
+    cache._path(key).write_text("{not json")
+    assert cache.get(key) is None
+    assert cache.clear() == 1
+
+
+def test_concurrent_puts_of_one_key_use_separate_temp_files(claw_state, monkeypatch):
+    cache = ResponseCache("test")
+    key = cache.key("same question")
+    real_replace = os.replace
+    both_written = threading.Barrier(2, timeout=5)
+    replaced = []
+
+    def replace_when_both_wrote(src, dst):
+        # Both writers have written their temp file before either renames it
+        both_written.wait()
+        real_replace(src, dst)
+        replaced.append(os.fspath(src))
+
+    monkeypatch.setattr(os, "replace", replace_when_both_wrote)
+    threads = [threading.Thread(target=cache.put, args=(key, {"writer": i})) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    monkeypatch.undo()
+
+    assert len(set(replaced)) == 2
+    assert cache.get(key)["value"] in ({"writer": 0}, {"writer": 1})
+    assert [p.name for p in cache.dir.iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_entry_that_is_not_an_object_is_a_miss(claw_state):
+    cache = ResponseCache("test")
+    cache.dir.mkdir(parents=True)
+    for i, raw in enumerate(["[1, 2]", '"text"', "null", '{"created_at": "yesterday", "value": {}}']):
+        key = cache.key(i)
+        cache._path(key).write_text(raw)
+        assert cache.get(key) is None
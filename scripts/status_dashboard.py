@@ -14,6 +14,8 @@ import uuid
 from datetime import datetime
 from pathlib import Path
 
+from cron_schedule import upcoming
+
 SOCKET = os.environ.get("CLAW_CORE_SOCKET", "/tmp/trl.sock")
 CRON_FILE = os.path.expanduser("~/.openclaw/cron/jobs.json")
 
@@ -52,6 +54,17 @@ def format_time_ago(iso_str: str) -> str:
         return iso_str
 
 
+def format_time_until(dt: datetime) -> str:
+    secs = int((dt - datetime.now(dt.tzinfo)).total_seconds())
+    if secs < 60:
+        return f"in {max(secs, 0)}s"
+    if secs < 3600:
+        return f"in {secs//60}m"
+    if secs < 86400:
+        return f"in {secs//3600}h {secs % 3600 // 60}m"
+    return f"in {secs//86400}d {secs % 86400 // 3600}h"
+
+
 def get_sessions() -> list:
     if not os.path.exists(SOCKET):
         return []
@@ -155,12 +168,17 @@ def main() -> int:
     enabled_jobs = [j for j in jobs if j.get("enabled", True)]
     print(f"\n[Cron Jobs] ({len(enabled_jobs)} enabled / {len(jobs)} total)")
     if enabled_jobs:
-        for job in enabled_jobs:
+        # Soonest first; next fire times are computed (cron_schedule.py), stored nextRun may be stale
+        for next_run, job, error in upcoming(enabled_jobs):
             name = job.get("name", "(no name)")
             schedule = format_schedule(job.get("schedule", {}))
             target = job.get("sessionTarget", "?")
-            next_run = job.get("nextRun") or job.get("schedule", {}).get("at")
-            next_str = format_time_ago(next_run) if next_run else "pending"
+            if error:
+                next_str = f"invalid schedule ({error})"
+            elif next_run is None:
+                next_str = "none (already ran)"
+            else:
+                next_str = f"{format_time_until(next_run)}  ({next_run.astimezone().strftime('%Y-%m-%d %H:%M')})"
             print(f"  • {job.get('jobId', '?')[:12]}... [{target}] {name}")
             print(f"    schedule: {schedule}")
             print(f"    next run: {next_str}")